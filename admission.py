@@ -0,0 +1,169 @@
+"""
+Admission control for the chat API.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Every /chat request runs the LangGraph workflow, which makes slow Gemini calls.
+If 500 requests arrive at once and we start all of them, every one of them gets
+slow, many time out, and Gemini starts rejecting us. It is better to:
+  1. Run at most N workflows at the same time          (concurrency limit)
+  2. Let a limited number of requests WAIT for a slot  (bounded queue)
+  3. Give up waiting after a few seconds               (queue-time limit)
+  4. Stop a single client from flooding us             (per-client rate limit)
+  5. Answer "429 Too Many Requests" immediately, with a Retry-After header,
+     when we are full - instead of failing slowly with a 500
+
+Queue depth and in-flight counts are exported as metrics so an autoscaler
+can add workers before requests start getting rejected.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from metrics import Counter, Gauge, Histogram
+
+
+in_flight_requests = Gauge("api_in_flight_requests", "Graph executions currently running")
+queue_depth = Gauge("api_queue_depth", "Requests waiting for a free execution slot")
+queue_wait_seconds = Histogram("api_queue_wait_seconds", "Time requests waited for an execution slot")
+rejected_total = Counter("api_rejected_total", "Requests rejected with 429", ["reason"])
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request cannot be admitted.
+
+    Attributes:
+        reason (str): "queue_full", "queue_timeout", "rate_limited" or "jobs_full"
+        retry_after (int): Seconds the client should wait before retrying
+    """
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Server busy ({reason}), retry after {self.retry_after}s")
+
+
+class AdmissionController:
+    """
+    Concurrency limit plus a bounded, time-limited wait queue.
+
+    Usage:
+        controller = AdmissionController(max_concurrent=8, max_queue=32, queue_timeout=5)
+
+        async with controller.slot():
+            ...  # run the graph
+
+    Attributes:
+        max_concurrent (int): Maximum graph executions at the same time
+        max_queue (int): Maximum requests waiting for a slot
+        queue_timeout (float): Maximum seconds a request may wait
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        # Moving average of how long one execution holds a slot
+        self._avg_service_seconds = 1.0
+
+    def retry_after(self) -> float:
+        """Estimate how long until a slot frees up for a new request."""
+        return self._avg_service_seconds * (self.waiting + 1) / self.max_concurrent
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for (and hold) an execution slot, or raise Overloaded."""
+        if self.in_flight + self.waiting >= self.max_concurrent + self.max_queue:
+            rejected_total.inc(reason="queue_full")
+            raise Overloaded("queue_full", self.retry_after())
+
+        self.waiting += 1
+        queue_depth.set(self.waiting)
+        wait_start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            rejected_total.inc(reason="queue_timeout")
+            raise Overloaded("queue_timeout", self.retry_after())
+        finally:
+            self.waiting -= 1
+            queue_depth.set(self.waiting)
+            queue_wait_seconds.observe(time.monotonic() - wait_start)
+
+        self.in_flight += 1
+        in_flight_requests.set(self.in_flight)
+        service_start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - service_start
+            self._avg_service_seconds = 0.9 * self._avg_service_seconds + 0.1 * elapsed
+            self.in_flight -= 1
+            in_flight_requests.set(self.in_flight)
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Current load, for health checks and autoscaling."""
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+
+class RateLimiter:
+    """
+    Per-client token bucket.
+
+    Each client gets `burst` tokens that refill at `rate` tokens per second;
+    every request costs one token. Only the `max_clients` most recently seen
+    clients are tracked so memory stays bounded.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client_id: str) -> float:
+        """
+        Take one token for `client_id`.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(client_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                self._buckets[client_id] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[client_id] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+
+            self._buckets.move_to_end(client_id)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+    def check(self, client_id: str) -> None:
+        """Raise Overloaded if `client_id` has no token left."""
+        wait = self.acquire(client_id)
+        if wait > 0:
+            rejected_total.inc(reason="rate_limited")
+            raise Overloaded("rate_limited", wait)
@@ -20,7 +20,14 @@ How it works:
 All endpoints:
 - GET  /           → Welcome message
 - GET  /health     → Check if API is running
+- GET  /livez      → Liveness probe (process is up)
+- GET  /readyz     → Readiness probe (warmed up, index loaded; 503 otherwise)
+- GET  /metrics    → Prometheus metrics (latency, cache hits, errors, ...)
 - POST /chat       → Main endpoint for chatbot (MOST IMPORTANT!)
+- POST /chat/batch → Many queries in one request (JSON or streamed NDJSON)
+- POST /jobs       → Submit a query, get a job ID immediately
+- GET  /jobs/{id}  → Job status / answer (GET /jobs/{id}/events for SSE updates)
+- WS   /ws/chat    → WebSocket: many queries per connection, progress + streamed answers
 - GET  /docs       → Interactive documentation (Swagger UI)
 - GET  /redoc      → Alternative documentation (ReDoc)
 
@@ -32,16 +39,39 @@ Running:
     (Then visit http://localhost:8000/docs to test)
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import math
+from contextlib import AsyncExitStack, asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from starlette.requests import HTTPConnection
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 import os
+import threading
+import time
 from pathlib import Path
 
 # Import the LangGraph workflow
-from graph import process_query
+from admission import AdmissionController, Overloaded, RateLimiter
+from config import settings
+from deadline import deadline_after
+from resilience import CircuitOpen
+from graph import process_queries, process_query, stream_query
+from jobs import FINAL_STATUSES, JobManager
+from metrics import Counter, Histogram, errors_total, render_prometheus
+from logging_config import get_logger, setup_logging
+from tracing import new_request_id
+from warmup import Readiness
+
+
+setup_logging()
+logger = get_logger("api")
 
 
 # ============================================================================
@@ -65,15 +95,22 @@ class ChatRequest(BaseModel):
     
     Example:
     {
-        "query": "What is the price of SmartWatch Pro X?"
+        "query": "What is the price of SmartWatch Pro X?",
+        "session_id": "3f2a9c"
     }
+    
+    session_id is optional: queries with the same session_id share a
+    conversation, so follow-ups like "and its warranty?" are understood
+    (see memory.py). Without it every query stands alone.
     """
     query: str
+    session_id: Optional[str] = None
     
     class Config:
         json_schema_extra = {
             "example": {
-                "query": "What is the price of SmartWatch Pro X?"
+                "query": "What is the price of SmartWatch Pro X?",
+                "session_id": "3f2a9c"
             }
         }
 
@@ -104,14 +141,106 @@ class ChatResponse(BaseModel):
         }
 
 
+class JobResponse(BaseModel):
+    """
+    RESPONSE MODEL for the job endpoints (POST /jobs, GET /jobs/{id})
+    
+    Example:
+    {
+        "job_id": "3f9c2a7d1b6e4c08a1d95b0e7f2c4d31",
+        "request_id": "3f9c2a7d1b6e4c08a1d95b0e7f2c4d31",
+        "status": "done",
+        "query": "What is the price of SmartWatch Pro X?",
+        "response": "₹15,999"
+    }
+    """
+    job_id: str
+    request_id: str
+    status: str
+    query: str
+    session_id: Optional[str] = None
+    response: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class BatchChatRequest(BaseModel):
+    """
+    REQUEST MODEL for POST /chat/batch
+    
+    Example:
+    {
+        "queries": ["What is the price of SmartWatch Pro X?", "What is the return policy?"],
+        "stream": false
+    }
+    
+    With "stream": true the results are sent as NDJSON (one JSON object per
+    line) in the order they finish, instead of one JSON document at the end.
+    """
+    queries: list[str]
+    stream: bool = False
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": ["What is the price of SmartWatch Pro X?", "What is the return policy?"],
+                "stream": False
+            }
+        }
+
+
+class BatchItemResponse(BaseModel):
+    """
+    One answered query of a batch (status "ok" or "error").
+    """
+    index: int
+    query: str
+    request_id: str
+    status: str
+    response: Optional[str] = None
+    error: Optional[str] = None
+    duration_ms: float
+
+
+class BatchChatResponse(BaseModel):
+    """
+    RESPONSE MODEL for POST /chat/batch (non-streaming): results in input order.
+    """
+    results: list[BatchItemResponse]
+    duration_ms: float
+
+
 # ============================================================================
 # STEP 2: CREATE THE FASTAPI APPLICATION
 # ============================================================================
 
+# Tracks the startup warm-up; GET /readyz reports it
+readiness = Readiness()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup and shutdown of the API.
+    
+    On startup the warm-up (warmup.py) starts in the background: the server
+    answers /livez right away, and /readyz turns ready once the vector store,
+    Gemini clients and compiled graph are loaded.
+    """
+    logger.info("TechGear Chatbot API starting; interactive docs at /docs")
+    readiness.start()
+    yield
+    logger.info("API shutting down")
+    jobs.shutdown()
+
+
 app = FastAPI(
     title="🤖 TechGear Chatbot API",
     description="Intelligent chatbot powered by LangGraph and RAG",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 
@@ -132,8 +261,83 @@ app.add_middleware(
 )
 
 
+# Request metrics, labelled by route path (e.g. "/chat") and status code
+requests_total = Counter("api_requests_total", "HTTP requests handled", ["endpoint", "status"])
+request_seconds = Histogram("api_request_seconds", "HTTP request duration", ["endpoint"])
+
+
+@app.middleware("http")
+async def record_request_metrics(raw_request: Request, call_next):
+    """Count every request and time it, labelled by the matched route."""
+    start = time.perf_counter()
+    response = await call_next(raw_request)
+    
+    route = raw_request.scope.get("route")
+    endpoint = route.path if route else "unmatched"
+    request_seconds.observe(time.perf_counter() - start, endpoint=endpoint)
+    requests_total.inc(endpoint=endpoint, status=response.status_code)
+    
+    return response
+
+
+# ============================================================================
+# STEP 4: ADMISSION CONTROL
+# ============================================================================
+"""
+Protects the workflow (and our Gemini quota) from traffic spikes:
+- At most ADMISSION_MAX_CONCURRENT graph executions run at the same time
+- Up to ADMISSION_MAX_QUEUE requests wait, for at most ADMISSION_QUEUE_TIMEOUT seconds
+- Each client gets RATE_LIMIT_BURST requests, refilled at RATE_LIMIT_PER_SECOND
+- Anything beyond that gets a fast 429 with a Retry-After header
+"""
+
+admission = AdmissionController(
+    max_concurrent=settings.admission_max_concurrent,
+    max_queue=settings.admission_max_queue,
+    queue_timeout=settings.admission_queue_timeout
+)
+
+rate_limiter = RateLimiter(
+    rate=settings.rate_limit_per_second,
+    burst=settings.rate_limit_burst
+)
+
+
+def client_id(raw_request: HTTPConnection) -> str:
+    """Identify the caller for rate limiting (X-Client-ID header, else IP address)."""
+    if raw_request.headers.get("x-client-id"):
+        return raw_request.headers["x-client-id"]
+    return raw_request.client.host if raw_request.client else "unknown"
+
+
+def request_deadline(raw_request: HTTPConnection) -> float:
+    """
+    Deadline of a request: now + X-Request-Timeout seconds (capped at
+    settings.request_timeout_max), or settings.request_timeout without a valid header.
+    
+    The clock starts when the request arrives, so time spent waiting for an
+    admission slot is part of the budget.
+    """
+    try:
+        seconds = float(raw_request.headers.get("x-request-timeout", ""))
+    except ValueError:
+        return deadline_after()
+    if not seconds > 0:
+        return deadline_after()
+    return deadline_after(min(seconds, settings.request_timeout_max))
+
+
+def too_many_requests(error: Overloaded) -> HTTPException:
+    """Convert an Overloaded error into a 429 response with Retry-After."""
+    return HTTPException(
+        status_code=429,
+        detail=f"Server is busy ({error.reason}). Please retry in {error.retry_after} seconds.",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
 # ============================================================================
-# STEP 4: DEFINE API ENDPOINTS
+# STEP 5: DEFINE API ENDPOINTS
 # ============================================================================
 
 @app.get("/", response_class=FileResponse)
@@ -170,18 +374,64 @@ def health_check():
     
     Returns: JSON with health status
     """
-    chromadb_ready = os.path.exists("./chroma_db")
+    chromadb_ready = os.path.exists(settings.database_path)
     
     return {
         "status": "✅ Healthy" if chromadb_ready else "⚠️ Degraded",
         "api": "Running",
         "chromadb": "Ready" if chromadb_ready else "Not initialized - run ingest.py first",
+        "load": admission.stats(),
         "message": "Send POST requests to /chat with your queries"
     }
 
 
+@app.get("/livez")
+def liveness():
+    """
+    ENDPOINT: GET /livez
+    
+    Purpose: Liveness probe - the process is running and can answer HTTP.
+    
+    Restart the container only if this fails; it says nothing about whether
+    the worker is warmed up (see /readyz).
+    """
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+def readiness_check():
+    """
+    ENDPOINT: GET /readyz
+    
+    Purpose: Readiness probe - should this worker receive traffic?
+    
+    Returns 200 once the startup warm-up succeeded and the Chromadb index
+    contains documents, 503 (with the reason) otherwise. Load balancers and
+    the Docker healthcheck use this, so only warm workers get requests.
+    """
+    report = readiness.check()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    ENDPOINT: GET /metrics
+    
+    Purpose: Expose all metrics in the Prometheus text format
+    
+    Includes:
+    - /chat request counts and latency histograms
+    - Per-node latency (classifier, retriever, rag_responder, escalation, ...)
+    - Embedding, vector-search and LLM call timings
+    - Cache hit/miss counts, category distribution and error counts
+    - Admission control queue depth and rejections
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest, raw_request: Request, response: Response) -> ChatResponse:
     """
     ENDPOINT 3: POST /chat (⭐ MAIN CHATBOT ENDPOINT)
     
@@ -190,12 +440,17 @@ async def chat(request: ChatRequest) -> ChatResponse:
     How it works:
     1. Receive JSON: {"query": "user's question"}
     2. Validate the JSON structure
-    3. Send query to LangGraph workflow (graph.py)
+    3. Assign a request ID (returned in the X-Request-ID header) and a
+       deadline (X-Request-Timeout header, default settings.request_timeout),
+       then send the query to the LangGraph workflow (graph.py)
     4. Graph classifies query → routes to RAG or escalation
     5. RAG retrieves context from Chromadb
     6. LLM generates response based on context
     7. Return response as JSON
     
+    If the deadline runs out, the workflow answers on a degraded path
+    (escalation or an answer quoted from the catalog) instead of waiting.
+    
     Request Example:
     {
         "query": "What is the price of SmartWatch Pro X?"
@@ -223,25 +478,36 @@ async def chat(request: ChatRequest) -> ChatResponse:
     
     Raises:
         HTTPException(400): If query is empty
+        HTTPException(429): If the client is rate limited or the server is saturated
+        HTTPException(503): If Gemini's circuit breaker is open and no fallback applies
         HTTPException(500): If processing fails
     """
     
-    print(f"\n📥 Received chat request: {request.query}")
+    # Every request gets an ID (or reuses the caller's X-Request-ID) for tracing
+    request_id = raw_request.headers.get("x-request-id") or new_request_id()
+    response.headers["X-Request-ID"] = request_id
+    deadline = request_deadline(raw_request)
+    
+    log_extra = {"request_id": request_id}
+    logger.debug("Received chat request: %r", request.query, extra=log_extra)
     
     # Validate: Query cannot be empty
     if not request.query or not request.query.strip():
-        print("❌ Empty query rejected")
+        logger.info("Empty query rejected", extra=log_extra)
         raise HTTPException(
             status_code=400,
             detail="Query cannot be empty. Please provide a question."
         )
     
     try:
-        # Send to LangGraph workflow
-        print(f"🔄 Processing through LangGraph workflow...")
-        response_text = process_query(request.query)
+        # Admission control: rate limit per client, then wait for a free slot
+        rate_limiter.check(client_id(raw_request))
+        async with admission.slot():
+            # Send to LangGraph workflow (in a worker thread, so the server stays responsive)
+            response_text = await run_in_threadpool(process_query, request.query, request_id, deadline=deadline,
+                                                    session_id=request.session_id)
         
-        print(f"✅ Response generated: {response_text[:50]}...")
+        logger.debug("Response generated: %r", response_text[:50], extra=log_extra)
         
         # Return formatted response
         return ChatResponse(
@@ -249,10 +515,23 @@ async def chat(request: ChatRequest) -> ChatResponse:
             response=response_text
         )
     
+    except Overloaded as e:
+        logger.warning("Request rejected (%s), Retry-After: %ss", e.reason, e.retry_after,
+                       extra={**log_extra, "reason": e.reason})
+        raise too_many_requests(e)
+    
+    except CircuitOpen as e:
+        # Fail fast while Gemini is known to be down (the graph falls back where it can)
+        logger.warning("Request failed fast: %s", e, extra=log_extra)
+        raise HTTPException(
+            status_code=503,
+            detail="The assistant is temporarily unavailable. Please retry shortly.",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+    
     except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error processing chat request", extra=log_extra)
+        errors_total.inc(component="api")
         
         raise HTTPException(
             status_code=500,
@@ -260,8 +539,282 @@ async def chat(request: ChatRequest) -> ChatResponse:
         )
 
 
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest, raw_request: Request, response: Response):
+    """
+    ENDPOINT: POST /chat/batch
+    
+    Purpose: Answer many queries in ONE request (for back-office tools)
+    
+    How it works:
+    1. All queries are embedded and searched in one batched call
+    2. The graph runs for each query, at most BATCH_MAX_CONCURRENCY at a time
+    3. Every item gets its own status ("ok"/"error"), error message and timing;
+       one failing query never fails the whole batch
+    
+    The whole batch takes ONE admission slot and one rate-limit token.
+    
+    Usage with curl (streamed, one JSON line per finished query):
+        curl -N -X POST "http://localhost:8000/chat/batch" \\
+             -H "Content-Type: application/json" \\
+             -d '{"queries": ["What is the price of SmartWatch Pro X?", "What is the return policy?"], "stream": true}'
+    
+    Raises:
+        HTTPException(400): If the batch is empty or larger than BATCH_MAX_ITEMS
+        HTTPException(429): If the client is rate limited or the server is saturated
+    """
+    request_id = raw_request.headers.get("x-request-id") or new_request_id()
+    response.headers["X-Request-ID"] = request_id
+    
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one query.")
+    if len(request.queries) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {len(request.queries)} queries (maximum {settings.batch_max_items})."
+        )
+    
+    # Admission: hold one slot for the whole batch (released when the last result is sent)
+    slot = AsyncExitStack()
+    try:
+        rate_limiter.check(client_id(raw_request))
+        await slot.enter_async_context(admission.slot())
+    except Overloaded as e:
+        logger.warning("Batch rejected (%s), Retry-After: %ss", e.reason, e.retry_after,
+                       extra={"request_id": request_id, "reason": e.reason})
+        raise too_many_requests(e)
+    
+    start = time.perf_counter()
+    cancel = threading.Event()
+    items = process_queries(request.queries, request_id, cancel=cancel)
+    
+    if request.stream:
+        async def ndjson():
+            try:
+                async with slot:
+                    async for item in iterate_in_threadpool(items):
+                        yield json.dumps(item, ensure_ascii=False) + "\n"
+            finally:
+                # Client went away early: don't start the remaining queries. The
+                # generator may still be running in a worker thread, so it is only
+                # signalled here (closing it from this thread would fail)
+                cancel.set()
+        
+        # The background task frees the slot even if streaming never started
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson",
+                                 headers={"X-Request-ID": request_id}, background=BackgroundTask(slot.aclose))
+    
+    async with slot:
+        results = await run_in_threadpool(lambda: sorted(items, key=lambda item: item["index"]))
+    
+    return BatchChatResponse(results=results, duration_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+@app.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket):
+    """
+    ENDPOINT: WS /ws/chat (persistent chat channel)
+    
+    Purpose: Send many queries over ONE connection (no per-message HTTP
+    overhead) and receive progress events and the answer as it is generated.
+    
+    Client → server (one JSON message per query; "id" is echoed back,
+    "session_id" is optional and works as in POST /chat):
+        {"id": "1", "query": "What is the price of SmartWatch Pro X?", "session_id": "3f2a9c"}
+    
+    Server → client (every event carries the same "id" and a "request_id"):
+        {"type": "progress", "stage": "classified", "category": "product"}
+        {"type": "progress", "stage": "retrieved", "chunks": 2, "best_score": 0.81}
+        {"type": "progress", "stage": "generating"}
+        {"type": "token", "text": "The price is"}
+        {"type": "answer", "response": "The price is ₹15,999", "category": "product", "cached": false}
+    or
+        {"type": "error", "status": 400 | 429 | 500, "detail": "...", "retry_after": 3}
+    
+    Queries on one connection are answered one after another. Each one is
+    rate limited, takes an admission slot and gets settings.request_timeout
+    seconds, exactly like POST /chat.
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    
+    async def answer(message_id, query: str, session_id: Optional[str] = None) -> None:
+        request_id = new_request_id()
+        deadline = deadline_after()
+        
+        async def send(event: dict) -> None:
+            await websocket.send_json({"id": message_id, "request_id": request_id, **event})
+        
+        if not isinstance(query, str) or not query.strip():
+            await send({"type": "error", "status": 400, "detail": "Query cannot be empty."})
+            return
+        
+        try:
+            rate_limiter.check(client_id(websocket))
+            async with admission.slot():
+                # The graph runs in a worker thread; its events are handed over through a queue
+                events: asyncio.Queue = asyncio.Queue()
+                cancel = threading.Event()
+                
+                def produce() -> None:
+                    try:
+                        for event in stream_query(query, request_id, deadline, session_id):
+                            if cancel.is_set():
+                                # Nobody is listening any more: stop the graph run
+                                # (closing the generator ends the graph stream)
+                                break
+                            loop.call_soon_threadsafe(events.put_nowait, event)
+                    except Exception as e:
+                        loop.call_soon_threadsafe(events.put_nowait, e)
+                    finally:
+                        loop.call_soon_threadsafe(events.put_nowait, None)
+                
+                producer = loop.run_in_executor(None, produce)
+                try:
+                    while (event := await events.get()) is not None:
+                        if isinstance(event, Exception):
+                            raise event
+                        await send(event)
+                finally:
+                    # Client gone or query failed: stop the producer, and keep the
+                    # admission slot until its thread (and its LLM calls) is done
+                    cancel.set()
+                    await producer
+        
+        except Overloaded as e:
+            logger.warning("WebSocket query rejected (%s)", e.reason, extra={"request_id": request_id, "reason": e.reason})
+            await send({"type": "error", "status": 429, "detail": f"Server is busy ({e.reason}).",
+                        "retry_after": e.retry_after})
+        except WebSocketDisconnect:
+            raise
+        except Exception as e:
+            logger.exception("Error processing WebSocket query", extra={"request_id": request_id})
+            errors_total.inc(component="api")
+            await send({"type": "error", "status": 500, "detail": f"Error processing query: {e}"})
+    
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Messages must be JSON."})
+                continue
+            if not isinstance(message, dict):
+                message = {}
+            session_id = message.get("session_id")
+            await answer(message.get("id"), message.get("query"), session_id if isinstance(session_id, str) else None)
+    except WebSocketDisconnect:
+        logger.debug("WebSocket client disconnected")
+
+
+# Jobs run on their own bounded worker pool (not the /chat admission slots)
+jobs = JobManager(
+    handler=process_query,
+    max_workers=settings.job_workers,
+    max_pending=settings.job_max_pending,
+    ttl=settings.job_ttl,
+    store_size=settings.job_store_size
+)
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+def submit_job(request: ChatRequest, raw_request: Request, response: Response):
+    """
+    ENDPOINT: POST /jobs
+    
+    Purpose: Accept a query and return immediately with a job ID
+    (for clients behind proxies with short timeouts)
+    
+    The answer is fetched later with GET /jobs/{job_id}, or pushed with
+    GET /jobs/{job_id}/events. The job ID is always generated by the server;
+    an X-Request-ID header only becomes the job's trace request_id. With a
+    session_id the query runs with that conversation's memory (as on /chat).
+    
+    Usage with curl:
+        curl -X POST "http://localhost:8000/jobs" \\
+             -H "Content-Type: application/json" \\
+             -d '{"query": "What is the price of SmartWatch Pro X?"}'
+    
+    Raises:
+        HTTPException(400): If query is empty
+        HTTPException(429): If the client is rate limited or too many jobs are pending
+    """
+    if not request.query or not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty. Please provide a question.")
+    
+    try:
+        rate_limiter.check(client_id(raw_request))
+        job = jobs.submit(request.query, request_id=raw_request.headers.get("x-request-id"),
+                          session_id=request.session_id)
+    except Overloaded as e:
+        logger.warning("Job rejected (%s), Retry-After: %ss", e.reason, e.retry_after, extra={"reason": e.reason})
+        raise too_many_requests(e)
+    
+    response.headers["Location"] = f"/jobs/{job['job_id']}"
+    response.headers["X-Request-ID"] = job["request_id"]
+    return job
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str):
+    """
+    ENDPOINT: GET /jobs/{job_id}
+    
+    Purpose: Poll a job - status is "queued", "running", "done" or "failed"
+    
+    Raises:
+        HTTPException(404): If the job is unknown or expired (after JOB_TTL seconds)
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (unknown or expired).")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    ENDPOINT: GET /jobs/{job_id}/events
+    
+    Purpose: Subscribe to a job with Server-Sent Events (SSE)
+    
+    Sends a "status" event whenever the status changes and ends with a
+    "result" event holding the full job record:
+    
+        event: status
+        data: {"job_id": "...", "status": "running", ...}
+    
+        event: result
+        data: {"job_id": "...", "status": "done", "response": "₹15,999", ...}
+    
+    In a browser: new EventSource("/jobs/<id>/events")
+    
+    Raises:
+        HTTPException(404): If the job is unknown or expired
+    """
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found (unknown or expired).")
+    
+    async def events():
+        last_status = None
+        while True:
+            job = await run_in_threadpool(jobs.get, job_id)
+            if job is None:
+                yield "event: error\ndata: {\"detail\": \"Job expired\"}\n\n"
+                return
+            if job["status"] in FINAL_STATUSES:
+                yield f"event: result\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: status\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(settings.job_events_poll_interval)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 # ============================================================================
-# STEP 5: HELPER FUNCTIONS
+# STEP 6: HELPER FUNCTIONS
 # ============================================================================
 
 def infer_category(query: str) -> str:
@@ -292,33 +845,6 @@ def infer_category(query: str) -> str:
         return "general"
 
 
-# ============================================================================
-# STEP 6: STARTUP AND SHUTDOWN EVENTS
-# ============================================================================
-
-@app.on_event("startup")
-async def startup_event():
-    """Called when API starts - log initialization"""
-    print("\n" + "="*70)
-    print("🚀 TECHGEAR CHATBOT API STARTING UP")
-    print("="*70)
-    print("✅ API initialized and ready!")
-    print("\n📚 Available endpoints:")
-    print("   GET  /              → Welcome & endpoint info")
-    print("   GET  /health        → Health check")
-    print("   POST /chat          → Send query (MAIN ENDPOINT)")
-    print("   GET  /docs          → Swagger UI interactive docs")
-    print("   GET  /redoc         → ReDoc alternative docs")
-    print("\n🌐 Open http://localhost:8000/docs to test the API!")
-    print("="*70 + "\n")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Called when API shuts down"""
-    print("\n🛑 API shutting down...")
-
-
 # ============================================================================
 # STEP 7: RUN THE SERVER
 # ============================================================================
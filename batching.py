@@ -0,0 +1,140 @@
+"""
+Micro-batching: combine small calls from concurrent requests into one upstream call.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Some Gemini calls are tiny (classifying one short query), yet each one pays a
+full network round trip and counts against the rate limit. When many requests
+run at the same time we can wait a few milliseconds, collect everything that
+arrives in that WINDOW and send it as ONE call:
+
+    request A ──┐
+    request B ──┼── (wait ≤ 15 ms or until 16 items) ── one Gemini call ──┬── A's label
+    request C ──┘                                                          ├── B's label
+                                                                           └── C's label
+
+Each caller gets a Future for ITS item and simply blocks on it. Under low load
+a batch holds a single item and the only cost is the short window; under high
+load the number of upstream calls drops by up to `max_batch` times. While
+`max_concurrency` batches are already running, new items keep queueing, so
+the next batch is larger instead of more calls being made.
+
+Every batcher exports, labelled by its name:
+  - microbatch_size:            items per upstream call
+  - microbatch_wait_seconds:    time an item waited for its batch to be sent
+  - microbatch_latency_seconds: time from submit() until the item's result was ready
+
+Usage:
+    batcher = MicroBatcher("classifier", classify_queries, window=0.015, max_batch=16)
+    label = batcher.call("What is the price of SmartWatch Pro X?")
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Generic, Optional, TypeVar
+
+from logging_config import get_logger
+from metrics import Histogram
+
+
+logger = get_logger("batching")
+
+batch_size = Histogram("microbatch_size", "Items per micro-batched upstream call", ["name"],
+                       buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+batch_wait_seconds = Histogram("microbatch_wait_seconds", "Time items waited before their batch was sent", ["name"])
+batch_latency_seconds = Histogram("microbatch_latency_seconds", "Time from submit until the item's result was ready",
+                                  ["name"])
+
+I = TypeVar("I")
+O = TypeVar("O")
+
+
+class MicroBatcher(Generic[I, O]):
+    """
+    Collects items for up to `window` seconds (or `max_batch` items) and
+    processes them with ONE call to `fn`.
+
+    `fn` receives the list of items and must return one result per item, in
+    the same order. A result that is an Exception instance fails only that
+    item; an exception raised by `fn` fails the whole batch.
+
+    Attributes:
+        name (str): Name of the batcher (thread names, logs)
+        window (float): Seconds to wait for more items after the first one
+        max_batch (int): Maximum items per call
+        max_concurrency (int): Batches processed at the same time
+    """
+
+    def __init__(self, name: str, fn: Callable[[list[I]], list[O]], window: float = 0.015,
+                 max_batch: int = 16, max_concurrency: int = 4):
+        self.name = name
+        self.fn = fn
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.max_concurrency = max_concurrency
+        self._queue: queue.Queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"{name}-batch")
+        self._collector: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_concurrency)
+
+    def submit(self, item: I) -> Future:
+        """Queue an item; the returned Future resolves to its result."""
+        future: Future = Future()
+        self._ensure_collector()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def call(self, item: I) -> O:
+        """Queue an item and block until its result is ready (raises its error)."""
+        return self.submit(item).result()
+
+    def _ensure_collector(self) -> None:
+        # Started lazily, so each uvicorn worker process gets its own thread
+        with self._lock:
+            if self._collector is None or not self._collector.is_alive():
+                self._collector = threading.Thread(target=self._collect, name=f"{self.name}-collector", daemon=True)
+                self._collector.start()
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            self._slots.acquire()     # Wait for a free worker; items keep queueing meanwhile
+            window_end = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, window_end - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch: list[tuple]) -> None:
+        try:
+            self._process(batch)
+        finally:
+            self._slots.release()
+
+    def _process(self, batch: list[tuple]) -> None:
+        items = [item for item, _, _ in batch]
+        sent_at = time.perf_counter()
+        batch_size.observe(len(items), name=self.name)
+        for _, _, submitted_at in batch:
+            batch_wait_seconds.observe(sent_at - submitted_at, name=self.name)
+
+        try:
+            results = self.fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name}: expected {len(items)} results, got {len(results)}")
+        except BaseException as e:
+            logger.warning("%s batch of %d failed: %s", self.name, len(items), e)
+            results = [e] * len(items)
+
+        done_at = time.perf_counter()
+        for (_, future, submitted_at), result in zip(batch, results):
+            batch_latency_seconds.observe(done_at - submitted_at, name=self.name)
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,225 @@
+"""
+Small in-process caches used by the chatbot.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Calling the Gemini API costs time and money. If we already computed something
+for the exact same input (for example the embedding of "What is the price of
+SmartWatch Pro X?"), we can keep the result in memory and reuse it.
+
+TTLCache is a "Least Recently Used" cache:
+  - It holds at most `maxsize` entries; the oldest-used entry is dropped first
+  - Entries can optionally expire after `ttl` seconds
+  - It is thread-safe, so several requests can use it at the same time
+
+SQLiteCache has the same interface but keeps its entries in a local SQLite
+file (WAL mode), so every uvicorn worker process on the machine shares one
+cache instead of each warming up its own. make_cache() picks the backend
+from settings.cache_backend ("memory" or "sqlite").
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+from config import settings
+from metrics import Counter
+
+
+cache_requests_total = Counter("cache_requests_total", "Cache lookups by result", ["cache", "result"])
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with optional time-to-live per entry.
+
+    Attributes:
+        name (str): Cache name used in the cache_requests_total metric
+        maxsize (int): Maximum number of entries kept in memory
+        ttl (float | None): Seconds an entry stays valid (None = forever)
+        hits (int): Number of successful lookups
+        misses (int): Number of lookups that found nothing
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, name: str = "default"):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                cache_requests_total.inc(cache=self.name, result="miss")
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+        cache_requests_total.inc(cache=self.name, result="hit")
+        return entry[1]
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict:
+        """Return a {key: value} dict containing only the keys that were cached."""
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry (hit/miss counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+
+class SQLiteCache:
+    """
+    LRU cache with optional time-to-live, shared by all processes on one machine.
+
+    Entries are stored in a SQLite database in WAL mode (readers never block
+    the writer), one table shared by every named cache. Keys and values must
+    be JSON-serializable (strings, numbers, lists such as embedding vectors).
+
+    Attributes:
+        name (str): Cache name (also separates caches inside the database file)
+        maxsize (int): Maximum number of entries kept for this cache
+        ttl (float | None): Seconds an entry stays valid (None = forever)
+        hits (int): Number of successful lookups in this process
+        misses (int): Number of lookups in this process that found nothing
+    """
+
+    # Evicting needs a COUNT(*), so it only runs every few writes
+    EVICT_EVERY = 64
+
+    def __init__(self, path: str, maxsize: int = 1024, ttl: Optional[float] = None, name: str = "default"):
+        self.path = path
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " name TEXT, key TEXT, value TEXT, stored_at REAL, accessed_at REAL,"
+                " PRIMARY KEY (name, key))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (name, accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not thread-safe)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if missing/expired."""
+        encoded = json.dumps(key)
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, stored_at FROM cache WHERE name = ? AND key = ?", (self.name, encoded)
+        ).fetchone()
+        now = time.time()
+        if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+            if row is not None:
+                connection.execute("DELETE FROM cache WHERE name = ? AND key = ?", (self.name, encoded))
+            self.misses += 1
+            cache_requests_total.inc(cache=self.name, result="miss")
+            return default
+        connection.execute(
+            "UPDATE cache SET accessed_at = ? WHERE name = ? AND key = ?", (now, self.name, encoded)
+        )
+        self.hits += 1
+        cache_requests_total.inc(cache=self.name, result="hit")
+        return json.loads(row[0])
+
+    get_many = TTLCache.get_many
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used entries if full."""
+        if self.maxsize <= 0:
+            return
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache (name, key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (self.name, json.dumps(key), json.dumps(value), now, now)
+        )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self._evict()
+
+    def _evict(self) -> None:
+        connection = self._connection()
+        excess = len(self) - self.maxsize
+        if excess > 0:
+            connection.execute(
+                "DELETE FROM cache WHERE rowid IN ("
+                " SELECT rowid FROM cache WHERE name = ? ORDER BY accessed_at LIMIT ?)",
+                (self.name, excess)
+            )
+
+    def clear(self) -> None:
+        """Drop every entry of this cache, for all processes (hit/miss counters are kept)."""
+        self._connection().execute("DELETE FROM cache WHERE name = ?", (self.name,))
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache WHERE name = ?", (self.name,)).fetchone()[0]
+
+
+def make_cache(name: str, maxsize: int = 1024, ttl: Optional[float] = None):
+    """
+    Create a cache using the backend chosen by settings.cache_backend.
+
+    Args:
+        name (str): Cache name (metric label; table partition for "sqlite")
+        maxsize (int): Maximum number of entries
+        ttl (float | None): Seconds an entry stays valid (None = forever)
+
+    Returns:
+        TTLCache | SQLiteCache: "memory" → per-process TTLCache,
+            "sqlite" → SQLiteCache at settings.cache_path, shared by all workers
+    """
+    if settings.cache_backend == "sqlite":
+        return SQLiteCache(settings.cache_path, maxsize=maxsize, ttl=ttl, name=name)
+    return TTLCache(maxsize=maxsize, ttl=ttl, name=name)
+
+
+_MISSING = object()
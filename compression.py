@@ -0,0 +1,169 @@
+"""
+Query-aware context compression.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+A retrieved chunk often describes several products, but the question is about
+one price of one product. Sending the whole chunk to Gemini wastes prompt
+tokens (and time-to-first-token).
+
+compress_documents() keeps only the lines that matter:
+  1. Split each chunk into records ("Product: ..." starts a new record) and lines
+  2. Score every line by word overlap with the query (rare words count more),
+     plus a bonus when its record header matches the query
+     (so "Price: ..." of the asked-about product beats other prices)
+  3. Keep the best lines (and their record headers) in original order
+  4. Keep the WHOLE best record when the query only names it ("Tell me about
+     the SmartWatch Pro X": the header is the best line) or when hardly any
+     field line matches ("Is the smartwatch waterproof?" - the catalog says
+     "water resistant"), so the LLM still gets the price, features, warranty
+
+No API calls are made; scoring is purely lexical and takes microseconds.
+"""
+
+import math
+import re
+from typing import TypedDict
+
+from langchain_core.documents import Document
+
+
+STOPWORDS = {
+    "a", "an", "and", "are", "about", "can", "do", "does", "for", "how", "i", "in", "is",
+    "it", "its", "me", "much", "many", "my", "of", "on", "or", "tell", "the", "this",
+    "to", "what", "when", "which", "with", "you", "your",
+}
+
+HEADER_PREFIXES = ("Product:",)
+
+
+class CompressionStats(TypedDict):
+    """
+    Result accounting of compress_documents().
+
+    Attributes:
+        chars_before (int): Characters in the retrieved chunks
+        chars_after (int): Characters kept after compression
+        ratio (float): chars_after / chars_before (1.0 = nothing removed)
+    """
+    chars_before: int
+    chars_after: int
+    ratio: float
+
+
+def tokenize(text: str) -> set[str]:
+    """Lower-case content words of `text` (stopwords removed, plural 's' stripped)."""
+    words = re.findall(r"[a-z0-9₹]+", text.lower())
+    return {word[:-1] if len(word) > 3 and word.endswith("s") else word
+            for word in words if word not in STOPWORDS}
+
+
+LONG_LINE_CHARS = 200
+
+
+def _split_units(text: str) -> list[tuple[str, str]]:
+    """
+    Split a chunk into (record header, line) units; long lines become sentences.
+
+    A line starting with a HEADER_PREFIXES entry opens a new record, and a blank
+    line closes the current one (the product file separates records that way).
+    """
+    units = []
+    header = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            header = None
+            continue
+        if line.startswith(HEADER_PREFIXES):
+            header = line
+        parts = re.split(r"(?<=\.)\s+", line) if len(line) > LONG_LINE_CHARS else [line]
+        for part in parts:
+            if part.strip():
+                units.append((header, part.strip()))
+    return units
+
+
+def compress_documents(query: str, docs_and_scores: list[tuple[Document, float]],
+                       max_lines: int = 4, min_relative_score: float = 0.5, min_field_lines: int = 2
+                       ) -> tuple[list[tuple[Document, float]], CompressionStats]:
+    """
+    Keep only the lines of each chunk that are relevant to the query.
+
+    Args:
+        query (str): The user's question
+        docs_and_scores (list[tuple[Document, float]]): Retrieved chunks with relevance
+        max_lines (int): Maximum scored lines kept across all chunks (headers are extra)
+        min_relative_score (float): Drop lines scoring below this fraction of the best line
+        min_field_lines (int): With fewer matching field lines (lines other than record
+            headers) the whole best record is kept
+
+    Returns:
+        tuple: (compressed chunks with their original relevance, CompressionStats)
+    """
+    chars_before = sum(len(doc.page_content) for doc, _ in docs_and_scores)
+    query_words = tokenize(query)
+
+    # Split every chunk into (header, line) units
+    parsed = [_split_units(doc.page_content) for doc, _ in docs_and_scores]
+
+    # Inverse document frequency over all candidate lines
+    all_units = [tokenize(unit) for units in parsed for _, unit in units]
+    document_frequency: dict[str, int] = {}
+    for words in all_units:
+        for word in words:
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+    idf = {word: math.log(1 + len(all_units) / df) for word, df in document_frequency.items()}
+
+    def overlap(text: str) -> float:
+        return sum(idf.get(word, 0.0) for word in tokenize(text) & query_words)
+
+    # Score every line: its own overlap + a bonus for its record header
+    scored = []
+    for doc_index, units in enumerate(parsed):
+        for unit_index, (header, unit) in enumerate(units):
+            own = overlap(unit)
+            if own <= 0:
+                continue
+            bonus = overlap(header) if header and header != unit else 0.0
+            scored.append((own + bonus, doc_index, unit_index))
+
+    # Nothing matched lexically: keep the chunks untouched rather than guessing
+    if not scored:
+        return docs_and_scores, {"chars_before": chars_before, "chars_after": chars_before, "ratio": 1.0}
+
+    scored.sort(reverse=True)
+    best, top_doc, top_unit = scored[0]
+    keep = {(d, u) for score, d, u in scored[:max_lines] if score >= best * min_relative_score}
+
+    def record(doc_index: int, unit_index: int) -> tuple:
+        # Lines of one "Product:" record share its header; other lines are records of their own
+        header, _ = parsed[doc_index][unit_index]
+        return (doc_index, header) if header else (doc_index, unit_index)
+
+    def is_header(doc_index: int, unit_index: int) -> bool:
+        header, unit = parsed[doc_index][unit_index]
+        return header == unit
+
+    # Only the record's name matched (or almost no field line did): keep the whole best record
+    field_lines = sum(1 for _, d, u in scored if not is_header(d, u))
+    if is_header(top_doc, top_unit) or field_lines < min_field_lines:
+        top_record = record(top_doc, top_unit)
+        keep |= {(d, u) for d, units in enumerate(parsed) for u in range(len(units)) if record(d, u) == top_record}
+
+    compressed = []
+    for doc_index, ((doc, relevance), units) in enumerate(zip(docs_and_scores, parsed)):
+        kept_lines = []
+        for unit_index, (header, unit) in enumerate(units):
+            if (doc_index, unit_index) not in keep:
+                continue
+            if header and header != unit and header not in kept_lines:
+                kept_lines.append(header)
+            if unit not in kept_lines:
+                kept_lines.append(unit)
+        if kept_lines:
+            compressed.append((Document(page_content="\n".join(kept_lines), metadata=doc.metadata), relevance))
+
+    chars_after = sum(len(doc.page_content) for doc, _ in compressed)
+    ratio = chars_after / chars_before if chars_before else 1.0
+    return compressed, {"chars_before": chars_before, "chars_after": chars_after, "ratio": ratio}
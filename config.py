@@ -0,0 +1,174 @@
+"""
+Central configuration for the TechGear Chatbot.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Instead of hard-coding values like the model name or the vector store path in
+every file, all tunable settings live here. They are read (in this order) from:
+  1. Environment variables (e.g. export RETRIEVER_K=5)
+  2. The .env file in the project folder (see .env.example)
+  3. The defaults defined below
+
+Usage:
+    from config import settings
+    print(settings.llm_model)
+"""
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """
+    All configurable values for the chatbot.
+
+    Every field maps to an upper-case environment variable with the same name,
+    e.g. `retriever_k` is read from RETRIEVER_K.
+    """
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # API Configuration
+    api_host: str = "0.0.0.0"
+    api_port: int = 8000
+
+    # Admission control for /chat (limits apply per worker process)
+    admission_max_concurrent: int = 8
+    admission_max_queue: int = 32
+    admission_queue_timeout: float = 5.0
+    rate_limit_per_second: float = 1.0
+    rate_limit_burst: int = 10
+
+    # Deadlines (see deadline.py): total budget per request, capped per outbound call
+    request_timeout: float = 20.0       # default budget; clients may ask for less or more
+    request_timeout_max: float = 60.0   # upper bound for the X-Request-Timeout header
+    classifier_timeout: float = 5.0
+    embedding_timeout: float = 5.0
+    answer_timeout: float = 15.0
+    answer_min_budget: float = 1.0      # less time left → extractive answer, no LLM call
+
+    # Asynchronous jobs (POST /jobs)
+    job_workers: int = 4
+    job_max_pending: int = 100
+    job_ttl: float = 600                # seconds a finished job can still be fetched
+    job_store_size: int = 10000
+    job_events_poll_interval: float = 0.25
+
+    # Startup warm-up (see warmup.py; an empty value skips the step)
+    warmup_query: str = ""
+    warmup_top_queries_file: str = "./data/top_queries.txt"
+
+    # Logging ("INFO" or per module, e.g. "INFO,graph=DEBUG"; format "json" or "text")
+    log_level: str = "INFO"
+    log_format: str = "json"
+
+    # Tracing (per-request spans written to a rotating JSONL file)
+    trace_enabled: bool = True
+    trace_sample_rate: float = 0.1
+    trace_slow_ms: float = 2000
+    trace_file: str = "./traces/traces.jsonl"
+    trace_max_bytes: int = 10_000_000
+    trace_backup_count: int = 5
+
+    # Database
+    database_path: str = "./chroma_db"
+    collection_name: str = "product_embeddings"
+
+    # Data
+    data_path: str = "./data/product_info.txt"
+
+    # LLM Configuration
+    llm_model: str = "gemini-2.0-flash"
+    llm_temperature: float = 0
+    llm_max_tokens: int = 256
+    llm_timeout: float = 30.0           # HTTP timeout of each Gemini request
+
+    # Model tiers (see model_router.py): cheap model first, stronger one when needed
+    model_routing_enabled: bool = True      # False = every call uses llm_model
+    llm_model_lite: str = "gemini-2.0-flash-lite"
+    llm_model_strong: str = "gemini-2.5-pro"
+    classifier_tier: str = "lite"
+    router_confident_score: float = 0.75    # best chunk score counted as "confident retrieval"
+    router_short_query_words: int = 12      # short + confident → lite tier
+    router_long_query_words: int = 30       # longer (or comparisons) → strong tier
+
+    # Resilience of Gemini calls (see resilience.py)
+    breaker_failure_threshold: int = 5      # consecutive failures that open a circuit breaker
+    breaker_recovery_time: float = 30.0     # seconds open before a half-open probe
+    breaker_slow_call_seconds: float = 10.0 # successful calls slower than this count as failures
+    hedge_enabled: bool = True
+    hedge_quantile: float = 0.95            # hedge after this latency quantile ...
+    hedge_min_samples: int = 20             # ... once enough calls were measured
+    hedge_min_delay: float = 0.05
+    upstream_max_retries: int = 1
+    upstream_retry_backoff: float = 0.2
+    retry_budget_ratio: float = 0.1         # retries allowed per call made
+    retry_budget_min_per_second: float = 1.0
+
+    # Micro-batched classification: queries arriving within the window share one LLM call
+    classifier_batch_window_ms: float = 15.0
+    classifier_batch_max: int = 16          # 1 = classify every query on its own
+    classifier_batch_concurrency: int = 4   # batches sent to Gemini at the same time
+
+    # Embedding Configuration
+    embedding_model: str = "models/embedding-001"
+    embedding_cache_size: int = 10000
+    embedding_batch_window_ms: float = 10.0   # concurrent query embeddings share one API call
+    embedding_batch_max: int = 64
+    embedding_batch_concurrency: int = 4
+
+    # Caches shared by all uvicorn workers ("memory" = per process, "sqlite" = shared file)
+    cache_backend: str = "memory"
+    cache_path: str = "./cache/cache.db"
+    answer_cache_size: int = 1000
+    answer_cache_ttl: float = 3600
+    index_check_interval: float = 5.0   # seconds between checks for a re-ingested index
+
+    # Precomputed FAQ answers (see faq.py): generated by ingest.py, served without LLM calls
+    faq_enabled: bool = True
+    faq_templates_path: str = "./data/faq_templates.json"
+    faq_max_query_words: int = 14           # longer queries are never answered from the FAQ
+
+    # Query normalization (see normalize.py): canonical form used by every cache and index key
+    normalization_enabled: bool = True
+    normalization_fuzzy_cutoff: float = 0.8   # difflib similarity needed to correct a catalog word
+    normalization_min_word_length: int = 5     # shorter words are never corrected
+
+    # Multi-intent queries (see decomposition.py): split and answer the parts concurrently
+    decomposition_enabled: bool = True
+    decomposition_max_parts: int = 4        # more parts than this → answered as one query
+
+    # Conversation memory per session_id (see memory.py)
+    session_db_path: str = "./cache/sessions.db"
+    session_token_budget: int = 600         # summary + recent turns; above this older turns are summarized
+    session_keep_turns: int = 2             # turns kept verbatim after a compaction
+    session_summary_max_tokens: int = 150
+    session_ttl: float = 1800               # idle seconds before a session is deleted
+    session_max_count: int = 10000          # above this, least recently used sessions are deleted
+
+    # Retriever Configuration
+    retriever_k: int = 3                # chunks used when reranker = "none"
+    retriever_candidates: int = 20      # chunks fetched before reranking
+    reranker: str = "lexical"           # "none", "lexical" or "mmr"
+    rerank_top_n: int = 2               # chunks sent to the LLM after reranking
+    chunk_size: int = 500
+    chunk_overlap: int = 100
+
+    # Relevance gate: below this best-chunk score the LLM is not called
+    relevance_threshold: float = 0.3
+    relevance_gate_action: str = "canned"   # "canned" reply or "escalate"
+
+    # Query-aware compression of retrieved chunks
+    compression_enabled: bool = True
+    compression_max_lines: int = 4
+    compression_min_field_lines: int = 2   # fewer matching field lines → keep the whole best record
+
+    # Context packing (prompt size budget)
+    context_max_tokens: int = 1000
+    context_min_overlap: int = 20
+
+    # Batch answering (answer_queries, POST /chat/batch)
+    batch_max_concurrency: int = 8
+    batch_max_items: int = 100
+
+
+settings = Settings()
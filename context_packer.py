@@ -0,0 +1,164 @@
+"""
+Token-budgeted context assembly for the RAG prompt.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+ingest.py splits the product file into chunks that OVERLAP by ~100 characters,
+so two neighbouring chunks repeat the same text. Pasting the retrieved chunks
+into the prompt verbatim therefore:
+  - Sends the same sentences to Gemini more than once
+  - Grows the prompt without limit when chunks get bigger
+
+pack_context() builds a smaller, equivalent context:
+  1. MERGE chunks whose end overlaps the start of another chunk
+  2. DEDUPLICATE lines that were already included
+  3. PACK the blocks by relevance until the token budget is used up
+
+Token counts are estimated (≈ 4 characters per token) so packing never needs
+an extra API call.
+"""
+
+from typing import TypedDict
+
+from langchain_core.documents import Document
+
+from metrics import Counter
+
+
+CHARS_PER_TOKEN = 4
+
+context_tokens_total = Counter(
+    "rag_context_tokens_total",
+    "Estimated prompt context tokens before (naive) and after (packed) packing",
+    ["stage"]
+)
+
+
+class PackedContext(TypedDict):
+    """
+    Result of pack_context().
+
+    Attributes:
+        text (str): Context string to put in the prompt
+        tokens (int): Estimated tokens of the packed context
+        naive_tokens (int): Estimated tokens if chunks were joined verbatim
+        tokens_saved (int): naive_tokens - tokens
+        chunks_used (int): Number of retrieved chunks that contributed text
+        compression_ratio (float): Characters kept by query-aware compression
+            before packing (1.0 = no compression applied)
+    """
+    text: str
+    tokens: int
+    naive_tokens: int
+    tokens_saved: int
+    chunks_used: int
+    compression_ratio: float
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in `text` (≈ 4 characters per token)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _overlap_length(left: str, right: str, min_overlap: int) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`."""
+    for size in range(min(len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_overlapping(chunks: list[tuple[str, float]], min_overlap: int = 20) -> list[tuple[str, float, int]]:
+    """
+    Merge chunks that overlap or contain one another.
+
+    Args:
+        chunks (list[tuple[str, float]]): (text, relevance) pairs
+        min_overlap (int): Minimum shared characters to treat two chunks as adjacent
+
+    Returns:
+        list[tuple[str, float, int]]: (merged text, best relevance, number of chunks merged)
+    """
+    blocks = [[text, score, 1] for text, score in chunks]
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(blocks)):
+            for j in range(len(blocks)):
+                if i == j:
+                    continue
+                left, right = blocks[i][0], blocks[j][0]
+                if right in left:
+                    combined = left
+                else:
+                    size = _overlap_length(left, right, min_overlap)
+                    if not size:
+                        continue
+                    combined = left + right[size:]
+                blocks[i] = [combined, max(blocks[i][1], blocks[j][1]), blocks[i][2] + blocks[j][2]]
+                del blocks[j]
+                merged = True
+                break
+            if merged:
+                break
+
+    return [tuple(block) for block in blocks]
+
+
+def pack_context(docs_and_scores: list[tuple[Document, float]], max_tokens: int = 1000,
+                 min_overlap: int = 20) -> PackedContext:
+    """
+    Build the prompt context from retrieved chunks within a token budget.
+
+    Args:
+        docs_and_scores (list[tuple[Document, float]]): Retrieved chunks with relevance
+        max_tokens (int): Token budget for the whole context
+        min_overlap (int): Minimum shared characters for merging neighbouring chunks
+
+    Returns:
+        PackedContext: The packed context and token accounting
+    """
+    texts = [(doc.page_content.strip(), score) for doc, score in docs_and_scores]
+    naive_tokens = estimate_tokens("\n\n".join(text for text, _ in texts))
+
+    blocks = merge_overlapping(texts, min_overlap=min_overlap)
+    blocks.sort(key=lambda block: block[1], reverse=True)
+
+    seen_lines = set()
+    sections = []
+    used_tokens = 0
+    chunks_used = 0
+
+    for text, _, chunk_count in blocks:
+        lines = []
+        for line in text.splitlines():
+            key = " ".join(line.split()).lower()
+            if not key or key in seen_lines:
+                continue
+            line_tokens = estimate_tokens(line) + 1
+            if used_tokens + line_tokens > max_tokens:
+                break
+            seen_lines.add(key)
+            lines.append(line.strip())
+            used_tokens += line_tokens
+        if lines:
+            sections.append("\n".join(lines))
+            chunks_used += chunk_count
+        if used_tokens >= max_tokens:
+            break
+
+    packed = "\n\n".join(sections)
+    tokens = estimate_tokens(packed)
+    saved = max(naive_tokens - tokens, 0)
+    context_tokens_total.inc(naive_tokens, stage="naive")
+    context_tokens_total.inc(tokens, stage="packed")
+
+    return {
+        "text": packed,
+        "tokens": tokens,
+        "naive_tokens": naive_tokens,
+        "tokens_saved": saved,
+        "chunks_used": chunks_used,
+        "compression_ratio": 1.0,
+    }
@@ -0,0 +1,112 @@
+"""
+Request deadlines: a time budget that flows through the whole workflow.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Without a budget, one hung Gemini call keeps a request (and a worker thread)
+busy until some library timeout fires - maybe minutes later. Instead, every
+request gets a DEADLINE when it arrives:
+
+    deadline = now + 20 seconds        (settings.request_timeout, or the
+                                        client's X-Request-Timeout header)
+
+The deadline travels in the graph state. Before each outbound call we ask
+"how much time is left?" and give the call at most that long:
+
+    classifier LLM   → min(time left, settings.classifier_timeout)
+    query embedding  → min(time left, settings.embedding_timeout)
+    answer LLM       → min(time left, settings.answer_timeout)
+
+When a call runs out of time, DeadlineExceeded is raised and the graph takes
+a defined DEGRADED path (a fast escalation, or an extractive answer built
+from the retrieved chunks) instead of waiting. So the slowest request is
+bounded by the budget, not by Gemini.
+
+Deadlines are time.monotonic() timestamps, so clock changes never affect them.
+"""
+
+import contextvars
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Optional, TypeVar
+
+from config import settings
+from metrics import Counter
+
+
+T = TypeVar("T")
+
+deadline_exceeded_total = Counter(
+    "deadline_exceeded_total",
+    "Outbound calls abandoned because the request deadline or call timeout ran out",
+    ["call"]
+)
+
+# Threads that run deadline-bound calls. A call that times out keeps its thread
+# until the client library gives up (settings.llm_timeout), so the pool is sized
+# generously; the request itself returns immediately.
+_call_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="deadline")
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a call does not finish within the request's remaining budget.
+
+    Attributes:
+        call (str): Name of the abandoned call (e.g. "classify", "answer")
+        timeout (float): Seconds the call was allowed to take
+    """
+
+    def __init__(self, call: str, timeout: float):
+        self.call = call
+        self.timeout = timeout
+        super().__init__(f"Deadline exceeded: {call} did not finish within {timeout:.2f}s")
+
+
+def deadline_after(seconds: Optional[float] = None) -> float:
+    """Deadline `seconds` from now (default: settings.request_timeout)."""
+    return time.monotonic() + (settings.request_timeout if seconds is None else seconds)
+
+
+def remaining(deadline: Optional[float]) -> float:
+    """Seconds left until `deadline` (infinite if there is no deadline, never negative)."""
+    if not deadline:
+        return math.inf
+    return max(0.0, deadline - time.monotonic())
+
+
+def call_with_deadline(call: str, deadline: Optional[float], fn: Callable[..., T], *args,
+                       timeout: Optional[float] = None, **kwargs) -> T:
+    """
+    Run fn(*args, **kwargs), giving up after min(time left, timeout) seconds.
+
+    The call runs in a helper thread with a copy of the current context, so
+    LangChain callbacks (token streaming) and tracing still see the request.
+
+    Args:
+        call (str): Name of the call, used in errors and the metric label
+        deadline (float | None): Request deadline (time.monotonic() timestamp)
+        fn (callable): The blocking call to run
+        timeout (float | None): Per-call cap in seconds (None = only the deadline)
+
+    Returns:
+        The result of fn
+
+    Raises:
+        DeadlineExceeded: If the budget is already spent or the call takes too long
+    """
+    budget = min(remaining(deadline), math.inf if timeout is None else timeout)
+    if budget <= 0:
+        deadline_exceeded_total.inc(call=call)
+        raise DeadlineExceeded(call, 0.0)
+    if math.isinf(budget):
+        return fn(*args, **kwargs)
+
+    context = contextvars.copy_context()
+    future = _call_pool.submit(context.run, fn, *args, **kwargs)
+    if not wait([future], timeout=budget).done:
+        future.cancel()
+        deadline_exceeded_total.inc(call=call)
+        raise DeadlineExceeded(call, budget)
+    return future.result()
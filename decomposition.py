@@ -0,0 +1,146 @@
+"""
+Multi-intent query decomposition.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+"What is the price of SmartWatch Pro X and the return policy?" asks TWO
+things. Classified as one query it gets one category and one retrieval of a
+few chunks, which often covers only half of the question.
+
+split_query() splits such a query into sub-questions, without any API call:
+  1. Cut it at "?", ";" and joining words ("and", "also", "as well as", "plus")
+  2. A piece counts as a question of its own only if it names an ASPECT
+     (price, warranty, battery, returns, support, ...) and has at least two
+     content words; other pieces are glued back to their neighbour, so
+     "price and warranty of SmartWatch Pro X" stays ONE question
+  3. Every sub-question must name its own SUBJECT: a product (a product
+     word or a catalog name) or a shop policy (returns, support, ...).
+     "What is the battery life and price of the SmartWatch Pro X?" is NOT
+     split - "What is the battery life" alone does not say of what
+  4. Comparisons ("SmartWatch vs Fitness Band") and pieces that point back
+     with a pronoun ("... and its warranty") are never split - they only
+     make sense as a whole
+
+The graph then answers the sub-questions CONCURRENTLY on the normal RAG path
+and merge_answers() joins the sub-answers into one reply (no LLM call), so
+the whole query takes about as long as its slowest part.
+"""
+
+import re
+from typing import Iterable
+
+from compression import tokenize
+from config import settings
+from extractive import FIELD_SYNONYMS
+from model_router import is_comparison
+
+
+# Words naming what a sub-question asks about (field names and their synonyms)
+ASPECT_WORDS = set(FIELD_SYNONYMS) | set(FIELD_SYNONYMS.values()) | {
+    "policy", "delivery", "shipping", "gps", "charging", "resistant", "color", "colour", "size",
+}
+
+# Words naming a product (catalog names are passed in by the caller)
+PRODUCT_WORDS = {
+    "smartwatch", "watch", "earbud", "earbuds", "headphone", "power", "bank", "band", "tracker",
+    "charger", "speaker", "cable", "phone", "product", "item",
+}
+
+# Words naming a shop policy: such a question needs no product
+POLICY_WORDS = {"return", "refund", "exchange", "policy", "support", "contact", "shipping", "delivery", "hour"}
+
+# Where a compound query may be cut (the separator is kept for gluing pieces back)
+_SEPARATORS = re.compile(r"(\?\s*|;\s*|\s+(?:and also|as well as|and|also|plus)\s+)", re.IGNORECASE)
+
+# Asking for a price without naming it ("how much" is made of stopwords)
+_HOW_MUCH = re.compile(r"\bhow much\b", re.IGNORECASE)
+
+# A piece that refers back to an earlier one cannot be answered on its own
+_BACK_REFERENCE = re.compile(r"\b(it|its|it's|they|them|their|this|that|these|those|one|same)\b", re.IGNORECASE)
+
+
+def _stands_alone(piece: str) -> bool:
+    """True if a piece names an aspect and has enough content to be its own question."""
+    words = tokenize(piece)
+    return len(words) >= 2 and (bool(words & ASPECT_WORDS) or bool(_HOW_MUCH.search(piece)))
+
+
+def _has_subject(part: str, names: frozenset) -> bool:
+    """True if a sub-question names a product or a shop policy."""
+    words = tokenize(part) | set(re.findall(r"[a-z0-9]+", part.lower()))
+    return bool(words & (PRODUCT_WORDS | POLICY_WORDS | names))
+
+
+def split_query(query: str, names: Iterable[str] = ()) -> list[str]:
+    """
+    Split a compound query into standalone sub-questions.
+
+    Args:
+        query (str): The user's question
+        names (Iterable[str]): Catalog words that name products (see
+            normalize.get_vocabulary); product words are always known
+
+    Returns:
+        list[str]: Two or more sub-questions, or [query] if it asks one thing
+            (or cannot be split safely)
+    """
+    if not settings.decomposition_enabled or is_comparison(query):
+        return [query]
+
+    # Alternating [piece, separator, piece, separator, ...]
+    tokens = _SEPARATORS.split(query.strip())
+    pieces = [(tokens[i].strip(" ,."), tokens[i + 1] if i + 1 < len(tokens) else "") for i in range(0, len(tokens), 2)]
+    pieces = [(piece, separator) for piece, separator in pieces if piece]
+    if len(pieces) < 2:
+        return [query]
+
+    # Glue pieces that cannot stand alone to the next one (the last one to the previous one,
+    # keeping the joining word: "... support hours plus GPS")
+    glued: list[list[str]] = []
+    pending = ""
+    for piece, separator in pieces:
+        text = f"{pending}{piece}"
+        if _stands_alone(text):
+            glued.append([text, separator])
+            pending = ""
+        else:
+            pending = f"{text}{separator}"
+    if pending:
+        if not glued:
+            return [query]
+        glued[-1][0] = f"{glued[-1][0]}{glued[-1][1]}{pending}".strip()
+        glued[-1][1] = ""
+    parts = [text + ("?" if separator.strip() == "?" else "") for text, separator in glued]
+
+    if len(parts) < 2 or len(parts) > settings.decomposition_max_parts:
+        return [query]
+    if any(_BACK_REFERENCE.search(part) for part in parts[1:]):
+        return [query]
+    # A part without its own subject shares one with another part: answered as a whole
+    if not all(_has_subject(part, frozenset(names)) for part in parts):
+        return [query]
+    return parts
+
+
+def merge_answers(answers: list[tuple[str, str]]) -> str:
+    """
+    Join the sub-answers into one reply (identical answers are given once).
+
+    Args:
+        answers (list[tuple[str, str]]): (sub-question, answer) pairs in query order
+
+    Returns:
+        str: One paragraph per sub-question, labelled with the sub-question
+    """
+    distinct = {answer for _, answer in answers}
+    if len(distinct) == 1:
+        return answers[0][1]
+
+    paragraphs, seen = [], set()
+    for question, answer in answers:
+        if answer in seen:
+            continue
+        seen.add(answer)
+        label = question.rstrip("?").strip()
+        paragraphs.append(f"{label[:1].upper()}{label[1:]}: {answer}")
+    return "\n\n".join(paragraphs)
@@ -0,0 +1,170 @@
+"""
+Extractive answers: answer from the retrieved chunks WITHOUT calling Gemini.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Normally Gemini writes the answer. But when Gemini is down (its circuit
+breaker is open, see resilience.py) or the request deadline is nearly spent
+(see deadline.py), waiting for it only produces an error. Most questions
+about the catalog are answered by ONE field of ONE record anyway:
+
+    Q: "How much does the SmartWatch Pro X cost?"
+    Chunk: Product: SmartWatch Pro X
+           Price: ₹15,999 | Features: Heart rate, GPS, ... | Warranty: ...
+
+extractive_answer() finds that field locally, in microseconds:
+  1. Split every chunk into records and lines (same rules as compression.py),
+     and every line into its " | "-separated FIELDS ("Price: ₹15,999")
+  2. Score each field by word overlap with the query (rare words count more),
+     plus a bonus when the field's name is what the query asks about
+     ("cost" → Price) and when its record header names the asked-about product
+  3. Quote the best field(s) with their record header
+
+The reply always starts with EXTRACTIVE_REPLY_PREFIX, so users (and the UI)
+can tell it apart from a normal answer.
+"""
+
+import math
+from typing import Optional, TypedDict
+
+from langchain_core.documents import Document
+
+from compression import _split_units, tokenize
+from metrics import Counter
+from rag_chain import NO_INFORMATION_REPLY
+
+
+# Opening of every extractive answer (flags it as a degraded-mode reply)
+EXTRACTIVE_REPLY_PREFIX = "I couldn't prepare a full answer right now. This is the most relevant information I found:"
+
+# Query words that ask for a field without naming it (matched against tokenize() output)
+FIELD_SYNONYMS = {
+    "cost": "price", "expensive": "price", "cheap": "price", "rupee": "price",
+    "guarantee": "warranty", "repair": "warranty",
+    "battery": "feature", "spec": "feature", "specification": "feature",
+    "refund": "return", "exchange": "return", "money": "return",
+    "contact": "support", "hour": "support", "email": "support", "open": "support",
+}
+
+# Extra score for a field whose name is what the query asks about
+FIELD_NAME_BONUS = 1.0
+
+extractive_answers_total = Counter(
+    "extractive_answers_total",
+    "Answers built without the LLM (field = best field quoted, context = top section, none = nothing usable)",
+    ["outcome"]
+)
+
+
+class ExtractedField(TypedDict):
+    """
+    One field picked by extract_fields().
+
+    Attributes:
+        header (str | None): Record header, e.g. "Product: SmartWatch Pro X"
+        text (str): The field itself, e.g. "Price: ₹15,999"
+        score (float): Lexical match score with the query
+    """
+    header: Optional[str]
+    text: str
+    score: float
+
+
+def _split_fields(line: str) -> list[str]:
+    """Split a line like "Price: ₹15,999 | Features: ..." into its fields."""
+    return [field.strip() for field in line.split(" | ") if field.strip()]
+
+
+def _field_name(field: str) -> set[str]:
+    """Words of a field's name ("Return Policy: ..." → {"return", "policy"}), empty if it has none."""
+    name, separator, _ = field.partition(":")
+    return tokenize(name) if separator else set()
+
+
+def extract_fields(query: str, docs_and_scores: list[tuple[Document, float]],
+                   max_fields: int = 2, min_relative_score: float = 0.6) -> list[ExtractedField]:
+    """
+    Pick the fields of the retrieved chunks that best answer the query.
+
+    Args:
+        query (str): The user's question
+        docs_and_scores (list[tuple[Document, float]]): Retrieved chunks with relevance
+        max_fields (int): Maximum number of fields returned (all from the best field's record)
+        min_relative_score (float): Drop fields scoring below this fraction of the best one
+
+    Returns:
+        list[ExtractedField]: Best fields first (empty if nothing matches the query)
+    """
+    query_words = tokenize(query)
+    asked_fields = query_words | {FIELD_SYNONYMS[word] for word in query_words if word in FIELD_SYNONYMS}
+
+    # (header, field) candidates in retrieval order (the most relevant chunk first)
+    candidates = []
+    for doc, _ in sorted(docs_and_scores, key=lambda pair: pair[1], reverse=True):
+        for header, line in _split_units(doc.page_content):
+            for field in _split_fields(line):
+                if field != header:
+                    candidates.append((header, field))
+
+    # Inverse document frequency over all candidate fields
+    document_frequency: dict[str, int] = {}
+    for _, field in candidates:
+        for word in tokenize(field):
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+    idf = {word: math.log(1 + len(candidates) / df) for word, df in document_frequency.items()}
+
+    def overlap(text: str) -> float:
+        return sum(idf.get(word, 1.0) for word in tokenize(text) & query_words)
+
+    scored = []
+    for rank, (header, field) in enumerate(candidates):
+        own = overlap(field) + (FIELD_NAME_BONUS if _field_name(field) & asked_fields else 0.0)
+        if own <= 0:
+            continue
+        bonus = overlap(header) if header else 0.0
+        # Ties go to the field from the more relevant chunk
+        scored.append((own + bonus, -rank, header, field))
+
+    if not scored:
+        return []
+
+    # Further fields only from the best field's record (e.g. price AND warranty of one product)
+    scored.sort(reverse=True)
+    best, _, best_header, _ = scored[0]
+    return [{"header": header, "text": field, "score": score}
+            for score, _, header, field in scored
+            if header == best_header and score >= best * min_relative_score][:max_fields]
+
+
+def extractive_answer(query: str, docs_and_scores: list[tuple[Document, float]], context: str = "") -> str:
+    """
+    Answer WITHOUT the LLM by quoting the best-matching fields of the chunks.
+
+    Args:
+        query (str): The user's question
+        docs_and_scores (list[tuple[Document, float]]): Retrieved chunks with relevance
+        context (str): Packed context (build_context(...)["text"]); its top
+            section is quoted when no field matches the query lexically
+
+    Returns:
+        str: EXTRACTIVE_REPLY_PREFIX followed by the quoted information,
+            or NO_INFORMATION_REPLY if there is nothing to quote
+    """
+    fields = extract_fields(query, docs_and_scores)
+    if fields:
+        extractive_answers_total.inc(outcome="field")
+        lines = []
+        for field in fields:
+            if field["header"] and field["header"] not in lines:
+                lines.append(field["header"])
+            lines.append(field["text"])
+        return f"{EXTRACTIVE_REPLY_PREFIX}\n\n" + "\n".join(lines)
+
+    # No lexical match: the packed context is ordered by relevance, quote its first section
+    top_section = context.strip().split("\n\n")[0]
+    if top_section:
+        extractive_answers_total.inc(outcome="context")
+        return f"{EXTRACTIVE_REPLY_PREFIX}\n\n{top_section}"
+
+    extractive_answers_total.inc(outcome="none")
+    return NO_INFORMATION_REPLY
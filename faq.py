@@ -0,0 +1,327 @@
+"""
+Precomputed FAQ answers: generated at ingest time, served without any LLM call.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Most traffic is the same few questions about each product: its price,
+battery, features, warranty - plus the return policy and support hours.
+Generating those answers with Gemini on every request wastes time and money,
+so ingest.py generates them ONCE:
+
+  1. The product file is parsed into RECORDS ("Product: SmartWatch Pro X" and
+     its fields, "Return Policy: ...", "Support: ...")
+  2. Every record is expanded with the TEMPLATES in settings.faq_templates_path
+     (e.g. "What is the price of {entity}?" → "The {entity} costs {value}.").
+     Answers are filled in from the record's own fields, so they are exactly
+     what the catalog says (vetted) - no LLM, nothing made up
+  3. The table is stored next to the index (<database_path>/faq.json). Each
+     record's entries carry a hash of the record and the templates, so a new
+     ingest only regenerates the records that changed
+
+At query time match_faq() looks for exactly ONE entity (product name; policy
+questions must name none) and exactly ONE intent (its template keywords).
+Only an unambiguous match is served; everything else takes the normal RAG path.
+
+Metric: faq_lookups_total{result="hit"|"miss"|"ambiguous"}.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Optional, TypedDict
+
+from compression import HEADER_PREFIXES, _split_units, tokenize
+from config import settings
+from logging_config import get_logger
+from metrics import Counter
+
+
+logger = get_logger("faq")
+
+FAQ_FILE = "faq.json"
+
+faq_lookups_total = Counter("faq_lookups_total", "FAQ fast-path lookups by result", ["result"])
+
+
+class CatalogRecord(TypedDict):
+    """
+    One record of the product file.
+
+    Attributes:
+        name (str): Product name ("SmartWatch Pro X") or policy name ("Return Policy")
+        kind (str): "product" or "policy"
+        fields (dict[str, str]): Field name → value, e.g. {"Price": "₹15,999"}
+        text (str): The record's lines (hashed to detect changes)
+    """
+    name: str
+    kind: str
+    fields: dict[str, str]
+    text: str
+
+
+class FAQEntry(TypedDict):
+    """
+    One precomputed question and answer.
+
+    Attributes:
+        entity (str): Record the answer comes from
+        kind (str): "product" or "policy"
+        intent (str): Template intent, e.g. "price"
+        category (str): Category reported for the answer ("product", "returns", ...)
+        question (str): Canonical question
+        answer (str): Vetted answer built from the record's fields
+    """
+    entity: str
+    kind: str
+    intent: str
+    category: str
+    question: str
+    answer: str
+
+
+class FAQStats(TypedDict):
+    """
+    Result accounting of build_faq_table().
+
+    Attributes:
+        records (int): Records in the catalog
+        regenerated (int): Records whose entries were (re)generated
+        reused (int): Unchanged records whose entries were kept
+        entries (int): FAQ entries in the new table
+    """
+    records: int
+    regenerated: int
+    reused: int
+    entries: int
+
+
+# ============================================================================
+# INGEST TIME: parse the catalog and generate the table
+# ============================================================================
+
+def parse_records(text: str) -> list[CatalogRecord]:
+    """
+    Split the product file into product and policy records.
+
+    A "Product: ..." line opens a product record that ends at a blank line;
+    any other line without a product header is a policy record of its own.
+    Fields are the " | "-separated "Name: value" parts of each line (a part
+    without a name is appended to the previous field).
+    """
+    records: list[CatalogRecord] = []
+    current = None
+    for header, line in _split_units(text):
+        if header is not None and line == header:
+            current = {"name": header.split(":", 1)[1].strip(), "kind": "product", "fields": {}, "text": header}
+            records.append(current)
+            continue
+        if header is None:
+            current = None
+        record = current or {"name": line.split(":", 1)[0].strip(), "kind": "policy", "fields": {}, "text": ""}
+        if current is None:
+            records.append(record)
+        record["text"] = f"{record['text']}\n{line}".strip()
+
+        last_field = None
+        for part in (part.strip() for part in line.split(" | ")):
+            name, separator, value = part.partition(":")
+            if separator and name.strip() and not name.strip().startswith(HEADER_PREFIXES):
+                last_field = name.strip()
+                record["fields"][last_field] = value.strip()
+            elif last_field:
+                record["fields"][last_field] += f"; {part}"
+    return records
+
+
+def load_templates(path: Optional[str] = None) -> dict:
+    """Load the FAQ templates ({"product": [...], "policy": [...]}) from JSON."""
+    with open(path or settings.faq_templates_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _hash(*parts: str) -> str:
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _field_value(record: CatalogRecord, template: dict) -> Optional[str]:
+    """The record value a template answers with (None if the record has none)."""
+    value = record["fields"].get(template.get("field") or record["name"])
+    if value and template.get("select"):
+        # Only the comma-separated item mentioning e.g. "battery"
+        value = next((item.strip() for item in value.split(",") if template["select"] in item.lower()), None)
+    return value or None
+
+
+def generate_entries(record: CatalogRecord, templates: dict) -> list[FAQEntry]:
+    """Expand one record with the templates of its kind."""
+    entries = []
+    for template in templates.get(record["kind"], []):
+        if record["kind"] == "policy" and template.get("record") != record["name"]:
+            continue
+        value = _field_value(record, template)
+        if value is None:
+            continue
+        entries.append({
+            "entity": record["name"],
+            "kind": record["kind"],
+            "intent": template["intent"],
+            "category": template.get("category", "product"),
+            "question": template["question"].format(entity=record["name"]),
+            "answer": template["answer"].format(entity=record["name"], value=value.rstrip(".")),
+        })
+    return entries
+
+
+def build_faq_table(text: str, templates: dict, previous: Optional[dict] = None) -> tuple[dict, FAQStats]:
+    """
+    Build the FAQ table for a catalog, reusing the entries of unchanged records.
+
+    Args:
+        text (str): Content of the product file
+        templates (dict): Output of load_templates()
+        previous (dict): The table stored by the last ingest (None = build everything)
+
+    Returns:
+        tuple: (table {"records": {hash: [FAQEntry, ...]}}, FAQStats)
+    """
+    templates_key = json.dumps(templates, sort_keys=True)
+    previous_records = (previous or {}).get("records", {})
+    records = parse_records(text)
+
+    table = {"records": {}}
+    regenerated = 0
+    for record in records:
+        key = _hash(record["text"], templates_key)
+        if key in previous_records:
+            table["records"][key] = previous_records[key]
+        else:
+            table["records"][key] = generate_entries(record, templates)
+            regenerated += 1
+
+    stats: FAQStats = {
+        "records": len(records),
+        "regenerated": regenerated,
+        "reused": len(records) - regenerated,
+        "entries": sum(len(entries) for entries in table["records"].values()),
+    }
+    return table, stats
+
+
+def faq_path() -> str:
+    return os.path.join(settings.database_path, FAQ_FILE)
+
+
+def read_faq_table() -> Optional[dict]:
+    """The stored FAQ table (None if ingest has not written one yet)."""
+    try:
+        with open(faq_path(), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def refresh_faq_table(text: str) -> FAQStats:
+    """Rebuild the stored FAQ table after an ingest (atomic file replace); called by ingest.py."""
+    table, stats = build_faq_table(text, load_templates(), read_faq_table())
+    os.makedirs(settings.database_path, exist_ok=True)
+    temporary = f"{faq_path()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(table, file, ensure_ascii=False, indent=1)
+    os.replace(temporary, faq_path())
+    logger.info("FAQ table written: %d entries, %d records regenerated, %d reused",
+                stats["entries"], stats["regenerated"], stats["reused"])
+    return stats
+
+
+# ============================================================================
+# QUERY TIME: match a query to one entry
+# ============================================================================
+
+class FAQIndex:
+    """
+    Lookup structure over a FAQ table.
+
+    Attributes:
+        entries (list[FAQEntry]): All entries
+        entity_words (dict[str, set[str]]): Content words of every product name
+        keywords (dict[str, list[str]]): Template keywords of every intent
+    """
+
+    def __init__(self, table: dict, templates: dict):
+        self.entries = [entry for entries in table.get("records", {}).values() for entry in entries]
+        self.by_key = {(entry["entity"], entry["intent"]): entry for entry in self.entries}
+        self.entity_words = {entry["entity"]: tokenize(entry["entity"])
+                             for entry in self.entries if entry["kind"] == "product"}
+        self.keywords = {template["intent"]: template["keywords"]
+                         for kind in ("product", "policy") for template in templates.get(kind, [])}
+        self.policy_intents = {entry["intent"]: entry for entry in self.entries if entry["kind"] == "policy"}
+
+    def intents(self, query: str) -> set[str]:
+        """Intents whose keywords occur in the query (as word prefixes: "refund" matches "refunds")."""
+        text = query.lower()
+        return {intent for intent, keywords in self.keywords.items()
+                if any(re.search(rf"\b{re.escape(keyword)}", text) for keyword in keywords)}
+
+    def entities(self, query: str) -> list[str]:
+        """Products named in the query (at least half of the name's words present)."""
+        words = tokenize(query)
+        return [entity for entity, entity_words in self.entity_words.items()
+                if entity_words and len(words & entity_words) * 2 >= len(entity_words)]
+
+    def match(self, query: str) -> tuple[Optional[FAQEntry], str]:
+        """Return (entry, "hit") or (None, "miss" | "ambiguous")."""
+        if len(query.split()) > settings.faq_max_query_words:
+            return None, "miss"
+        intents = self.intents(query)
+        entities = self.entities(query)
+        # "battery" questions also mention features; the narrower intent wins
+        if "battery" in intents:
+            intents.discard("features")
+        if len(intents) != 1 or len(entities) > 1:
+            return None, "ambiguous" if intents else "miss"
+
+        intent = intents.pop()
+        if intent in self.policy_intents:
+            # "Does the SmartWatch Pro X support GPS?" is not a policy question
+            return (None, "ambiguous") if entities else (self.policy_intents[intent], "hit")
+        if not entities:
+            return None, "miss"
+        entry = self.by_key.get((entities[0], intent))
+        return (entry, "hit") if entry else (None, "miss")
+
+
+_index_state = {"version": None, "index": None}
+_index_lock = threading.Lock()
+
+
+def get_faq_index(version: str) -> Optional[FAQIndex]:
+    """The FAQ index of an index version (reloaded when ingest publishes a new one)."""
+    with _index_lock:
+        if _index_state["version"] != version:
+            table = read_faq_table()
+            _index_state["index"] = FAQIndex(table, load_templates()) if table else None
+            _index_state["version"] = version
+        return _index_state["index"]
+
+
+def match_faq(query: str, version: str) -> Optional[FAQEntry]:
+    """
+    Find the precomputed answer for a query, if it matches one unambiguously.
+
+    Args:
+        query (str): The user's question
+        version (str): Index version being served (rag_chain.current_index_version())
+
+    Returns:
+        FAQEntry | None: The matching entry, or None (take the normal path)
+    """
+    if not settings.faq_enabled:
+        return None
+    index = get_faq_index(version)
+    if index is None:
+        return None
+    entry, result = index.match(query)
+    faq_lookups_total.inc(result=result)
+    return entry
@@ -10,7 +10,32 @@ Instead of a simple function call, you define:
   3. EDGES: How nodes connect and when to move to the next node
 
 Think of it like a flowchart:
-  Query → Classifier Node → (decision) → RAG Node or Escalation Node → Output
+  Query → Classifier Node → (decision) → Retriever Node → (relevance gate)
+        → RAG Node, Canned "no information" reply, or Escalation Node → Output
+
+Every run carries a DEADLINE (see deadline.py). Each LLM / embedding call only
+gets the time that is left; when it runs out the query takes a degraded path
+(fast escalation, or an extractive answer from the retrieved chunks - see
+extractive.py). The same extractive answer is served while the answer
+model's circuit breaker is open.
+
+Queries sent with a SESSION ID run on a second build of the graph that keeps
+conversation memory (see memory.py): a contextualize node first rewrites
+follow-ups into standalone questions, and a remember node finally stores the
+turn, compacting the conversation to a fixed token budget.
+
+Common questions ("What is the price of SmartWatch Pro X?") are answered by
+the faq node from answers precomputed at ingest time (see faq.py), without
+any LLM call.
+
+Every query is first brought into a CANONICAL form by the normalize node
+(see normalize.py): lower-cased, synonyms unified, product-name typos
+corrected. The answer cache, FAQ matcher and retrieval all key on that form,
+so "price of the smart watch pro x" hits what "Price of SmartWatch Pro X?" cached.
+
+A compound query ("price of SmartWatch Pro X and the return policy") is split
+by the decompose node (see decomposition.py); its sub-questions then run the
+RAG path concurrently and their answers are merged into one reply.
 
 This script creates a customer support chatbot that:
   - Classifies user queries into categories
@@ -18,12 +43,58 @@ This script creates a customer support chatbot that:
   - Escalates complex queries when needed
 """
 
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import PromptTemplate
-from typing import TypedDict, Literal
+from typing import Iterator, Optional, TypedDict, Literal
+from langchain_core.documents import Document
 from langgraph.graph import StateGraph, START, END
-from rag_chain import answer_query
+from config import settings
+from metrics import Counter, Histogram, errors_total, format_summary
+from tracing import current_request_id, new_request_id, set_attribute, span, start_trace
+from logging_config import get_logger, setup_logging
+from batching import MicroBatcher
+from cache import make_cache
+from singleflight import SingleFlight
+from deadline import DeadlineExceeded, call_with_deadline, deadline_after, remaining
+from resilience import CircuitOpen, get_breaker, resilient_call
+from extractive import extractive_answer
+from decomposition import merge_answers, split_query
+from faq import match_faq
+from normalize import count_normalization, get_vocabulary, normalize, record_hit
+from memory import Turn, add_turn, condense_query, get_checkpointer, prune_checkpoints, session_config, touch_session
+from model_router import (
+    TIERS, choose_answer_tier, model_for_tier, next_tier, self_check, tier_escalations_total, tier_selected_total
+)
+from rag_chain import (
+    NO_INFORMATION_REPLY, build_context, current_index_version, generate_answer,
+    llm_call_seconds, passes_relevance_gate, retrieve, retrieve_many
+)
+
+
+logger = get_logger("graph")
+
+# Graph-level metrics (see GET /metrics in api.py)
+node_seconds = Histogram("graph_node_seconds", "Time spent in each graph node", ["node"])
+queries_by_category = Counter("graph_queries_total", "Classified queries by category", ["category"])
+decomposed_total = Counter("graph_decomposed_queries_total", "Queries split into sub-questions, by number of parts",
+                           ["parts"])
+degraded_total = Counter("graph_degraded_total", "Queries answered on a degraded path (deadline ran out, breaker open, LLM error)", ["reason"])
+
+# Final answers keyed by (index version, query); shared by all workers with cache_backend = "sqlite"
+_answer_cache = make_cache("answer", maxsize=settings.answer_cache_size, ttl=settings.answer_cache_ttl)
+
+# Identical queries running at the same time share one graph run (same key as the answer cache)
+_answer_flight = SingleFlight("answer")
+
+# Threads answering the sub-questions of compound queries
+_sub_question_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="sub_question")
 
 
 # ============================================================================
@@ -37,23 +108,175 @@ class GraphState(TypedDict):
     This defines what information is available in the workflow.
     
     Attributes:
+        request_id (str): ID of the request, used to correlate traces and logs
         query (str): The user's original question
         category (str): Classification result ("product", "returns", "general")
         context (str): Retrieved context from RAG
+        documents (list[Document]): Chunks retrieved for the query
+        scores (list[float]): Relevance score of each retrieved chunk
         response (str): Final answer to return to user
         escalation_reason (str): Why the query was escalated (if applicable)
+        error (str): Error message if answer generation failed (empty on success)
+        prefetched (bool): True if documents/scores were retrieved before the
+            graph ran (batch mode), so the retriever node skips the search
+        deadline (float): time.monotonic() timestamp by which the run must finish
+        degraded (str): Why a degraded path was taken (empty if it was not),
+            e.g. "answer_timeout"
+        model_tier (str): Model tier that produced the answer ("lite",
+            "standard" or "strong"; empty if no answer was generated)
+        session_id (str): Conversation the query belongs to (empty = no memory)
+        user_query (str): The query as the user sent it (`query` may be its
+            standalone rewrite in a session)
+        history (list[Turn]): Recent turns of the session (kept by the checkpointer)
+        summary (str): Running summary of older turns (kept by the checkpointer)
+        sub_questions (list[str]): Parts of a compound query (empty if it asks one thing)
+        canonical_query (str): Normalized form of the query (normalize.py), used
+            for FAQ matching and retrieval (empty until the normalize node ran)
     """
+    request_id: str
     query: str
     category: str
     context: str
+    documents: list[Document]
+    scores: list[float]
     response: str
     escalation_reason: str
+    error: str
+    prefetched: bool
+    deadline: float
+    degraded: str
+    model_tier: str
+    session_id: str
+    user_query: str
+    history: list[Turn]
+    summary: str
+    sub_questions: list[str]
+    canonical_query: str
 
 
 # ============================================================================
 # STEP 2: DEFINE THE NODES (Processing Steps)
 # ============================================================================
 
+@lru_cache(maxsize=1)
+def get_classifier_llm() -> ChatGoogleGenerativeAI:
+    """Return the Gemini LLM used by the classifier (settings.classifier_tier, temperature 0)."""
+    # Retries are made by resilience.resilient_call, within the global retry budget
+    return ChatGoogleGenerativeAI(model=model_for_tier(settings.classifier_tier), temperature=0,
+                                  timeout=settings.llm_timeout, max_retries=0)
+
+
+VALID_CATEGORIES = ["product", "returns", "general"]
+
+# Prompt for a single query
+classification_prompt = PromptTemplate(
+    template="""Categorize this query into EXACTLY ONE of these categories:
+        
+Categories:
+- "product": Questions about product prices, features, specifications
+- "returns": Questions about return policy, refunds, warranty
+- "general": Other questions or general inquiries
+
+Query: {query}
+
+Respond with ONLY the category name in quotes (e.g., "product" or "returns").
+Do not include any other text.""",
+    input_variables=["query"]
+)
+
+# Prompt for several queries at once (micro-batched classification)
+batch_classification_prompt = PromptTemplate(
+    template="""Categorize EACH of the {count} numbered queries below into EXACTLY ONE of these categories:
+
+Categories:
+- "product": Questions about product prices, features, specifications
+- "returns": Questions about return policy, refunds, warranty
+- "general": Other questions or general inquiries
+
+Queries:
+{queries}
+
+Respond with exactly {count} lines, one per query, in the form <number>: <category>
+(e.g., 1: product). Do not include any other text.""",
+    input_variables=["count", "queries"]
+)
+
+
+def parse_category(text: str) -> str:
+    """Turn the LLM's answer into a valid category ("general" if unclear)."""
+    category = text.strip().lower().replace('"', '').strip()
+    return category if category in VALID_CATEGORIES else "general"
+
+
+def classify_queries(queries: list[str]) -> list[str]:
+    """
+    Classify one or more queries with ONE LLM call.
+    
+    A single query uses the classic prompt; several queries are numbered in
+    one structured prompt and the answer lines ("2: returns") are mapped back
+    to their query. A query whose line is missing gets "general". The call is
+    idempotent, so it is hedged when slow (see resilience.py).
+    
+    Args:
+        queries (list[str]): The questions to classify
+        
+    Returns:
+        list[str]: One category per query, in input order
+    """
+    llm = get_classifier_llm()
+    dependency = f"gemini:{model_for_tier(settings.classifier_tier)}"
+    
+    if len(queries) == 1:
+        with llm_call_seconds.time(purpose="classify"):
+            response = resilient_call(dependency, llm.invoke, classification_prompt.format(query=queries[0]),
+                                      hedge=True)
+        logger.debug("Classifier LLM response: %r", response.content)
+        return [parse_category(response.content)]
+    
+    numbered = "\n".join(f"{i}. {' '.join(query.split())}" for i, query in enumerate(queries, 1))
+    with llm_call_seconds.time(purpose="classify_batch"):
+        response = resilient_call(dependency, llm.invoke,
+                                  batch_classification_prompt.format(count=len(queries), queries=numbered),
+                                  hedge=True)
+    logger.debug("Classifier LLM response for %d queries: %r", len(queries), response.content)
+    
+    labels = {}
+    for line in response.content.splitlines():
+        match = re.match(r"\s*(\d+)\s*[.:)-]\s*(.+)", line)
+        if match:
+            labels[int(match.group(1))] = parse_category(match.group(2))
+    if len(labels) < len(queries):
+        logger.warning("Classifier returned %d of %d labels; the rest default to 'general'",
+                       len(labels), len(queries))
+    return [labels.get(i, "general") for i in range(1, len(queries) + 1)]
+
+
+@lru_cache(maxsize=1)
+def get_classifier_batcher() -> MicroBatcher:
+    """
+    Return the micro-batcher that groups classifications from concurrent requests.
+    
+    Queries arriving within settings.classifier_batch_window_ms (or until
+    settings.classifier_batch_max are waiting) share one classify_queries() call.
+    """
+    return MicroBatcher(
+        "classifier",
+        classify_queries,
+        window=settings.classifier_batch_window_ms / 1000,
+        max_batch=settings.classifier_batch_max,
+        max_concurrency=settings.classifier_batch_concurrency
+    )
+
+
+def fallback_reason(stage: str, error: Exception) -> str:
+    """Label for a degraded path, e.g. "answer_timeout" or "classify_circuit_open"."""
+    if isinstance(error, DeadlineExceeded):
+        return f"{stage}_timeout"
+    if isinstance(error, CircuitOpen):
+        return f"{stage}_circuit_open"
+    return f"{stage}_error"
+
+
 def classifier_node(state: GraphState) -> GraphState:
     """
     NODE 1: CLASSIFIER NODE
@@ -65,11 +288,16 @@ def classifier_node(state: GraphState) -> GraphState:
     
     How it works:
       1. Takes the user query from state
-      2. Sends it to Gemini LLM with a classification prompt
-      3. Extracts the category from LLM response
+      2. Hands it to the classifier micro-batcher, which sends it to Gemini
+         together with queries of other concurrent requests
+      3. Receives the category of THIS query
       4. Updates the state with the category
       5. Returns the updated state
     
+    If the LLM does not answer within the remaining budget (at most
+    settings.classifier_timeout), its circuit breaker is open or the call
+    fails, the query is escalated right away instead of failing the request.
+    
     Args:
         state (GraphState): Current workflow state containing the query
         
@@ -77,70 +305,125 @@ def classifier_node(state: GraphState) -> GraphState:
         GraphState: Updated state with category field populated
     """
     
-    print("\n" + "=" * 70)
-    print("🔍 NODE 1: CLASSIFIER NODE")
-    print("=" * 70)
-    
     query = state["query"]
-    print(f"📥 Input Query: {query}")
+    logger.debug("Classifier node: input query %r", query)
     
-    # Initialize the LLM (Gemini)
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0)
+    # Classify (batched with concurrent requests, bounded by the request deadline)
+    try:
+        category = call_with_deadline("classify", state["deadline"], get_classifier_batcher().call, query,
+                                      timeout=settings.classifier_timeout)
+    except Exception as e:
+        if isinstance(e, (DeadlineExceeded, CircuitOpen)):
+            logger.warning("Classification abandoned: %s", e)
+        else:
+            logger.exception("Classification failed")
+            errors_total.inc(component="classifier")
+        reason = fallback_reason("classify", e)
+        degraded_total.inc(reason=reason)
+        state["category"] = "general"
+        state["degraded"] = reason
+        state["escalation_reason"] = f"Classification failed: {str(e)}"
+        return state
+    
+    queries_by_category.inc(category=category)
+    tier_selected_total.inc(node="classifier", tier=settings.classifier_tier)
+    set_attribute("category", category)
+    
+    logger.debug("Query classified as %r", category, extra={"category": category})
     
-    # Create a prompt to classify the query
-    classification_prompt = PromptTemplate(
-        template="""Categorize this query into EXACTLY ONE of these categories:
-        
-Categories:
-- "product": Questions about product prices, features, specifications
-- "returns": Questions about return policy, refunds, warranty
-- "general": Other questions or general inquiries
+    # Update state with the category
+    state["category"] = category
+    
+    return state
 
-Query: {query}
 
-Respond with ONLY the category name in quotes (e.g., "product" or "returns").
-Do not include any other text.""",
-        input_variables=["query"]
-    )
-    
-    # Format the prompt
-    formatted_prompt = classification_prompt.format(query=query)
+def retriever_node(state: GraphState) -> GraphState:
+    """
+    NODE 2: RETRIEVER NODE
     
-    # Call the LLM to classify
-    response = llm.invoke(formatted_prompt)
-    category_text = response.content.strip().lower()
+    Purpose: Fetch the most relevant chunks from Chromadb BEFORE any answer
+    is generated, so the router can check how relevant they are
     
-    # Clean up the response (remove quotes if present)
-    category = category_text.replace('"', '').strip()
+    How it works:
+      1. Takes the query from state (its canonical form, so the embedding
+         cache is shared by all variants of a query)
+      2. Calls retrieve() from rag_chain.py (embedding + vector search),
+         unless the chunks were already retrieved for a whole batch
+      3. Stores the chunks, their relevance scores and the packed context
+      4. Returns updated state
     
-    # Validate the category
-    valid_categories = ["product", "returns", "general"]
-    if category not in valid_categories:
-        category = "general"  # Default to general if unclear
+    Args:
+        state (GraphState): Current workflow state containing the query
+        
+    Returns:
+        GraphState: Updated state with documents, scores and context populated
+    """
     
-    print(f"✅ Classification Result: '{category}'")
-    print(f"   LLM Response: {category_text}")
+    query = state["query"]
     
-    # Update state with the category
-    state["category"] = category
+    try:
+        if state["prefetched"]:
+            docs_and_scores = list(zip(state["documents"], state["scores"]))
+        else:
+            docs_and_scores = retrieve(state.get("canonical_query") or query, state["deadline"])
+    except (DeadlineExceeded, CircuitOpen) as e:
+        logger.warning("Retrieval abandoned: %s", e)
+        degraded_total.inc(reason=fallback_reason("retrieve", e))
+        state["degraded"] = fallback_reason("retrieve", e)
+        state["escalation_reason"] = f"Retrieval failed: {str(e)}"
+        docs_and_scores = []
+    except Exception as e:
+        logger.exception("Retrieval failed")
+        errors_total.inc(component="retriever")
+        state["escalation_reason"] = f"Retrieval failed: {str(e)}"
+        docs_and_scores = []
+    
+    state["documents"] = [doc for doc, _ in docs_and_scores]
+    state["scores"] = [score for _, score in docs_and_scores]
+    context = build_context(query, docs_and_scores)
+    state["context"] = context["text"]
+    set_attribute("chunks", len(docs_and_scores))
+    set_attribute("best_score", round(max(state["scores"], default=0.0), 4))
+    set_attribute("context_tokens", context["tokens"])
+    
+    logger.debug(
+        "Retrieved %d chunks, scores %s; context %d tokens (compression kept %.0f%%, packing saved %d)",
+        len(docs_and_scores), [round(score, 3) for score in state["scores"]], context["tokens"],
+        context["compression_ratio"] * 100, context["tokens_saved"]
+    )
     
     return state
 
 
+def extract_from_state(state: GraphState) -> str:
+    """Extractive answer (no LLM) from the query and chunks in state."""
+    return extractive_answer(state["query"], list(zip(state["documents"], state["scores"])), state["context"])
+
+
+def answer_breaker_open(state: GraphState) -> bool:
+    """True if the circuit breaker of the model that would answer this query is open."""
+    tier, _ = choose_answer_tier(state["query"], state["scores"])
+    return get_breaker(f"gemini:{model_for_tier(tier)}").is_open()
+
+
 def rag_responder_node(state: GraphState) -> GraphState:
     """
-    NODE 2: RAG RESPONDER NODE
+    NODE 3: RAG RESPONDER NODE
     
-    Purpose: Answer the query using the RAG chain and Chromadb
+    Purpose: Answer the query using the chunks found by the retriever node
     
     How it works:
-      1. Takes the query from state
-      2. Calls answer_query() from rag_chain.py
-      3. RAG chain retrieves relevant context from Chromadb
-      4. LLM generates answer based on context
-      5. Stores the answer in state
+      1. Takes the query and retrieved chunks from state
+      2. Picks a model tier from the query and retrieval scores (model_router.py)
+      3. Calls generate_answer() from rag_chain.py with that tier's model
+      4. Self-checks the answer; a failed cheap answer is retried once on the
+         next tier up (if the deadline allows)
+      5. Stores the answer and the tier used in state
       6. Returns updated state
     
+    If the LLM runs out of time, its circuit breaker is open or it fails, the
+    answer is extracted from the retrieved chunks instead (see extractive.py).
+    
     Args:
         state (GraphState): Current workflow state containing the query
         
@@ -148,37 +431,101 @@ def rag_responder_node(state: GraphState) -> GraphState:
         GraphState: Updated state with response field populated
     """
     
-    print("\n" + "=" * 70)
-    print("🤖 NODE 2: RAG RESPONDER NODE")
-    print("=" * 70)
-    
     query = state["query"]
-    category = state["category"]
-    
-    print(f"📥 Input Query: {query}")
-    print(f"📥 Category: {category}")
+    tier, reason = choose_answer_tier(query, state["scores"])
+    logger.debug("RAG responder node: query %r, category %r, tier %s (%s)", query, state["category"], tier, reason)
     
     try:
-        # Call the RAG chain to get the answer
-        print(f"🔄 Calling RAG chain...")
-        answer = answer_query(query)
+        # Call the RAG chain to get the answer from the retrieved chunks
+        answer = generate_answer(query, state["context"], state["deadline"], model_for_tier(tier))
+        logger.debug("RAG response generated: %r", answer)
         
-        print(f"✅ RAG Response Generated")
-        print(f"   Answer: {answer}")
+        # Self-check: retry a failed answer once on a stronger model
+        failure = self_check(answer, state["scores"])
+        stronger = next_tier(tier) if settings.model_routing_enabled else None
+        if failure and stronger and remaining(state["deadline"]) >= settings.answer_min_budget:
+            logger.info("Answer from %s tier failed self-check (%s), retrying on %s", tier, failure, stronger)
+            tier_escalations_total.inc(from_tier=tier, reason=failure)
+            try:
+                answer = generate_answer(query, state["context"], state["deadline"], model_for_tier(stronger))
+                tier = stronger
+            except Exception as e:
+                logger.warning("Retry on %s tier failed, keeping the %s answer: %s", stronger, tier, e)
         
         # Update state with the response
         state["response"] = answer
+        state["model_tier"] = tier
+        tier_selected_total.inc(node="rag_responder", tier=tier)
+        set_attribute("model_tier", tier)
+        
+    except (DeadlineExceeded, CircuitOpen) as e:
+        logger.warning("Answer generation abandoned, answering extractively: %s", e)
+        degraded_total.inc(reason=fallback_reason("answer", e))
+        state["degraded"] = fallback_reason("answer", e)
+        state["response"] = extract_from_state(state)
         
     except Exception as e:
-        print(f"❌ Error in RAG responder: {e}")
-        state["response"] = f"I encountered an error while processing your query: {str(e)}"
+        logger.exception("Answer generation failed, answering extractively")
+        errors_total.inc(component="rag_responder")
+        degraded_total.inc(reason="answer_error")
+        state["error"] = str(e)
+        state["degraded"] = "answer_error"
+        state["response"] = extract_from_state(state)
+    
+    return state
+
+
+def no_information_node(state: GraphState) -> GraphState:
+    """
+    NODE 4: NO INFORMATION NODE
+    
+    Purpose: Reply "I don't have this information." WITHOUT calling the LLM
+    
+    This node is triggered by the relevance gate when even the best retrieved
+    chunk is not similar enough to the query (e.g. out-of-catalog questions).
+    
+    Args:
+        state (GraphState): Current workflow state
+        
+    Returns:
+        GraphState: Updated state with the canned response
+    """
+    
+    state["response"] = NO_INFORMATION_REPLY
+    logger.debug("Canned 'no information' reply returned (no LLM call)")
+    
+    return state
+
+
+def extractive_node(state: GraphState) -> GraphState:
+    """
+    NODE 5: EXTRACTIVE NODE
+    
+    Purpose: Answer from the retrieved chunks WITHOUT calling the LLM, because
+    too little of the request's time budget is left for generation
+    (less than settings.answer_min_budget seconds) or the answer model's
+    circuit breaker is open
+    
+    Args:
+        state (GraphState): Current workflow state with the retrieved chunks
+        
+    Returns:
+        GraphState: Updated state with the extractive response
+    """
+    
+    time_left = remaining(state["deadline"])
+    reason = "budget_spent" if time_left < settings.answer_min_budget else "answer_circuit_open"
+    logger.info("Answering extractively (%s, %.2fs left)", reason, time_left)
+    degraded_total.inc(reason=reason)
+    state["degraded"] = reason
+    state["response"] = extract_from_state(state)
     
     return state
 
 
 def escalation_node(state: GraphState) -> GraphState:
     """
-    NODE 3: ESCALATION NODE
+    NODE 6: ESCALATION NODE
     
     Purpose: Handle queries that need human intervention
     
@@ -201,16 +548,8 @@ def escalation_node(state: GraphState) -> GraphState:
         GraphState: Updated state with escalation response
     """
     
-    print("\n" + "=" * 70)
-    print("👤 NODE 3: ESCALATION NODE")
-    print("=" * 70)
-    
-    query = state["query"]
     category = state["category"]
     
-    print(f"📥 Query: {query}")
-    print(f"📥 Category: {category}")
-    
     # Create escalation message
     escalation_message = (
         "Your query has been escalated to human support. "
@@ -218,10 +557,14 @@ def escalation_node(state: GraphState) -> GraphState:
         "Ticket ID: SUPPORT-2026-001"
     )
     
-    # Log escalation reason
-    escalation_reason = f"Complex query in category: {category}"
-    print(f"✅ Query Escalated")
-    print(f"   Reason: {escalation_reason}")
+    # Log escalation reason (keep one set by an earlier node, e.g. the retriever)
+    if state.get("escalation_reason"):
+        escalation_reason = state["escalation_reason"]
+    elif category in ["product", "returns"]:
+        escalation_reason = f"No relevant context found for category: {category}"
+    else:
+        escalation_reason = f"Complex query in category: {category}"
+    logger.info("Query escalated: %s", escalation_reason, extra={"category": category})
     
     # Update state
     state["response"] = escalation_message
@@ -230,6 +573,235 @@ def escalation_node(state: GraphState) -> GraphState:
     return state
 
 
+def contextualize_node(state: GraphState) -> GraphState:
+    """
+    NODE 7: CONTEXTUALIZE NODE (session graph only)
+    
+    Purpose: Turn a follow-up ("and what's its warranty?") into a standalone
+    question using the session's summary and recent turns (memory.py), so
+    every later node works as for a new query
+    
+    The answer cache is checked with the standalone question; a hit skips
+    straight to the remember node.
+    
+    Args:
+        state (GraphState): Current workflow state, restored from the session checkpoint
+        
+    Returns:
+        GraphState: Updated state with the standalone query (and a cached response, if any)
+    """
+    
+    query = condense_query(state["user_query"], state.get("summary", ""), state.get("history", []), state["deadline"])
+    if query != state["user_query"]:
+        logger.debug("Follow-up %r condensed to %r", state["user_query"], query)
+    set_attribute("condensed", query != state["user_query"])
+    state["query"] = query
+    
+    cache_key = answer_cache_key(query)
+    cached = _answer_cache.get(cache_key)
+    set_attribute("answer_cache", "hit" if cached is not None else "miss")
+    if cached is not None:
+        record_hit("answer_cache", query, cache_key[1])
+        state["response"] = cached
+    
+    return state
+
+
+def remember_node(state: GraphState) -> GraphState:
+    """
+    NODE 8: REMEMBER NODE (session graph only)
+    
+    Purpose: Add the finished turn to the session's memory, compacting older
+    turns into the summary when settings.session_token_budget is exceeded
+    
+    The retrieved chunks are dropped here, so the checkpoint that is kept for
+    the session holds only the (bounded) conversation.
+    
+    Args:
+        state (GraphState): Current workflow state with the final response
+        
+    Returns:
+        GraphState: Updated state with the new summary and history
+    """
+    
+    state["summary"], state["history"] = add_turn(state.get("summary", ""), state.get("history", []),
+                                                  state["user_query"], state["response"], state["deadline"])
+    state["documents"], state["scores"], state["context"] = [], [], ""
+    
+    return state
+
+
+def decompose_node(state: GraphState) -> GraphState:
+    """
+    NODE 9: DECOMPOSE NODE
+    
+    Purpose: Split a compound query into sub-questions (decomposition.py,
+    no API call), e.g. "price of SmartWatch Pro X and the return policy"
+    → ["price of SmartWatch Pro X", "the return policy"]
+    
+    Args:
+        state (GraphState): Current workflow state containing the query
+        
+    Returns:
+        GraphState: Updated state with sub_questions (empty for a single question)
+    """
+    
+    parts = split_query(state["query"], get_vocabulary(current_index_version()))
+    if len(parts) > 1:
+        logger.debug("Query %r split into %d sub-questions: %r", state["query"], len(parts), parts)
+        decomposed_total.inc(parts=str(len(parts)))
+        set_attribute("sub_questions", len(parts))
+        state["sub_questions"] = parts
+    
+    return state
+
+
+def faq_node(state: GraphState) -> GraphState:
+    """
+    NODE 11: FAQ NODE
+    
+    Purpose: Serve a precomputed answer (faq.py) when the query matches
+    exactly one catalog entity and one intent, e.g. "How much is the
+    SmartWatch Pro X?" → "The SmartWatch Pro X costs ₹15,999."
+    No LLM call at all: classification, retrieval and generation are skipped.
+    
+    Args:
+        state (GraphState): Current workflow state containing the query
+        
+    Returns:
+        GraphState: Updated state with response and category on a match
+            (unchanged otherwise)
+    """
+    
+    query = state.get("canonical_query") or state["query"]
+    entry = match_faq(query, current_index_version())
+    set_attribute("faq", entry["intent"] if entry else "miss")
+    if entry is not None:
+        record_hit("faq", state["query"], query)
+        logger.debug("FAQ answer for %r: %s / %s", state["query"], entry["entity"], entry["intent"])
+        queries_by_category.inc(category=entry["category"])
+        state["category"] = entry["category"]
+        state["response"] = entry["answer"]
+    
+    return state
+
+
+def normalize_node(state: GraphState) -> GraphState:
+    """
+    NODE 12: NORMALIZE NODE
+    
+    Purpose: Compute the canonical form of the query (normalize.py, no API
+    call), e.g. "price of the smart watch pro x??" → "price of the
+    smartwatch pro x"; "smartwach" is corrected against the catalog vocabulary
+    
+    The FAQ matcher and the retriever use this form; the classifier and the
+    answer model still see the query as written. Every normalization is
+    counted in query_normalizations_total.
+    
+    Args:
+        state (GraphState): Current workflow state containing the query
+        
+    Returns:
+        GraphState: Updated state with canonical_query
+    """
+    
+    normalized = normalize(state["query"], current_index_version())
+    change = count_normalization(state["query"], normalized)
+    if change != "none":
+        logger.debug("Query %r normalized to %r (corrections: %s)", state["query"], normalized["canonical"],
+                     normalized["corrections"])
+    set_attribute("normalized", change)
+    state["canonical_query"] = normalized["canonical"]
+    
+    return state
+
+
+def answer_sub_question(question: str, deadline: float) -> GraphState:
+    """
+    Answer one sub-question on the RAG path: the graph's own nodes and routers,
+    called directly (cached and FAQ sub-answers are reused, and new ones cached).
+    
+    Args:
+        question (str): The sub-question
+        deadline (float): time.monotonic() deadline of the whole request
+        
+    Returns:
+        GraphState: Final state of the sub-question
+    """
+    cache_key = answer_cache_key(question)
+    state = initial_state(question, deadline=deadline)
+    cached = _answer_cache.get(cache_key)
+    if cached is not None:
+        record_hit("answer_cache", question, cache_key[1])
+        state["response"] = cached
+        return state
+    
+    state = faq_node(normalize_node(state))
+    if state["response"]:
+        remember_answer(cache_key, state)
+        return state
+    
+    with span("sub_question", query=question):
+        state = timed_node("classifier", classifier_node)(state)
+        if should_escalate(state) == "escalation":
+            return timed_node("escalation", escalation_node)(state)
+        state = timed_node("retriever", retriever_node)(state)
+        route = check_relevance(state)
+        node = {
+            "rag_responder": rag_responder_node,
+            "extractive": extractive_node,
+            "no_information": no_information_node,
+            "escalation": escalation_node
+        }[route]
+        state = timed_node(route, node)(state)
+    
+    remember_answer(cache_key, state)
+    return state
+
+
+def sub_questions_node(state: GraphState) -> GraphState:
+    """
+    NODE 10: SUB-QUESTIONS NODE
+    
+    Purpose: Answer the sub-questions of a compound query CONCURRENTLY and
+    merge their answers into one reply
+    
+    How it works:
+      1. Runs answer_sub_question() for every sub-question in its own thread
+         (classification calls are micro-batched together, see batching.py)
+      2. Joins the answers in query order (decomposition.merge_answers, no LLM)
+      3. Combines the sub-results: categories, escalation reasons, errors,
+         degraded paths and the strongest model tier used
+    
+    All sub-questions share the request deadline, so the query takes about as
+    long as its slowest sub-question.
+    
+    Args:
+        state (GraphState): Current workflow state with sub_questions
+        
+    Returns:
+        GraphState: Updated state with the merged response
+    """
+    
+    futures = [_sub_question_pool.submit(contextvars.copy_context().run, answer_sub_question, question,
+                                         state["deadline"])
+               for question in state["sub_questions"]]
+    results = [future.result() for future in futures]
+    
+    state["response"] = merge_answers([(result["query"], result["response"]) for result in results])
+    state["category"] = "+".join(dict.fromkeys(result["category"] for result in results if result["category"]))
+    state["escalation_reason"] = "; ".join(result["escalation_reason"] for result in results
+                                           if result["escalation_reason"])
+    state["error"] = next((result["error"] for result in results if result["error"]), "")
+    state["degraded"] = next((result["degraded"] for result in results if result["degraded"]), "")
+    tiers = [result["model_tier"] for result in results if result["model_tier"]]
+    state["model_tier"] = max(tiers, key=TIERS.index, default="")
+    state["documents"] = [doc for result in results for doc in result["documents"]]
+    state["scores"] = [score for result in results for score in result["scores"]]
+    
+    return state
+
+
 # ============================================================================
 # STEP 3: DEFINE CONDITIONAL EDGES (Router Logic)
 # ============================================================================
@@ -243,36 +815,135 @@ def should_escalate(state: GraphState) -> str:
       - Should we escalate to human support?
     
     Logic:
-      - If category is "product" or "returns": Go to RAG responder
+      - If category is "product" or "returns": Go to retriever
       - Otherwise: Go to escalation node
     
     Args:
         state (GraphState): Current workflow state
         
     Returns:
-        str: Node name to route to ("rag_responder" or "escalation")
+        str: Node name to route to ("retriever" or "escalation")
     """
     
     category = state["category"]
     
-    print(f"\n🚦 ROUTER: Checking category '{category}'")
-    
     # If category is product or returns, use RAG
     if category in ["product", "returns"]:
-        print(f"   → Routing to RAG RESPONDER")
-        return "rag_responder"
+        logger.debug("Router: category %r → retriever", category)
+        return "retriever"
     
     # Otherwise, escalate
     else:
-        print(f"   → Routing to ESCALATION")
+        logger.debug("Router: category %r → escalation", category)
         return "escalation"
 
 
+def check_relevance(state: GraphState) -> str:
+    """
+    CONDITIONAL ROUTER: Relevance gate after retrieval
+    
+    Logic:
+      - If retrieval failed: Go to escalation node
+      - If the best chunk score >= settings.relevance_threshold: Go to RAG responder,
+        or to the extractive node if less than settings.answer_min_budget
+        seconds of the deadline are left or the answer model's breaker is open
+      - Otherwise, depending on settings.relevance_gate_action:
+          "canned"   → no_information node (fixed reply, no LLM call)
+          "escalate" → escalation node
+    
+    Args:
+        state (GraphState): Current workflow state with retrieval scores
+        
+    Returns:
+        str: Node name to route to ("rag_responder", "extractive", "no_information" or "escalation")
+    """
+    
+    if state["escalation_reason"]:
+        logger.debug("Relevance gate: retrieval failed → escalation")
+        return "escalation"
+    
+    docs_and_scores = list(zip(state["documents"], state["scores"]))
+    
+    best_score = max(state["scores"], default=0.0)
+    
+    if passes_relevance_gate(docs_and_scores):
+        if remaining(state["deadline"]) < settings.answer_min_budget:
+            logger.debug("Relevance gate: best score %.3f, but no time left → extractive", best_score)
+            return "extractive"
+        if answer_breaker_open(state):
+            logger.debug("Relevance gate: best score %.3f, but the answer model is unavailable → extractive",
+                         best_score)
+            return "extractive"
+        logger.debug("Relevance gate: best score %.3f → rag_responder", best_score)
+        return "rag_responder"
+    
+    if settings.relevance_gate_action == "escalate":
+        logger.debug("Relevance gate: best score %.3f below %s → escalation (skipping LLM)",
+                     best_score, settings.relevance_threshold)
+        return "escalation"
+    
+    logger.debug("Relevance gate: best score %.3f below %s → no_information (skipping LLM)",
+                 best_score, settings.relevance_threshold)
+    return "no_information"
+
+
+def check_answered(state: GraphState) -> str:
+    """
+    CONDITIONAL ROUTER: After the contextualize node (session graph only)
+    
+    Returns:
+        str: "remember" if the answer cache already answered the query, else "normalize"
+    """
+    return "remember" if state["response"] else "normalize"
+
+
+def check_decomposed(state: GraphState) -> str:
+    """
+    CONDITIONAL ROUTER: After the decompose node
+    
+    Returns:
+        str: "sub_questions" for a compound query, else "faq"
+    """
+    return "sub_questions" if state["sub_questions"] else "faq"
+
+
+def check_faq(state: GraphState) -> str:
+    """
+    CONDITIONAL ROUTER: After the FAQ node
+    
+    Returns:
+        str: "answered" if a precomputed answer was found, else "classifier"
+    """
+    return "answered" if state["response"] else "classifier"
+
+
 # ============================================================================
 # STEP 4: BUILD THE GRAPH
 # ============================================================================
 
-def build_graph():
+def timed_node(name: str, node):
+    """
+    Wrap a node function so its duration is recorded in graph_node_seconds
+    and as a span in the request trace.
+    
+    Args:
+        name (str): Node name used as the metric label
+        node (callable): The node function to wrap
+        
+    Returns:
+        callable: A node function with the same behaviour, but timed
+    """
+    
+    def wrapper(state: GraphState) -> GraphState:
+        with span(name), node_seconds.time(node=name):
+            return node(state)
+    
+    wrapper.__name__ = node.__name__
+    wrapper.__doc__ = node.__doc__
+    return wrapper
+
+
+def build_graph(checkpointer=None):
     """
     BUILD GRAPH: Assemble all nodes and edges into a workflow
     
@@ -284,121 +955,482 @@ def build_graph():
       5. Compiles the graph for execution
     
     The final graph flow:
-      START → classifier → (decision) → rag_responder → END
-                                   OR
-                               escalation → END
+      START → normalize → decompose → faq → classifier → (decision) → retriever → (gate) → rag_responder → END
+                              OR       OR                        OR                   OR
+                      sub_questions   END                escalation → END      extractive / no_information / escalation → END
+                           → END
+    
+    With a checkpointer (the session graph), the run starts with the
+    contextualize node and every path ends with the remember node:
+      START → contextualize → normalize → decompose → ... → remember → END
+                           (cached answer) → remember → END
+    
+    Args:
+        checkpointer: LangGraph checkpointer keeping session states
+            (None = stateless graph without memory nodes)
     
     Returns:
         CompiledGraph: Ready-to-execute workflow
     """
     
-    print("\n" + "=" * 70)
-    print("🏗️  BUILDING GRAPH")
-    print("=" * 70)
-    
     # Create a new StateGraph
     workflow = StateGraph(GraphState)
     
-    print("✅ Created StateGraph with GraphState")
-    
     # Add nodes to the graph
-    print("\n📌 Adding nodes to graph...")
-    workflow.add_node("classifier", classifier_node)
-    print("   ✓ Added classifier_node")
-    
-    workflow.add_node("rag_responder", rag_responder_node)
-    print("   ✓ Added rag_responder_node")
-    
-    workflow.add_node("escalation", escalation_node)
-    print("   ✓ Added escalation_node")
+    workflow.add_node("normalize", timed_node("normalize", normalize_node))
+    workflow.add_node("decompose", timed_node("decompose", decompose_node))
+    workflow.add_node("sub_questions", timed_node("sub_questions", sub_questions_node))
+    workflow.add_node("faq", timed_node("faq", faq_node))
+    workflow.add_node("classifier", timed_node("classifier", classifier_node))
+    workflow.add_node("retriever", timed_node("retriever", retriever_node))
+    workflow.add_node("rag_responder", timed_node("rag_responder", rag_responder_node))
+    workflow.add_node("extractive", timed_node("extractive", extractive_node))
+    workflow.add_node("no_information", timed_node("no_information", no_information_node))
+    workflow.add_node("escalation", timed_node("escalation", escalation_node))
+    
+    # Answer nodes end the run, or hand over to the remember node in the session graph
+    finish = END
+    if checkpointer is not None:
+        workflow.add_node("contextualize", timed_node("contextualize", contextualize_node))
+        workflow.add_node("remember", timed_node("remember", remember_node))
+        finish = "remember"
     
     # Define edges
-    print("\n📌 Defining edges...")
+    if checkpointer is None:
+        # Start → Normalize
+        workflow.add_edge(START, "normalize")
+    else:
+        # Start → Contextualize → (cached answer) → Remember → End, or → Normalize
+        workflow.add_edge(START, "contextualize")
+        workflow.add_conditional_edges(
+            "contextualize",
+            check_answered,
+            {
+                "remember": "remember",
+                "normalize": "normalize"
+            }
+        )
+        workflow.add_edge("remember", END)
+    
+    # Normalize → Decompose
+    workflow.add_edge("normalize", "decompose")
+    
+    # Decompose → (compound query) → Sub-questions → End, or → FAQ
+    workflow.add_conditional_edges(
+        "decompose",
+        check_decomposed,
+        {
+            "sub_questions": "sub_questions",
+            "faq": "faq"
+        }
+    )
+    workflow.add_edge("sub_questions", finish)
     
-    # Start → Classifier
-    workflow.add_edge(START, "classifier")
-    print("   ✓ START → classifier")
+    # FAQ → (precomputed answer) → End, or → Classifier
+    workflow.add_conditional_edges(
+        "faq",
+        check_faq,
+        {
+            "answered": finish,
+            "classifier": "classifier"
+        }
+    )
     
     # Classifier → (conditional routing based on should_escalate)
     workflow.add_conditional_edges(
         "classifier",
         should_escalate,
+        {
+            "retriever": "retriever",
+            "escalation": "escalation"
+        }
+    )
+    
+    # Retriever → (relevance gate)
+    workflow.add_conditional_edges(
+        "retriever",
+        check_relevance,
         {
             "rag_responder": "rag_responder",
+            "extractive": "extractive",
+            "no_information": "no_information",
             "escalation": "escalation"
         }
     )
-    print("   ✓ classifier → (conditional) → rag_responder OR escalation")
     
     # RAG Responder → End
-    workflow.add_edge("rag_responder", END)
-    print("   ✓ rag_responder → END")
+    workflow.add_edge("rag_responder", finish)
+    
+    # Extractive → End
+    workflow.add_edge("extractive", finish)
+    
+    # No Information → End
+    workflow.add_edge("no_information", finish)
     
     # Escalation → End
-    workflow.add_edge("escalation", END)
-    print("   ✓ escalation → END")
+    workflow.add_edge("escalation", finish)
     
     # Compile the graph
-    print("\n📌 Compiling graph...")
-    graph = workflow.compile()
-    print("✅ Graph compiled successfully!")
+    graph = workflow.compile(checkpointer=checkpointer)
+    logger.debug("Graph compiled")
     
     return graph
 
 
+@lru_cache(maxsize=1)
+def get_graph():
+    """
+    Return the compiled workflow, building it on first use.
+    
+    The graph does not change between requests, so it is compiled once per
+    process (api.py does this during the startup warm-up).
+    """
+    return build_graph()
+
+
+@lru_cache(maxsize=1)
+def get_session_graph():
+    """Return the workflow with conversation memory (SQLite checkpointer), building it on first use."""
+    return build_graph(get_checkpointer())
+
+
 # ============================================================================
 # STEP 5: EXECUTE THE GRAPH
 # ============================================================================
 
-def process_query(query: str) -> str:
+def initial_state(query: str, retrieved: Optional[list[tuple[Document, float]]] = None,
+                  deadline: Optional[float] = None, session_id: Optional[str] = None) -> GraphState:
+    """
+    Build the state a workflow run starts from.
+    
+    Args:
+        query (str): User's question
+        retrieved (list[tuple[Document, float]]): Chunks already retrieved for
+            this query (batch mode); the retriever node then skips the search
+        deadline (float): time.monotonic() deadline of the run
+            (default: settings.request_timeout from now)
+        session_id (str): Conversation of the query; "history" and "summary"
+            are then left out, so the session's checkpointed values are kept
+        
+    Returns:
+        GraphState: Initial state carrying the current request ID
+    """
+    state = {
+        "request_id": current_request_id(),
+        "query": query,
+        "category": "",
+        "context": "",
+        "documents": [doc for doc, _ in retrieved or []],
+        "scores": [score for _, score in retrieved or []],
+        "response": "",
+        "escalation_reason": "",
+        "error": "",
+        "prefetched": retrieved is not None,
+        "deadline": deadline or deadline_after(),
+        "degraded": "",
+        "model_tier": "",
+        "session_id": session_id or "",
+        "user_query": query,
+        "sub_questions": [],
+        "canonical_query": ""
+    }
+    if not session_id:
+        state.update(history=[], summary="")
+    return state
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of the query (see normalize.py), so trivial variants share a key."""
+    return normalize(query, current_index_version())["canonical"]
+
+
+def answer_cache_key(query: str) -> tuple:
+    """Key of a query in the answer cache and for coalescing: (index version, canonical query)."""
+    return (current_index_version(), normalize_query(query))
+
+
+def remember_answer(cache_key: tuple, final_state: GraphState) -> None:
+    """Cache answers and "no information" replies (never escalations, errors or degraded answers)."""
+    if not final_state["escalation_reason"] and not final_state["error"] and not final_state["degraded"]:
+        _answer_cache.set(cache_key, final_state["response"])
+
+
+def finish_session_turn(final_state: GraphState) -> None:
+    """After a session run: cache the answer (keyed by the standalone query) and apply the memory limits."""
+    remember_answer(answer_cache_key(final_state["query"]), final_state)
+    prune_checkpoints(final_state["session_id"])
+    touch_session(final_state["session_id"])
+
+
+def process_query(query: str, request_id: str = None,
+                  retrieved: Optional[list[tuple[Document, float]]] = None,
+                  deadline: Optional[float] = None, session_id: Optional[str] = None) -> str:
     """
     MAIN FUNCTION: Execute the workflow for a user query
     
     Steps:
-      1. Build the graph
-      2. Initialize state with user query
-      3. Run the graph from START to END
-      4. Extract and return the final response
+      1. Start a trace for the request
+      2. Return the cached answer if this query was answered before
+         (against the same index version)
+      3. If the same query is already running, wait for that run's result
+         instead of starting another one (single-flight coalescing) - at most
+         until this request's own deadline, then it is escalated
+      4. Otherwise initialize state with user query and request ID
+      5. Run the compiled graph from START to END
+      6. Cache and return the final response (answers and "no information"
+         replies only - escalations and errors are never cached)
+    
+    With a session_id the query runs on the session graph instead, which
+    resolves follow-ups from the conversation and remembers the turn
+    (no coalescing: the same words mean different things in different sessions).
     
     Args:
         query (str): User's question
+        request_id (str): ID of the request (a new one is generated if missing);
+            the whole run is recorded as one trace under this ID
+        retrieved (list[tuple[Document, float]]): Chunks already retrieved for
+            this query (batch mode); the retriever node then skips the search
+        deadline (float): time.monotonic() deadline of the request
+            (default: settings.request_timeout from now)
+        session_id (str): Conversation the query belongs to (None = no memory)
         
     Returns:
         str: Final response from the workflow
     """
     
-    print("\n\n" + "=" * 70)
-    print("🚀 PROCESSING QUERY")
-    print("=" * 70)
-    print(f"Query: {query}")
+    if session_id:
+        with start_trace(request_id, name="process_query", session=True):
+            final_state = get_session_graph().invoke(initial_state(query, retrieved, deadline, session_id),
+                                                     session_config(session_id))
+            finish_session_turn(final_state)
+        return final_state["response"]
+    
+    cache_key = answer_cache_key(query)
+    deadline = deadline or deadline_after()
+    
+    with start_trace(request_id, name="process_query"):
+        cached = _answer_cache.get(cache_key)
+        set_attribute("answer_cache", "hit" if cached is not None else "miss")
+        if cached is not None:
+            logger.debug("Answer cache hit for %r", query)
+            record_hit("answer_cache", query, cache_key[1])
+            return cached
+        
+        def run() -> str:
+            # A run for this key may have finished between the cache check and now
+            cached = _answer_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Execute the graph
+            logger.debug("Processing query %r", query)
+            final_state = get_graph().invoke(initial_state(query, retrieved, deadline))
+            
+            # Extract and return the response
+            response = final_state.get("response", "No response generated")
+            logger.debug("Workflow complete, response: %r", response)
+            remember_answer(cache_key, final_state)
+            return response
+        
+        # Followers wait for the leader at most until their OWN deadline
+        try:
+            response, shared = _answer_flight.do(cache_key, run, timeout=remaining(deadline))
+        except DeadlineExceeded as e:
+            logger.warning("Stopped waiting for an identical in-flight query: %s", e)
+            degraded_total.inc(reason=fallback_reason("coalesced", e))
+            state = initial_state(query, deadline=deadline)
+            state.update(category="general", degraded=fallback_reason("coalesced", e),
+                         escalation_reason=f"Waiting for an identical query failed: {e}")
+            response, shared = escalation_node(state)["response"], True
+        set_attribute("coalesced", shared)
+        if shared:
+            logger.debug("Coalesced with an identical in-flight query %r", query)
+    
+    return response
+
+
+def stream_query(query: str, request_id: str = None, deadline: Optional[float] = None,
+                 session_id: Optional[str] = None) -> Iterator[dict]:
+    """
+    Execute the workflow for a query, yielding progress events as it runs.
+    
+    Used by the /ws/chat WebSocket. Events (all JSON-serializable dicts):
+        {"type": "progress", "stage": "decomposed", "parts": 2}   (compound query: no tokens, merged answer)
+        {"type": "progress", "stage": "classified", "category": "product"}
+        {"type": "progress", "stage": "retrieved", "chunks": 2, "best_score": 0.81}
+        {"type": "progress", "stage": "generating"}
+        {"type": "token", "text": "The price"}        (answer text as it is generated)
+        {"type": "progress", "stage": "retrying"}     (self-check failed: discard the tokens so far)
+        {"type": "answer", "response": "...", "category": "product", "cached": false,
+         "degraded": ""}                               (degraded: why the LLM was skipped, e.g. "answer_circuit_open")
     
-    # Build the graph
-    graph = build_graph()
+    Cached answers skip straight to the "answer" event. Consume the whole
+    generator in ONE thread: the trace it starts is bound to that thread.
     
-    # Initialize the state
-    initial_state = {
-        "query": query,
-        "category": "",
-        "context": "",
-        "response": "",
-        "escalation_reason": ""
-    }
+    Args:
+        query (str): User's question
+        request_id (str): ID of the request (a new one is generated if missing)
+        deadline (float): time.monotonic() deadline of the request
+            (default: settings.request_timeout from now)
+        session_id (str): Conversation the query belongs to (None = no memory;
+            see process_query)
+        
+    Yields:
+        dict: Progress, token and final answer events
+    """
     
-    print(f"\n✅ Initial state created")
+    cache_key = answer_cache_key(query)
+    
+    with start_trace(request_id, name="process_query", streamed=True, session=bool(session_id)):
+        cached = None
+        if not session_id:
+            # (in a session the contextualize node checks the cache with the standalone query)
+            cached = _answer_cache.get(cache_key)
+            set_attribute("answer_cache", "hit" if cached is not None else "miss")
+        if cached is not None:
+            record_hit("answer_cache", query, cache_key[1])
+            yield {"type": "answer", "response": cached, "category": None, "cached": True, "degraded": ""}
+            return
+        
+        final_state = None
+        streaming_model = None
+        modes = ["tasks", "updates", "messages", "values"]
+        graph, config = (get_session_graph(), session_config(session_id)) if session_id else (get_graph(), None)
+        state = initial_state(query, deadline=deadline, session_id=session_id)
+        for mode, chunk in graph.stream(state, config, stream_mode=modes):
+            if mode == "values":
+                final_state = chunk
+            elif mode == "messages":
+                message, metadata = chunk
+                if metadata.get("langgraph_node") == "rag_responder" and message.content:
+                    model = next((tag for tag in metadata.get("tags", []) if tag.startswith("model:")), None)
+                    if streaming_model is not None and model != streaming_model:
+                        yield {"type": "progress", "stage": "retrying"}
+                    streaming_model = model
+                    yield {"type": "token", "text": message.content}
+            elif mode == "tasks" and chunk.get("name") in ("rag_responder", "sub_questions") and "result" not in chunk:
+                yield {"type": "progress", "stage": "generating"}
+            elif mode == "updates" and (chunk.get("decompose") or {}).get("sub_questions"):
+                yield {"type": "progress", "stage": "decomposed", "parts": len(chunk["decompose"]["sub_questions"])}
+            elif mode == "updates" and "classifier" in chunk:
+                yield {"type": "progress", "stage": "classified", "category": chunk["classifier"]["category"]}
+            elif mode == "updates" and "retriever" in chunk:
+                scores = chunk["retriever"]["scores"]
+                yield {"type": "progress", "stage": "retrieved", "chunks": len(scores),
+                       "best_score": round(max(scores, default=0.0), 4)}
+        
+        if session_id:
+            finish_session_turn(final_state)
+        else:
+            remember_answer(cache_key, final_state)
+        yield {"type": "answer", "response": final_state["response"],
+               "category": final_state["category"], "cached": False, "degraded": final_state["degraded"]}
+
+
+class BatchItem(TypedDict):
+    """
+    One result of process_queries().
+    
+    Attributes:
+        index (int): Position of the query in the batch
+        query (str): The original question
+        request_id (str): Trace ID of this item ("<batch id>-<index>")
+        status (str): "ok" or "error"
+        response (str | None): Final response (None if this item failed)
+        error (str | None): Error message (None on success)
+        duration_ms (float): Time spent on this item
+    """
+    index: int
+    query: str
+    request_id: str
+    status: str
+    response: Optional[str]
+    error: Optional[str]
+    duration_ms: float
+
+
+def process_queries(queries: list[str], request_id: str = None, max_concurrency: int = None,
+                    cancel: Optional[threading.Event] = None) -> Iterator[BatchItem]:
+    """
+    Run many queries through the workflow, yielding each result as soon as it is ready.
     
-    # Execute the graph
-    print(f"\n🔄 Executing graph...\n")
-    final_state = graph.invoke(initial_state)
+    Compared to calling process_query() once per query:
+      1. All queries are embedded and searched in ONE batched call
+         (rag_chain.retrieve_many); the chunks are handed to each graph run
+      2. At most `max_concurrency` graph runs execute at the same time
+      3. A failing query never affects the others; it is reported as an
+         "error" item instead
     
-    # Extract and return the response
-    response = final_state.get("response", "No response generated")
+    Results are yielded in COMPLETION order; sort by "index" to restore the
+    input order. Setting `cancel` (from any thread, e.g. when the client went
+    away) skips the queries not yet started: they end as "Cancelled" error
+    items and the generator stops. Queries already running finish normally.
     
-    print("\n" + "=" * 70)
-    print("✅ WORKFLOW COMPLETE")
-    print("=" * 70)
-    print(f"📤 Final Response: {response}")
+    Args:
+        queries (list[str]): The questions to answer
+        request_id (str): ID of the batch (generated if missing)
+        max_concurrency (int): Maximum parallel graph runs
+            (default: settings.batch_max_concurrency)
+        cancel (threading.Event): Set to stop the batch early (None = run every query)
+        
+    Yields:
+        BatchItem: One result per query
+    """
+    batch_id = request_id or new_request_id()
+    cancel = cancel or threading.Event()
+    valid = [i for i, query in enumerate(queries) if query and query.strip()]
+    
+    for i in sorted(set(range(len(queries))) - set(valid)):
+        yield {"index": i, "query": queries[i], "request_id": f"{batch_id}-{i}", "status": "error",
+               "response": None, "error": "Query cannot be empty", "duration_ms": 0.0}
+    if not valid:
+        return
+    
+    # Shared work: one embedding call + one vector search for the whole batch
+    retrieved = {}
+    try:
+        with start_trace(batch_id, name="batch_retrieve", queries=len(valid)):
+            for i, docs in zip(valid, retrieve_many([normalize_query(queries[i]) for i in valid])):
+                retrieved[i] = docs
+    except Exception:
+        # Each graph run falls back to its own retrieval
+        logger.exception("Batched retrieval failed for %d queries", len(valid))
+        errors_total.inc(component="retriever")
+    if cancel.is_set():
+        return
+    
+    def run(i: int) -> BatchItem:
+        item_id = f"{batch_id}-{i}"
+        start = time.perf_counter()
+        if cancel.is_set():
+            response, error = None, "Cancelled"
+        else:
+            try:
+                response, error = process_query(queries[i], item_id, retrieved.get(i)), None
+            except Exception as e:
+                logger.exception("Batch item failed", extra={"request_id": item_id})
+                errors_total.inc(component="graph")
+                response, error = None, str(e)
+        return {
+            "index": i,
+            "query": queries[i],
+            "request_id": item_id,
+            "status": "ok" if error is None else "error",
+            "response": response,
+            "error": error,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
     
-    return response
+    workers = max(1, min(max_concurrency or settings.batch_max_concurrency, len(valid)))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+    try:
+        futures = [pool.submit(run, i) for i in valid]
+        for future in as_completed(futures):
+            if cancel.is_set():
+                return
+            yield future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 # ============================================================================
@@ -408,6 +1440,8 @@ def process_query(query: str) -> str:
 def main():
     """Test the graph with sample queries"""
     
+    setup_logging(log_format="text")
+    
     print("\n\n" + "#" * 70)
     print("#" + " " * 68 + "#")
     print("#" + " " * 15 + "🌐 LANGGRAPH WORKFLOW DEMO" + " " * 27 + "#")
@@ -432,6 +1466,9 @@ def main():
         print(f"Query: {query}")
         print(f"Response: {response}")
         print(f"{'─' * 70}")
+    
+    print(f"\n📊 Metrics:")
+    print(format_summary())
 
 
 if __name__ == "__main__":
@@ -6,6 +6,8 @@ This script demonstrates the core steps of building a Retrieval-Augmented Genera
 2. Split text into manageable chunks
 3. Generate embeddings for each chunk
 4. Store embeddings in a vector database (Chromadb)
+5. Precompute answers to the most common questions (FAQ table, see faq.py)
+6. Store the catalog vocabulary used to correct typos in queries (see normalize.py)
 
 Requirements:
 - langchain
@@ -16,10 +18,21 @@ Requirements:
 
 # Import required libraries
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
+from typing import Optional
+import hashlib
 import os
 
+from config import settings
+from faq import refresh_faq_table
+from logging_config import get_logger, setup_logging
+from normalize import refresh_vocabulary
+from rag_chain import get_embeddings, write_index_version
+from resilience import ResilientEmbeddings
+
+
+logger = get_logger("ingest")
+
 
 def load_document(file_path):
     """
@@ -31,12 +44,12 @@ def load_document(file_path):
     Returns:
         str: Content of the file
     """
-    print(f"📖 Loading document from: {file_path}")
+    logger.info("Loading document from %s", file_path)
     
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
     
-    print(f"✓ Document loaded successfully ({len(content)} characters)")
+    logger.info("Document loaded (%d characters)", len(content))
     return content
 
 
@@ -54,7 +67,7 @@ def split_text_into_chunks(text, chunk_size=500, chunk_overlap=100):
     Returns:
         list: List of text chunks
     """
-    print(f"\n✂️  Splitting text into chunks (size={chunk_size}, overlap={chunk_overlap})")
+    logger.info("Splitting text into chunks (size=%d, overlap=%d)", chunk_size, chunk_overlap)
     
     # Create a text splitter with sensible defaults
     splitter = RecursiveCharacterTextSplitter(
@@ -67,82 +80,121 @@ def split_text_into_chunks(text, chunk_size=500, chunk_overlap=100):
     # Split the text
     chunks = splitter.split_text(text)
     
-    print(f"✓ Text split into {len(chunks)} chunks")
+    logger.info("Text split into %d chunks", len(chunks))
     
     # Show a sample chunk
     if chunks:
-        print(f"\nSample chunk (first 100 chars):\n{chunks[0][:100]}...")
+        logger.debug("Sample chunk (first 100 chars): %r", chunks[0][:100])
     
     return chunks
 
 
-def create_embeddings_and_store(chunks, persist_directory="./chroma_db"):
+def chunk_id(chunk: str) -> str:
+    """Stable Chromadb ID of a chunk (hash of its text)."""
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:32]
+
+
+def create_embeddings_and_store(chunks, persist_directory: Optional[str] = None,
+                                collection_name: Optional[str] = None):
     """
     Create embeddings for text chunks and store them in Chromadb.
     
     This function:
     1. Initializes a Gemini embedding model
-    2. Creates a Chromadb vector store
-    3. Stores the chunks with their embeddings persistently
+    2. Opens (or creates) the Chromadb collection
+    3. Stores the new chunks with their embeddings persistently and removes
+       the chunks that are no longer in the file
     
     Args:
         chunks (list): List of text chunks to embed
         persist_directory (str): Directory to persist the Chromadb data
+            (default: settings.database_path, where the API reads the index)
+        collection_name (str): Chromadb collection to store the chunks in
+            (default: settings.collection_name)
         
     Returns:
         Chroma: The Chromadb vector store instance
     """
-    print(f"\n🤖 Creating embeddings using Gemini API...")
+    logger.info("Creating embeddings using Gemini API")
     
     # Check if API key is set
     if not os.getenv("GOOGLE_API_KEY"):
-        print("⚠️  Warning: GOOGLE_API_KEY environment variable not set")
-        print("   Set it with: export GOOGLE_API_KEY='your-api-key'")
-        print("   Get your key from: https://aistudio.google.com/app/apikey")
+        logger.warning(
+            "GOOGLE_API_KEY environment variable not set; set it with "
+            "export GOOGLE_API_KEY='your-api-key' (get a key from https://aistudio.google.com/app/apikey)"
+        )
     
     # Initialize the Gemini embedding model
-    # This uses the free Gemini API for generating embeddings
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    # This uses the free Gemini API for generating embeddings - the same model
+    # (settings.embedding_model) the API embeds queries with; calls go through
+    # the same circuit breaker and retry budget as the API (resilience.py)
+    embeddings = ResilientEmbeddings(get_embeddings())
+    persist_directory = persist_directory or settings.database_path
+    collection_name = collection_name or settings.collection_name
     
-    print(f"✓ Embedding model initialized")
+    logger.info("Storing embeddings in Chromadb (persist directory: %s)", persist_directory)
     
-    print(f"\n💾 Storing embeddings in Chromadb...")
-    print(f"   Persist directory: {persist_directory}")
-    
-    # Create a Chromadb vector store with the chunks and embeddings
+    # Open (or create) the Chromadb collection the API reads
     # persist_directory ensures the data is saved to disk and can be reloaded
-    vector_store = Chroma.from_texts(
-        texts=chunks,
-        embedding=embeddings,
+    vector_store = Chroma(
         persist_directory=persist_directory,
-        collection_name="product_embeddings"
+        embedding_function=embeddings,
+        collection_name=collection_name
     )
     
-    print(f"✓ Embeddings stored successfully in Chromadb")
-    print(f"✓ Total chunks indexed: {len(chunks)}")
+    # Re-ingesting updates the collection in place: every chunk's ID is derived
+    # from its text, so unchanged chunks are kept (and not embedded again), new
+    # ones are added and the chunks of the previous file that are gone (e.g. an
+    # old price) are deleted - no duplicates, nothing stale left searchable
+    chunk_ids = {chunk_id(chunk): chunk for chunk in chunks}
+    existing = set(vector_store.get(include=[])["ids"])
+    added = [id_ for id_ in chunk_ids if id_ not in existing]
+    stale = sorted(existing - chunk_ids.keys())
+    if added:
+        vector_store.add_texts([chunk_ids[id_] for id_ in added], ids=added)
+    if stale:
+        vector_store.delete(ids=stale)
+    
+    logger.info("Embeddings stored in Chromadb, %d chunks indexed (%d added, %d removed, %d unchanged)",
+                len(chunk_ids), len(added), len(stale), len(chunk_ids) - len(added))
     
     return vector_store
 
 
 def main():
     """
-    Main execution flow: Load → Split → Embed → Store
+    Main execution flow: Load → Split → Embed → Store → FAQ
     """
+    setup_logging(log_format="text")
+    
     print("=" * 60)
     print("🚀 RAG Data Ingestion Pipeline")
     print("=" * 60)
     
     try:
         # Step 1: Load the document
-        file_path = "data/product_info.txt"
-        text_content = load_document(file_path)
+        text_content = load_document(settings.data_path)
         
         # Step 2: Split into chunks
-        chunks = split_text_into_chunks(text_content, chunk_size=500, chunk_overlap=100)
+        chunks = split_text_into_chunks(text_content, chunk_size=settings.chunk_size,
+                                        chunk_overlap=settings.chunk_overlap)
         
         # Step 3 & 4: Create embeddings and store in Chromadb
         vector_store = create_embeddings_and_store(chunks)
         
+        # Step 5: Precompute FAQ answers (only records that changed are regenerated)
+        faq_stats = refresh_faq_table(text_content)
+        print(f"\n❓ FAQ table: {faq_stats['entries']} answers "
+              f"({faq_stats['regenerated']} records regenerated, {faq_stats['reused']} unchanged)")
+        
+        # Step 6: Catalog vocabulary (product and policy names) for query normalization
+        vocabulary = refresh_vocabulary(text_content)
+        print(f"\n🔤 Catalog vocabulary: {len(vocabulary)} words")
+        
+        # Tell running API workers that a new index (and FAQ table, vocabulary) is available
+        version = write_index_version()
+        print(f"\n🔖 Published index version {version} (API workers reload within seconds)")
+        
         # Quick test: Perform a sample search
         print(f"\n🔍 Testing retrieval with a sample query...")
         results = vector_store.similarity_search("What is the price of SmartWatch?", k=2)
@@ -156,7 +208,7 @@ def main():
         print("\nNext steps:")
         print("  - Use the 'vector_store' to retrieve relevant chunks")
         print("  - Feed retrieved chunks to an LLM for question answering")
-        print("  - The Chromadb data persists in './chroma_db' folder")
+        print(f"  - The Chromadb data persists in '{settings.database_path}' folder")
         
     except FileNotFoundError as e:
         print(f"❌ Error: Could not find file - {e}")
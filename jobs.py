@@ -0,0 +1,176 @@
+"""
+Asynchronous chat jobs: submit now, fetch the answer later.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+POST /chat keeps the HTTP connection open until Gemini has answered, which can
+take several seconds - too long for clients behind proxies with short
+timeouts. With jobs the work is split in two:
+
+  1. POST /jobs              → returns a job ID immediately ("queued")
+  2. GET  /jobs/{id}         → "queued" / "running" / "done" / "failed" (+ answer)
+     GET  /jobs/{id}/events  → or subscribe and get pushed updates (SSE)
+
+A small pool of worker threads runs the queued jobs, so a burst of requests
+waits in the queue instead of overloading Gemini. Finished jobs are kept for
+settings.job_ttl seconds and then expire.
+
+The job records live in a cache from cache.make_cache(), so with
+CACHE_BACKEND=sqlite any API worker process can report any job.
+
+Job IDs are always generated by the server (random UUIDs): whoever knows a
+job ID can read its answer, so clients must not be able to choose or guess
+one. A client's X-Request-ID is kept as the job's request_id (trace
+correlation) only.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypedDict
+
+from admission import Overloaded, rejected_total
+from cache import make_cache
+from logging_config import get_logger
+from metrics import Counter, Gauge, Histogram, errors_total
+
+
+logger = get_logger("jobs")
+
+jobs_total = Counter("jobs_total", "Chat jobs by final status", ["status"])
+jobs_pending = Gauge("jobs_pending", "Jobs queued or running in this worker")
+job_queue_seconds = Histogram("job_queue_seconds", "Time jobs waited before a worker picked them up")
+
+
+class Job(TypedDict):
+    """
+    One job record, as returned by GET /jobs/{id}.
+
+    Attributes:
+        job_id (str): Job ID (random, generated by the server)
+        request_id (str): Request ID of the job's trace (the client's
+            X-Request-ID, or the job ID)
+        status (str): "queued", "running", "done" or "failed"
+        query (str): The question
+        session_id (str | None): Conversation the query belongs to (None = no memory)
+        response (str | None): The answer once status is "done"
+        error (str | None): Error message if status is "failed"
+        created_at (float): Unix time the job was submitted
+        started_at (float | None): Unix time a worker started it
+        finished_at (float | None): Unix time it finished
+    """
+    job_id: str
+    request_id: str
+    status: str
+    query: str
+    session_id: Optional[str]
+    response: Optional[str]
+    error: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+
+FINAL_STATUSES = ("done", "failed")
+
+
+class JobManager:
+    """
+    Runs chat jobs on a bounded worker pool and keeps their results for a while.
+
+    Usage:
+        manager = JobManager(handler=process_query, max_workers=4, max_pending=100, ttl=600)
+        job = manager.submit("What is the price of SmartWatch Pro X?")
+        manager.get(job["job_id"])     # → {"status": "done", "response": "...", ...}
+
+    Attributes:
+        handler (callable): handler(query, request_id) → answer; jobs of a
+            session are called with session_id=... as well
+        max_workers (int): Jobs executed at the same time
+        max_pending (int): Maximum queued + running jobs; more raise Overloaded
+        ttl (float): Seconds a job record is kept after its last update
+    """
+
+    def __init__(self, handler: Callable[[str, str], str], max_workers: int = 4,
+                 max_pending: int = 100, ttl: float = 600, store_size: int = 10000):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.pending = 0
+        self._store = make_cache("jobs", maxsize=store_size, ttl=ttl)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        # Moving average of job run time, for Retry-After estimates
+        self._avg_run_seconds = 1.0
+
+    def submit(self, query: str, request_id: Optional[str] = None, session_id: Optional[str] = None) -> Job:
+        """
+        Queue a query; returns the new job record immediately.
+
+        Args:
+            query (str): The question
+            request_id (str): Trace request ID to correlate the job with
+                (default: the job ID); never used as the job ID itself
+            session_id (str): Conversation of the query, passed to the handler
+
+        Raises:
+            Overloaded: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                rejected_total.inc(reason="jobs_full")
+                raise Overloaded("jobs_full", self._avg_run_seconds * self.pending / self.max_workers)
+            self.pending += 1
+            jobs_pending.set(self.pending)
+
+        job_id = uuid.uuid4().hex
+        job: Job = {
+            "job_id": job_id,
+            "request_id": request_id or job_id,
+            "status": "queued",
+            "query": query,
+            "session_id": session_id,
+            "response": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._store.set(job["job_id"], job)
+        self._pool.submit(self._run, dict(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job record, or None if it is unknown or expired."""
+        return self._store.get(job_id)
+
+    def _run(self, job: Job) -> None:
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        job_queue_seconds.observe(job["started_at"] - job["created_at"])
+        self._store.set(job["job_id"], dict(job))
+
+        try:
+            session = {"session_id": job["session_id"]} if job["session_id"] else {}
+            job["response"] = self.handler(job["query"], job["request_id"], **session)
+            job["status"] = "done"
+        except Exception as e:
+            logger.exception("Job failed", extra={"request_id": job["request_id"], "job_id": job["job_id"]})
+            errors_total.inc(component="jobs")
+            job["error"] = str(e)
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = time.time()
+            self._store.set(job["job_id"], job)
+            jobs_total.inc(status=job["status"])
+            with self._lock:
+                self.pending -= 1
+                jobs_pending.set(self.pending)
+                run_seconds = job["finished_at"] - job["started_at"]
+                self._avg_run_seconds = 0.9 * self._avg_run_seconds + 0.1 * run_seconds
+
+    def shutdown(self) -> None:
+        """Stop accepting work; queued jobs that have not started are dropped."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,198 @@
+"""
+Shared logging setup for the TechGear Chatbot.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+print() writes straight to the terminal, on the thread that handles the
+request. Under load that (a) slows requests down and (b) mixes the output of
+many requests into an unreadable mess.
+
+With this module every file logs through Python's `logging` instead:
+  - Levels per module, from the LOG_LEVEL setting:
+        LOG_LEVEL=INFO                        → everything at INFO
+        LOG_LEVEL=INFO,graph=DEBUG            → graph.py also shows DEBUG
+        LOG_LEVEL=WARNING,api=INFO,ingest=INFO
+  - JSON output (one object per line) including the request ID, so logs can be
+    searched and joined with traces; or readable text for CLI runs
+  - A background thread does the actual writing: the request thread only puts
+    the record on an in-memory queue and never waits for the terminal
+    (if the queue is full, records are dropped and counted)
+
+The old, very verbose step-by-step output is still there at DEBUG level.
+
+Usage:
+    from logging_config import get_logger, setup_logging
+
+    logger = get_logger("graph")
+    setup_logging()                  # once, at program start
+    logger.info("Query classified", extra={"category": "product"})
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import warnings
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from config import settings
+from metrics import Counter
+from tracing import current_request_id
+
+
+ROOT_LOGGER = "techgear"
+QUEUE_SIZE = 10000
+
+dropped_logs_total = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def get_logger(module: str) -> logging.Logger:
+    """Return the logger for a module, e.g. get_logger("graph") → "techgear.graph"."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{module}")
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Attach the current request ID (from the active trace) to every record,
+    unless one was passed explicitly with extra={"request_id": ...}.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = current_request_id()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable single-line output for CLI runs."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(name)s] %(message)s", datefmt="%H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if getattr(record, "request_id", None):
+            line += f" (request_id={record.request_id})"
+        return line
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+
+    The record is prepared on the calling thread (message formatted, exception
+    rendered to text) and then dropped - not waited on - if the queue is full.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_logs_total.inc()
+
+
+def level_number(name: str) -> Optional[int]:
+    """Numeric level of a level name such as "debug" (None if it is not a level)."""
+    # getLevelName() maps known names to numbers and returns "Level X" otherwise
+    # (logging.getLevelNamesMapping() needs Python 3.11; the image runs 3.10)
+    level = logging.getLevelName(name.strip().upper())
+    return level if isinstance(level, int) else None
+
+
+def parse_levels(spec: str) -> tuple[int, dict[str, int]]:
+    """
+    Parse a LOG_LEVEL value such as "INFO,graph=DEBUG".
+
+    An entry with an unknown level name (e.g. "verbose" or "graph=loud") is
+    skipped with a warning, so a typo never stops the API from starting: the
+    default stays INFO and the module keeps the default level.
+
+    Returns:
+        tuple: (default level, {module name: level})
+    """
+    default = logging.INFO
+    per_module = {}
+    for part in (p.strip() for p in spec.split(",")):
+        if not part:
+            continue
+        module, _, name = part.rpartition("=")
+        level = level_number(name)
+        if level is None:
+            warnings.warn(f"LOG_LEVEL: ignoring {part!r} - {name.strip()!r} is not a log level "
+                          f"(use DEBUG, INFO, WARNING, ERROR or CRITICAL)", stacklevel=2)
+        elif module:
+            per_module[module.strip()] = level
+        else:
+            default = level
+    return default, per_module
+
+
+def setup_logging(log_format: Optional[str] = None, level_spec: Optional[str] = None) -> None:
+    """
+    Configure the "techgear" loggers once per process (later calls are ignored).
+
+    Args:
+        log_format (str): "json" or "text" (default: settings.log_format)
+        level_spec (str): Level specification (default: settings.log_level)
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        default, per_module = parse_levels(level_spec or settings.log_level)
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(default)
+        root.propagate = False
+        for module, level in per_module.items():
+            get_logger(module).setLevel(level)
+
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter() if (log_format or settings.log_format) == "json" else TextFormatter())
+
+        log_queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(RequestIdFilter())
+        root.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
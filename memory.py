@@ -0,0 +1,284 @@
+"""
+Bounded conversation memory for chat sessions.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Without memory every question stands alone, so a follow-up like "and what's
+its warranty?" has nothing to refer to. Sending the whole chat history with
+every question would fix that, but prompts (and stored state) would grow
+with every turn. This module keeps memory BOUNDED:
+
+  1. SESSIONS: a client sends a session_id with its queries. The graph state
+     of each session (its conversation) is saved by a LangGraph CHECKPOINTER
+     in a local SQLite file (settings.session_db_path), so the next query of
+     the session starts from it - in any worker process.
+
+  2. CONDENSING: a follow-up is rewritten into a standalone question
+     ("What is the warranty of SmartWatch Pro X?") before classification, so
+     retrieval, caches and the answer prompt work exactly as for a new query.
+
+  3. COMPACTION: the conversation is a running SUMMARY plus the last few
+     turns. When it exceeds settings.session_token_budget, the older turns are
+     folded into the summary (by the lite model, or by truncation if it is
+     unavailable), so prompt size and stored state stay flat however long
+     the conversation runs.
+
+  4. EVICTION: only the latest checkpoint of a session is kept, sessions idle
+     for settings.session_ttl seconds are deleted, and above
+     settings.session_max_count sessions the least recently used go first.
+
+Metrics: session_compactions_total, sessions_evicted_total,
+session_conversation_tokens.
+"""
+
+import os
+import re
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Optional, TypedDict
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from config import settings
+from context_packer import CHARS_PER_TOKEN, estimate_tokens
+from deadline import call_with_deadline
+from logging_config import get_logger
+from metrics import Counter, Histogram
+from model_router import model_for_tier
+from rag_chain import get_llm
+from resilience import resilient_call
+
+
+logger = get_logger("memory")
+
+compactions_total = Counter("session_compactions_total", "Conversation compactions (llm = summarized, truncated = fallback)",
+                            ["outcome"])
+sessions_evicted_total = Counter("sessions_evicted_total", "Sessions deleted by the memory limits", ["reason"])
+conversation_tokens = Histogram("session_conversation_tokens", "Estimated tokens of a session's memory after a turn",
+                                buckets=(50, 100, 200, 400, 800, 1600, 3200))
+
+# Longest answer kept verbatim in a turn (the rest is cut, the summary keeps the gist)
+MAX_TURN_CHARS = 600
+
+# Signs that a query refers back to the conversation ("its warranty", "and the earbuds?")
+_FOLLOW_UP = re.compile(
+    r"^\s*(and|also|what about|how about|same)\b|\b(it|its|it's|that|this|those|these|they|them|their|one|ones)\b",
+    re.IGNORECASE
+)
+
+CONDENSE_PROMPT = """Rewrite the customer's last message as a standalone question about TechGear products or policies.
+Use the conversation to fill in missing product names. If the message already stands alone, repeat it unchanged.
+Reply with the question only.
+
+{conversation}
+
+Last message: {query}
+
+Standalone question:"""
+
+SUMMARY_PROMPT = """Summarize this customer support conversation in at most {words} words.
+Keep product names, prices and anything the customer still wants to know.
+
+Summary so far:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:"""
+
+
+class Turn(TypedDict):
+    """
+    One question and answer of a conversation.
+
+    Attributes:
+        query (str): The question as the user asked it
+        response (str): The reply (cut to MAX_TURN_CHARS)
+    """
+    query: str
+    response: str
+
+
+# ============================================================================
+# CONVERSATION: condensing follow-ups and compacting the history
+# ============================================================================
+
+def format_conversation(summary: str, history: list[Turn]) -> str:
+    """Render the summary and recent turns as prompt text."""
+    lines = [f"Summary of earlier conversation: {summary}"] if summary else []
+    for turn in history:
+        lines.append(f"Customer: {turn['query']}")
+        lines.append(f"Assistant: {turn['response']}")
+    return "\n".join(lines)
+
+
+def memory_tokens(summary: str, history: list[Turn]) -> int:
+    """Estimated prompt tokens of a session's memory."""
+    return estimate_tokens(format_conversation(summary, history))
+
+
+def is_follow_up(query: str) -> bool:
+    """True if the query probably refers to earlier turns (pronouns, "and ...?", very short)."""
+    return bool(_FOLLOW_UP.search(query)) or len(query.split()) <= 3
+
+
+def _invoke_lite(stage: str, prompt: str, deadline: Optional[float]) -> str:
+    """Run a prompt on the lite model within the deadline; returns the stripped reply."""
+    model = model_for_tier("lite")
+    message = call_with_deadline(stage, deadline, lambda: resilient_call(
+        f"gemini:{model}", get_llm(model).invoke, prompt, deadline=deadline), timeout=settings.classifier_timeout)
+    return message.content.strip()
+
+
+def condense_query(query: str, summary: str, history: list[Turn], deadline: Optional[float] = None) -> str:
+    """
+    Turn a follow-up into a standalone question using the conversation.
+
+    Args:
+        query (str): The user's message
+        summary (str): Running summary of the session
+        history (list[Turn]): Recent turns of the session
+        deadline (float): time.monotonic() deadline of the request
+
+    Returns:
+        str: The standalone question (the query itself if there is no
+            conversation yet or it does not look like a follow-up)
+    """
+    if not (summary or history) or not is_follow_up(query):
+        return query
+
+    prompt = CONDENSE_PROMPT.format(conversation=format_conversation(summary, history), query=query)
+    try:
+        standalone = _invoke_lite("condense", prompt, deadline).splitlines()[0].strip()
+    except Exception as e:
+        # Without the LLM, the previous question still names what "it" is
+        logger.warning("Could not condense follow-up, prefixing the previous question: %s", e)
+        return f"{history[-1]['query']} {query}" if history else query
+    return standalone or query
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Keep the END of `text` (the most recent part) within max_tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else "…" + text[-(max_chars - 1):]
+
+
+def add_turn(summary: str, history: list[Turn], query: str, response: str,
+             deadline: Optional[float] = None) -> tuple[str, list[Turn]]:
+    """
+    Append a turn and compact the conversation if it exceeds the token budget.
+
+    The newest settings.session_keep_turns turns (fewer if they do not fit the
+    budget) stay verbatim; older ones are folded into the running summary
+    (at most settings.session_summary_max_tokens).
+
+    Args:
+        summary (str): Running summary of the session
+        history (list[Turn]): Recent turns of the session
+        query (str): The question just answered (as the user asked it)
+        response (str): Its reply
+        deadline (float): time.monotonic() deadline for the summary call
+
+    Returns:
+        tuple[str, list[Turn]]: The new (summary, history)
+    """
+    history = history + [{"query": query, "response": response[:MAX_TURN_CHARS]}]
+    if memory_tokens(summary, history) <= settings.session_token_budget:
+        conversation_tokens.observe(memory_tokens(summary, history))
+        return summary, history
+
+    keep = max(1, min(settings.session_keep_turns, len(history) - 1))
+    # Keep fewer turns verbatim if they would not fit next to a full-size summary
+    while keep > 1 and (memory_tokens("", history[-keep:]) + settings.session_summary_max_tokens
+                        > settings.session_token_budget):
+        keep -= 1
+    older, history = history[:-keep], history[-keep:]
+    turns = format_conversation("", older)
+    try:
+        prompt = SUMMARY_PROMPT.format(words=settings.session_summary_max_tokens * 3 // 4,
+                                       summary=summary or "(none)", turns=turns)
+        summary = _invoke_lite("summarize", prompt, deadline)
+        compactions_total.inc(outcome="llm")
+    except Exception as e:
+        logger.warning("Could not summarize the conversation, truncating it: %s", e)
+        summary = " ".join(part for part in (summary, turns.replace("\n", " ")) if part)
+        compactions_total.inc(outcome="truncated")
+
+    summary = _truncate(summary, settings.session_summary_max_tokens)
+    conversation_tokens.observe(memory_tokens(summary, history))
+    return summary, history
+
+
+# ============================================================================
+# SESSIONS: checkpointer, pruning and eviction
+# ============================================================================
+
+@lru_cache(maxsize=1)
+def get_checkpointer() -> SqliteSaver:
+    """Return the SQLite checkpointer holding the session states (created on first use)."""
+    os.makedirs(os.path.dirname(settings.session_db_path) or ".", exist_ok=True)
+    connection = sqlite3.connect(settings.session_db_path, check_same_thread=False, timeout=5.0)
+    checkpointer = SqliteSaver(connection)
+    with checkpointer.cursor() as cursor:
+        cursor.execute("CREATE TABLE IF NOT EXISTS sessions (thread_id TEXT PRIMARY KEY, last_used REAL NOT NULL)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)")
+    return checkpointer
+
+
+def session_config(session_id: str) -> dict:
+    """LangGraph run config selecting the session's checkpoints."""
+    return {"configurable": {"thread_id": session_id}}
+
+
+def touch_session(session_id: str) -> None:
+    """Mark a session as used now, then apply the eviction limits."""
+    with get_checkpointer().cursor() as cursor:
+        cursor.execute("INSERT INTO sessions (thread_id, last_used) VALUES (?, ?) "
+                       "ON CONFLICT (thread_id) DO UPDATE SET last_used = excluded.last_used",
+                       (session_id, time.time()))
+    evict_sessions()
+
+
+def prune_checkpoints(session_id: str) -> None:
+    """Delete all but the latest checkpoint of a session (older ones are never read again)."""
+    with get_checkpointer().cursor() as cursor:
+        for table in ("checkpoints", "writes"):
+            cursor.execute(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id < "
+                "(SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ?)",
+                (session_id, session_id)
+            )
+
+
+def delete_session(session_id: str) -> None:
+    """Forget a session entirely."""
+    checkpointer = get_checkpointer()
+    checkpointer.delete_thread(session_id)
+    with checkpointer.cursor() as cursor:
+        cursor.execute("DELETE FROM sessions WHERE thread_id = ?", (session_id,))
+
+
+def evict_sessions() -> int:
+    """
+    Delete idle sessions (settings.session_ttl) and the least recently used
+    ones above settings.session_max_count.
+
+    Returns:
+        int: Number of sessions deleted
+    """
+    with get_checkpointer().cursor() as cursor:
+        expired = [row[0] for row in cursor.execute(
+            "SELECT thread_id FROM sessions WHERE last_used < ?", (time.time() - settings.session_ttl,))]
+        overflow = [row[0] for row in cursor.execute(
+            "SELECT thread_id FROM sessions WHERE last_used >= ? ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+            (time.time() - settings.session_ttl, settings.session_max_count))]
+
+    for reason, session_ids in (("ttl", expired), ("lru", overflow)):
+        for session_id in session_ids:
+            delete_session(session_id)
+            sessions_evicted_total.inc(reason=reason)
+    if expired or overflow:
+        logger.info("Evicted %d idle and %d least recently used sessions", len(expired), len(overflow))
+    return len(expired) + len(overflow)
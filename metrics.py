@@ -0,0 +1,254 @@
+"""
+Lightweight in-process metrics for the chatbot.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+A metric is a number we keep updating while the program runs, for example
+"how many queries were answered without calling the LLM". Metrics let us see
+what the system is doing without reading logs line by line.
+
+Usage:
+    from metrics import Counter, Gauge, Histogram
+
+    queries_total = Counter("queries_total", "Queries received", ["category"])
+    queries_total.inc(category="product")
+    queries_total.value(category="product")   # → 1
+
+    rerank_seconds = Histogram("rerank_seconds", "Time spent reranking", ["reranker"])
+    with rerank_seconds.time(reranker="lexical"):
+        ...
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Counter:
+    """
+    A number that only goes up, optionally split by label values.
+
+    Attributes:
+        name (str): Metric name (snake_case)
+        help (str): One-line description
+        labelnames (tuple[str]): Names of the labels this counter is split by
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the counter for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value for the given label values (0 if never incremented)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> dict[tuple, float]:
+        """Snapshot of all {label values: value} pairs."""
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge:
+    """
+    A number that can go up and down (e.g. current queue depth).
+
+    Attributes:
+        name (str): Metric name (snake_case)
+        help (str): One-line description
+        labelnames (tuple[str]): Names of the labels this gauge is split by
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    _key = Counter._key
+    value = Counter.value
+    samples = Counter.samples
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge to `value`."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrease the gauge."""
+        self.inc(-amount, **labels)
+
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """
+    Distribution of observed values (usually durations in seconds).
+
+    Each observation is counted in the first bucket whose upper bound is >= the
+    value, so percentiles can be estimated without storing every value.
+
+    Attributes:
+        name (str): Metric name (snake_case)
+        help (str): One-line description
+        labelnames (tuple[str]): Names of the labels this histogram is split by
+        buckets (tuple[float]): Sorted bucket upper bounds
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # {label values: [bucket counts..., +Inf count, sum]}
+        self._values: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    _key = Counter._key
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager that observes the elapsed wall-clock seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        """Number of observations for the given label values."""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return int(sum(series[:-1])) if series else 0
+
+    def sum(self, **labels) -> float:
+        """Sum of all observed values for the given label values."""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return series[-1] if series else 0.0
+
+    def samples(self) -> dict[tuple, list[float]]:
+        """Snapshot of {label values: [bucket counts..., +Inf count, sum]}."""
+        with self._lock:
+            return {key: list(series) for key, series in self._values.items()}
+
+    def quantile(self, q: float, **labels) -> float:
+        """
+        Estimate the q-quantile (e.g. 0.95) from the buckets.
+
+        Returns the upper bound of the bucket containing the quantile, or 0.0
+        if nothing was observed. Values above the last bucket report that bound.
+        """
+        with self._lock:
+            series = self._values.get(self._key(labels))
+        if not series:
+            return 0.0
+        counts = series[:-1]
+        target = q * sum(counts)
+        running = 0
+        for bound, count in zip(self.buckets + (self.buckets[-1],), counts):
+            running += count
+            if running >= target and count:
+                return bound
+        return self.buckets[-1]
+
+
+# Every metric registers itself here on creation
+REGISTRY: list = []
+
+
+# Errors from any component (retriever, rag_responder, classifier, api, ...)
+errors_total = Counter("errors_total", "Errors caught while handling requests", ["component"])
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render_prometheus() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format.
+
+    This is what GET /metrics returns; Prometheus (or any compatible scraper)
+    can read it directly.
+    """
+    lines = []
+    for metric in REGISTRY:
+        kind = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}[type(metric)]
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {kind}")
+
+        for values, sample in sorted(metric.samples().items()):
+            if kind != "histogram":
+                lines.append(f"{metric.name}{_format_labels(metric.labelnames, values)} {sample}")
+                continue
+
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ("+Inf",), sample[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{metric.name}_bucket{_format_labels(metric.labelnames, values, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_format_labels(metric.labelnames, values)} {sample[-1]}")
+            lines.append(f"{metric.name}_count{_format_labels(metric.labelnames, values)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+def format_summary() -> str:
+    """
+    Human-readable one-line-per-series summary, for CLI runs.
+
+    Histograms show count, average and estimated p95; counters and gauges show
+    their value. Series that were never touched are skipped.
+    """
+    lines = []
+    for metric in REGISTRY:
+        for values, sample in sorted(metric.samples().items()):
+            labels = _format_labels(metric.labelnames, values)
+            if isinstance(metric, Histogram):
+                labelled = dict(zip(metric.labelnames, values))
+                count = metric.count(**labelled)
+                average = sample[-1] / count if count else 0.0
+                p95 = metric.quantile(0.95, **labelled)
+                lines.append(f"{metric.name}{labels}: n={count} avg={average * 1000:.1f}ms p95<={p95 * 1000:.0f}ms")
+            else:
+                lines.append(f"{metric.name}{labels}: {sample:g}")
+    return "\n".join(lines)
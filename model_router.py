@@ -0,0 +1,119 @@
+"""
+Model cascade routing: use the cheapest Gemini model that can do the job.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Not every question needs the same model. "What is the price of SmartWatch
+Pro X?" with a perfectly matching chunk is easy; "Compare the battery life of
+the SmartWatch and the Fitness Band and tell me which is better for hiking"
+is not. Bigger models answer hard questions better but are slower and cost
+more, so we define three TIERS:
+
+    lite     → settings.llm_model_lite    (classification, short factual answers)
+    standard → settings.llm_model         (everything else)
+    strong   → settings.llm_model_strong  (comparisons, long multi-part questions)
+
+For every answer the ROUTER picks a tier from simple query features and the
+retrieval confidence (best chunk score), and the chosen tier is recorded in
+the graph state and the request trace.
+
+A cheap answer is then SELF-CHECKED. If it is empty, or says "I don't have
+this information" although retrieval found a very relevant chunk, the
+question is retried ONCE on the next tier up (if the deadline allows).
+
+With settings.model_routing_enabled = False every call uses the standard tier.
+"""
+
+import re
+from typing import Optional
+
+from config import settings
+from metrics import Counter
+from rag_chain import NO_INFORMATION_REPLY
+
+
+TIERS = ("lite", "standard", "strong")
+
+tier_selected_total = Counter("model_tier_selected_total", "Model tier chosen by the router", ["node", "tier"])
+tier_escalations_total = Counter(
+    "model_tier_escalations_total",
+    "Answers retried on a higher tier because the self-check failed",
+    ["from_tier", "reason"]
+)
+
+# Words that signal a comparison between several products
+_COMPARISON = re.compile(r"\b(compare|comparison|versus|vs\.?|difference|differences|better|best|which one)\b",
+                         re.IGNORECASE)
+
+
+def model_for_tier(tier: str) -> str:
+    """Gemini model name of a tier."""
+    if not settings.model_routing_enabled:
+        return settings.llm_model
+    return {
+        "lite": settings.llm_model_lite,
+        "standard": settings.llm_model,
+        "strong": settings.llm_model_strong,
+    }[tier]
+
+
+def next_tier(tier: str) -> Optional[str]:
+    """The tier above `tier` (None if it is already the strongest)."""
+    index = TIERS.index(tier)
+    return TIERS[index + 1] if index + 1 < len(TIERS) else None
+
+
+def is_comparison(query: str) -> bool:
+    """True if the query compares several products ("compare", "vs", "which one" ...)."""
+    return bool(_COMPARISON.search(query))
+
+
+def choose_answer_tier(query: str, scores: list[float]) -> tuple[str, str]:
+    """
+    Pick the model tier for answering a query.
+
+    Rules (first match wins):
+      1. Comparison words or more than settings.router_long_query_words words → "strong"
+      2. At most settings.router_short_query_words words AND best chunk score
+         >= settings.router_confident_score → "lite"
+      3. Otherwise → "standard"
+
+    Args:
+        query (str): The user's question
+        scores (list[float]): Relevance scores of the retrieved chunks
+
+    Returns:
+        tuple[str, str]: (tier, reason) - the reason is recorded for debugging
+    """
+    if not settings.model_routing_enabled:
+        return "standard", "routing disabled"
+
+    words = len(query.split())
+    best_score = max(scores, default=0.0)
+
+    if is_comparison(query):
+        return "strong", "comparison"
+    if words > settings.router_long_query_words:
+        return "strong", f"long query ({words} words)"
+    if words <= settings.router_short_query_words and best_score >= settings.router_confident_score:
+        return "lite", f"short query, confident retrieval ({best_score:.2f})"
+    return "standard", "default"
+
+
+def self_check(answer: str, scores: list[float]) -> Optional[str]:
+    """
+    Check a generated answer for obvious failures.
+
+    Args:
+        answer (str): The LLM's answer
+        scores (list[float]): Relevance scores of the chunks it was given
+
+    Returns:
+        str | None: Why the answer failed the check, or None if it passed
+    """
+    if not answer or not answer.strip():
+        return "empty"
+    best_score = max(scores, default=0.0)
+    if NO_INFORMATION_REPLY.rstrip(".") in answer and best_score >= settings.router_confident_score:
+        return "no_information_despite_context"
+    return None
@@ -0,0 +1,240 @@
+"""
+Query normalization: one canonical form of a query for every cache and index.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+"What is the price of SmartWatch Pro X?", "what's the price of the smart
+watch pro x" and "price of smartwach pro x??" ask the same thing, but every
+cache and lookup sees three different strings - and misses twice.
+canonicalize() and normalize() map all of them to the same text:
+
+  1. Lower-case (and Unicode-normalize) the query
+  2. Replace synonyms with one spelling: "smart watch" → "smartwatch",
+     "rs 4,999" / "4999 rupees" → "₹4999", "e-mail" → "email", ...
+  3. Drop punctuation (except in numbers like "5.2") and extra spaces
+  4. Fuzzy-correct words that are close to a catalog name ("smartwach" →
+     "smartwatch", "eliet" → "elite"). The catalog VOCABULARY (words of all
+     product and policy names) is built by ingest.py and stored next to the
+     index (<database_path>/vocabulary.json); difflib finds the closest word
+
+The canonical form is only used as a KEY: the answer cache, request
+coalescing, the FAQ matcher and the embedding cache all use it, while the
+LLM still sees the query as the user wrote it.
+
+Metrics (measuring the hit-rate impact):
+    query_normalizations_total{change="none"|"canonicalized"|"corrected"}
+    normalization_hits_total{layer="answer_cache"|"faq"}: hits on a query
+        whose canonical form differs from its old key (lower-cased text),
+        each also logged as "Normalization hit"
+"""
+
+import difflib
+import json
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import TypedDict
+
+from config import settings
+from faq import parse_records
+from logging_config import get_logger
+from metrics import Counter
+
+
+logger = get_logger("normalize")
+
+VOCABULARY_FILE = "vocabulary.json"
+
+query_normalizations_total = Counter("query_normalizations_total", "Normalized queries by what changed", ["change"])
+normalization_hits_total = Counter("normalization_hits_total",
+                                   "Cache / FAQ hits on queries changed by normalization", ["layer"])
+
+# One spelling for words customers write in several ways (applied to the lower-cased query, in order)
+SYNONYMS = [
+    (re.compile(r"\bsmart[\s-]*watch(?:es)?\b"), "smartwatch"),
+    (re.compile(r"\bear[\s-]*buds?\b"), "earbuds"),
+    (re.compile(r"\bpower[\s-]*banks?\b"), "power bank"),
+    (re.compile(r"\be[\s-]?mail\b"), "email"),
+    (re.compile(r"\bcustomer care\b"), "customer service"),
+    (re.compile(r"\b(?:rs\.?|inr|rupees?)\s*(?=\d)"), "₹"),
+    (re.compile(r"(\d[\d,.]*)\s*(?:rs\b\.?|inr\b|rupees?\b|/-)"), r"₹\1"),
+    (re.compile(r"₹\s+"), "₹"),
+]
+
+# "15,999" → "15999"
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+
+# Punctuation, except "." and "," inside numbers ("5.2", "22.5w")
+_PUNCTUATION = re.compile(r"[^\w\s₹.,%]|(?<!\d)[.,]|[.,](?!\d)")
+
+
+class NormalizedQuery(TypedDict):
+    """
+    Result of normalize().
+
+    Attributes:
+        canonical (str): The canonical form used as cache / index key
+        corrections (list[str]): Fuzzy corrections made, e.g. ["smartwach→smartwatch"]
+    """
+    canonical: str
+    corrections: list[str]
+
+
+# ============================================================================
+# INGEST TIME: the catalog vocabulary
+# ============================================================================
+
+def canonicalize(query: str) -> str:
+    """Lower-case a query, unify synonyms and drop punctuation (steps 1-3, no vocabulary needed)."""
+    text = unicodedata.normalize("NFKC", query).lower()
+    for pattern, replacement in SYNONYMS:
+        text = pattern.sub(replacement, text)
+    text = _THOUSANDS.sub("", text)
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+def build_vocabulary(text: str) -> list[str]:
+    """Canonical words of every product and policy name in the product file."""
+    words = {word for record in parse_records(text) for word in canonicalize(record["name"]).split()}
+    return sorted(words)
+
+
+def vocabulary_path() -> str:
+    return os.path.join(settings.database_path, VOCABULARY_FILE)
+
+
+def refresh_vocabulary(text: str) -> list[str]:
+    """Rebuild the stored vocabulary after an ingest (atomic file replace); called by ingest.py."""
+    vocabulary = build_vocabulary(text)
+    os.makedirs(settings.database_path, exist_ok=True)
+    temporary = f"{vocabulary_path()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({"words": vocabulary}, file, ensure_ascii=False)
+    os.replace(temporary, vocabulary_path())
+    logger.info("Catalog vocabulary written: %d words", len(vocabulary))
+    return vocabulary
+
+
+def read_vocabulary() -> list[str]:
+    """The stored vocabulary (empty if ingest has not written one yet)."""
+    try:
+        with open(vocabulary_path(), "r", encoding="utf-8") as file:
+            return json.load(file)["words"]
+    except FileNotFoundError:
+        return []
+
+
+_vocabulary_state = {"version": None, "words": ()}
+_vocabulary_lock = threading.Lock()
+
+
+def get_vocabulary(version: str) -> tuple[str, ...]:
+    """The vocabulary of an index version (reloaded when ingest publishes a new one)."""
+    with _vocabulary_lock:
+        if _vocabulary_state["version"] != version:
+            _vocabulary_state["words"] = tuple(read_vocabulary())
+            _vocabulary_state["version"] = version
+        return _vocabulary_state["words"]
+
+
+# ============================================================================
+# QUERY TIME: the canonical form
+# ============================================================================
+
+# Words this long may have more than one typo corrected
+LONG_WORD = 8
+
+
+def _one_typo(word: str, known: str) -> bool:
+    """True if `word` is `known` with one letter added, dropped, changed or two neighbours swapped."""
+    if abs(len(word) - len(known)) > 1:
+        return False
+    start = 0
+    while start < min(len(word), len(known)) and word[start] == known[start]:
+        start += 1
+    rest, known_rest = word[start:], known[start:]
+    return (rest[1:] == known_rest[1:] or rest[1:] == known_rest or rest == known_rest[1:]
+            or (len(rest) >= 2 and rest[1] + rest[0] + rest[2:] == known_rest))
+
+
+def correct_words(text: str, vocabulary: tuple[str, ...]) -> tuple[str, list[str]]:
+    """
+    Replace misspelled catalog words by their closest vocabulary word.
+
+    Only alphabetic words of at least settings.normalization_min_word_length
+    letters are corrected, and only when difflib finds a vocabulary word at
+    least settings.normalization_fuzzy_cutoff similar that starts with the
+    same letter (so "tower" does not become "power"). Words shorter than
+    LONG_WORD letters may differ by one typo only ("sport" is not "support").
+    Vocabulary words and their inflections ("returns", "returned") are left
+    as they are.
+
+    Args:
+        text (str): Canonicalized query
+        vocabulary (tuple[str, ...]): Catalog words (see build_vocabulary)
+
+    Returns:
+        tuple: (corrected text, ["misspelled→correct", ...])
+    """
+    words, corrections = [], []
+    for word in text.split():
+        if (len(word) >= settings.normalization_min_word_length and word.isalpha()
+                and not any(word.startswith(known) for known in vocabulary)):
+            candidates = [known for known in vocabulary if known[0] == word[0]]
+            match = difflib.get_close_matches(word, candidates, n=1, cutoff=settings.normalization_fuzzy_cutoff)
+            if match and (len(word) >= LONG_WORD or _one_typo(word, match[0])):
+                corrections.append(f"{word}→{match[0]}")
+                word = match[0]
+        words.append(word)
+    return " ".join(words), corrections
+
+
+@lru_cache(maxsize=4096)
+def _normalize(query: str, version: str) -> tuple[str, tuple[str, ...]]:
+    text = canonicalize(query)
+    text, corrections = correct_words(text, get_vocabulary(version))
+    return text, tuple(corrections)
+
+
+def normalize(query: str, version: str) -> NormalizedQuery:
+    """
+    Canonical form of a query (cached per query and index version).
+
+    Args:
+        query (str): The user's question
+        version (str): Index version being served (rag_chain.current_index_version())
+
+    Returns:
+        NormalizedQuery: The canonical form and the corrections made
+    """
+    if not settings.normalization_enabled:
+        return {"canonical": surface_form(query), "corrections": []}
+    canonical, corrections = _normalize(query, version)
+    return {"canonical": canonical, "corrections": list(corrections)}
+
+
+def surface_form(query: str) -> str:
+    """The query only lower-cased with whitespace collapsed (the key used before normalization)."""
+    return " ".join(query.lower().split())
+
+
+def count_normalization(query: str, normalized: NormalizedQuery) -> str:
+    """Count what normalization changed in a query; returns the change label."""
+    if normalized["corrections"]:
+        change = "corrected"
+    elif normalized["canonical"] != surface_form(query):
+        change = "canonicalized"
+    else:
+        change = "none"
+    query_normalizations_total.inc(change=change)
+    return change
+
+
+def record_hit(layer: str, query: str, canonical: str) -> None:
+    """Count and log a hit of `layer` on a query whose key normalization changed (no-op otherwise)."""
+    if canonical == surface_form(query):
+        return
+    normalization_hits_total.inc(layer=layer)
+    logger.info("Normalization hit (%s): %r → %r", layer, query, canonical)
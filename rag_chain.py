@@ -7,103 +7,629 @@ This script demonstrates:
 3. Building a RAG chain
 4. Using a custom prompt template
 5. Answering queries using retrieved context
+6. Compressing retrieved chunks down to the lines relevant to the query
+7. Reranking a wide candidate set locally so the LLM sees fewer, better chunks
+8. Answering many queries at once with batched embedding, search and generation
+9. Bounding every Gemini call by the request deadline (see deadline.py)
+10. Sharing embedding API calls between concurrent requests (micro-batching)
+11. Protecting Gemini calls with circuit breakers, hedging and a retry budget
 """
 
+import os
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Optional, TypedDict
+
+from chromadb.api.client import SharedSystemClient
+
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+
+from batching import MicroBatcher
+from cache import make_cache
+from compression import compress_documents
+from config import settings
+from deadline import call_with_deadline
+from context_packer import PackedContext, context_tokens_total, estimate_tokens, pack_context
+from metrics import Counter, Histogram, errors_total, format_summary
+from reranking import rerank
+from resilience import resilient_call
+from logging_config import get_logger, setup_logging
+from tracing import set_attribute, span
+
+
+logger = get_logger("rag_chain")
+
+
+# Custom prompt template shared by single and batched answering
+PROMPT_TEMPLATE = """Answer ONLY using the provided context. If the answer is not in the context, say "I don't have this information."
+
+Context:
+{context}
+
+Question: {question}
+
+Answer:"""
+
+# Reply used when the retrieved context is not relevant enough to answer
+NO_INFORMATION_REPLY = "I don't have this information."
+
+# Query embeddings are deterministic, so repeated questions never need a second API call
+# (shared by all workers when settings.cache_backend = "sqlite")
+_embedding_cache = make_cache("query_embedding", maxsize=settings.embedding_cache_size)
+
+embedding_seconds = Histogram("rag_embedding_seconds", "Query embedding API call duration")
+vector_search_seconds = Histogram("rag_vector_search_seconds", "Chromadb similarity search duration")
+llm_call_seconds = Histogram("llm_call_seconds", "Gemini LLM call duration", ["purpose"])
+
+context_chars_total = Counter(
+    "rag_context_chars_total",
+    "Retrieved context characters before and after query-aware compression",
+    ["stage"]
+)
+
+relevance_gate_total = Counter(
+    "rag_relevance_gate_total",
+    "Relevance gate decisions (pass = LLM called, blocked = canned reply)",
+    ["outcome"]
+)
+
+
+# ============================================================================
+# SHARED COMPONENTS (built once per process)
+# ============================================================================
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> GoogleGenerativeAIEmbeddings:
+    """Return the Gemini embedding model."""
+    return GoogleGenerativeAIEmbeddings(model=settings.embedding_model)
+
+
+def embed_batch(queries: list[str]) -> list[list[float]]:
+    """Embed queries with ONE embedding API call (no caching; hedged when slow)."""
+    with embedding_seconds.time():
+        return resilient_call("gemini:embedding", get_embeddings().embed_documents, queries,
+                              task_type="RETRIEVAL_QUERY", hedge=True)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> MicroBatcher:
+    """
+    Return the micro-batcher shared by all in-flight requests for query embeddings.
+
+    Queries embedded within settings.embedding_batch_window_ms of each other
+    (up to settings.embedding_batch_max) are sent in one embed_batch() call.
+    """
+    return MicroBatcher(
+        "embedding",
+        embed_batch,
+        window=settings.embedding_batch_window_ms / 1000,
+        max_batch=settings.embedding_batch_max,
+        max_concurrency=settings.embedding_batch_concurrency
+    )
+
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> Chroma:
+    """Load the existing Chromadb vector store."""
+    return Chroma(
+        persist_directory=settings.database_path,
+        embedding_function=get_embeddings(),
+        collection_name=settings.collection_name
+    )
+
+
+# ============================================================================
+# INDEX VERSION (coordinates re-ingestion across worker processes)
+# ============================================================================
+# ingest.py writes a new random version to <database_path>/index_version after
+# the index is complete. Every worker checks that file at most once per
+# settings.index_check_interval seconds and reopens Chromadb when it changed.
+# Cache keys that depend on the index (e.g. answers) include the version, so
+# no worker serves an answer computed from an older index.
+
+INDEX_VERSION_FILE = "index_version"
+
+_index_state = {"version": None, "checked_at": 0.0}
+_index_lock = threading.Lock()
+
+
+def write_index_version() -> str:
+    """Publish a new index version (atomic file replace); returns the version."""
+    version = uuid.uuid4().hex[:12]
+    path = os.path.join(settings.database_path, INDEX_VERSION_FILE)
+    os.makedirs(settings.database_path, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        file.write(version)
+    os.replace(path + ".tmp", path)
+    return version
+
+
+def read_index_version() -> str:
+    """Version written by the last ingest ("0" for an index built before versioning)."""
+    try:
+        with open(os.path.join(settings.database_path, INDEX_VERSION_FILE), "r", encoding="utf-8") as file:
+            return file.read().strip() or "0"
+    except FileNotFoundError:
+        return "0"
+
+
+def current_index_version() -> str:
+    """
+    Version of the index this process serves.
+
+    Re-reads the version file at most every settings.index_check_interval
+    seconds; when it changed, Chromadb is reopened so the new index is used.
+    """
+    with _index_lock:
+        now = time.monotonic()
+        if _index_state["version"] is not None and now - _index_state["checked_at"] < settings.index_check_interval:
+            return _index_state["version"]
+
+        version = read_index_version()
+        if _index_state["version"] is not None and version != _index_state["version"]:
+            logger.info("Index version changed %s → %s, reopening Chromadb", _index_state["version"], version)
+            reload_index()
+        _index_state.update(version=version, checked_at=now)
+        return version
+
+
+def reload_index() -> None:
+    """Drop this process' Chromadb client so the next query opens the index files again."""
+    # In-flight queries keep their old client; it is released once they finish
+    SharedSystemClient.clear_system_cache()
+    get_vector_store.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_llm(model: Optional[str] = None) -> ChatGoogleGenerativeAI:
+    """Return the Gemini LLM used to generate answers (default model: settings.llm_model)."""
+    # Retries are made by resilience.resilient_call, within the global retry budget
+    return ChatGoogleGenerativeAI(model=model or settings.llm_model, temperature=settings.llm_temperature,
+                                  timeout=settings.llm_timeout, max_retries=0)
+
+
+def get_answer_chain(model: Optional[str] = None):
+    """
+    Build the generation part of the RAG chain: prompt → LLM → string.
+
+    The chain takes {"context": str, "question": str} as input. Its runs are
+    tagged "model:<name>", so streamed tokens can be told apart by model.
+
+    Args:
+        model (str): Gemini model to use (default: settings.llm_model)
+    """
+    model = model or settings.llm_model
+    prompt = PromptTemplate(
+        template=PROMPT_TEMPLATE,
+        input_variables=["context", "question"]
+    )
+    return (prompt | get_llm(model) | StrOutputParser()).with_config(tags=[f"model:{model}"])
+
+
+def build_context(query: str, docs_and_scores: list[tuple[Document, float]]) -> PackedContext:
+    """
+    Turn retrieved chunks into the prompt context.
+
+    Steps:
+    1. Compress each chunk to the lines relevant to the query (if enabled)
+    2. Merge overlapping neighbour chunks and drop repeated lines
+    3. Pack the result by relevance up to settings.context_max_tokens
+
+    Args:
+        query (str): The user's question
+        docs_and_scores (list[tuple[Document, float]]): Retrieved chunks with relevance
+
+    Returns:
+        PackedContext: Context text plus token and compression accounting
+    """
+    ratio = 1.0
+    if settings.compression_enabled:
+        docs_and_scores, stats = compress_documents(
+            query,
+            docs_and_scores,
+            max_lines=settings.compression_max_lines,
+            min_field_lines=settings.compression_min_field_lines
+        )
+        ratio = stats["ratio"]
+        context_chars_total.inc(stats["chars_before"], stage="retrieved")
+        context_chars_total.inc(stats["chars_after"], stage="compressed")
+
+    context = pack_context(
+        docs_and_scores,
+        max_tokens=settings.context_max_tokens,
+        min_overlap=settings.context_min_overlap
+    )
+    context["compression_ratio"] = ratio
+    return context
+
+
+# ============================================================================
+# RETRIEVAL
+# ============================================================================
+
+def embed_queries(queries: list[str], deadline: Optional[float] = None) -> list[list[float]]:
+    """
+    Embed several queries with a single embedding API call.
+
+    Queries that were embedded before are served from the in-memory cache,
+    and duplicates inside `queries` are only sent once. The remaining queries
+    go through the embedding micro-batcher, so concurrent requests share
+    their API calls too.
+
+    Args:
+        queries (list[str]): The questions to embed
+        deadline (float | None): Request deadline; the API call gets at most the
+            time left (and never more than settings.embedding_timeout)
+
+    Returns:
+        list[list[float]]: One embedding vector per query, in input order
+    """
+    with span("embed", queries=len(queries)):
+        cached = _embedding_cache.get_many(queries)
+        missing = list(dict.fromkeys(q for q in queries if q not in cached))
+        set_attribute("cache_hits", len(queries) - len(missing))
+        logger.debug("Embedding %d queries (%d cached)", len(queries), len(queries) - len(missing))
+
+        if missing:
+            futures = [get_embedding_batcher().submit(query) for query in missing]
+            vectors = call_with_deadline("embed", deadline, lambda: [future.result() for future in futures],
+                                         timeout=settings.embedding_timeout)
+            for query, vector in zip(missing, vectors):
+                _embedding_cache.set(query, vector)
+                cached[query] = vector
+
+        return [cached[q] for q in queries]
+
+
+def search_by_vectors(vectors: list[list[float]], k: Optional[int] = None) -> list[list[tuple[Document, float]]]:
+    """
+    Run one batched similarity search in Chromadb for several query vectors.
+
+    Args:
+        vectors (list[list[float]]): Query embeddings
+        k (int): Number of chunks to return per query (default: settings.retriever_k)
+
+    Returns:
+        list[list[tuple[Document, float]]]: For each vector, the top-k chunks
+            paired with a relevance score (higher = more similar)
+    """
+    if not vectors:
+        return []
+
+    k = k or settings.retriever_k
+    vector_store = get_vector_store()
+    relevance_fn = vector_store._select_relevance_score_fn()
+
+    with span("vector_search", k=k, queries=len(vectors)), vector_search_seconds.time():
+        results = vector_store._collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+
+    batches = []
+    for texts, metadatas, distances in zip(results["documents"], results["metadatas"], results["distances"]):
+        batches.append([
+            (Document(page_content=text, metadata=metadata or {}), relevance_fn(distance))
+            for text, metadata, distance in zip(texts, metadatas, distances)
+        ])
+    return batches
+
+
+# ============================================================================
+# ANSWERING
+# ============================================================================
+
+def candidate_count() -> int:
+    """Number of chunks fetched from Chromadb before reranking."""
+    if settings.reranker == "none":
+        return settings.retriever_k
+    return max(settings.retriever_candidates, settings.rerank_top_n)
+
+
+def select_chunks(query: str, candidates: list[tuple[Document, float]]) -> list[tuple[Document, float]]:
+    """
+    Pick the chunks that will be sent to the LLM from the vector-search candidates.
+
+    Uses the reranker named by settings.reranker (timed per query in the
+    rag_rerank_seconds metric). With reranker "none" the top retriever_k
+    candidates are kept in vector-search order.
+    """
+    if settings.reranker == "none":
+        return candidates[:settings.retriever_k]
+    with span("rerank", reranker=settings.reranker, candidates=len(candidates), kept=settings.rerank_top_n):
+        return rerank(query, candidates, settings.rerank_top_n, reranker=settings.reranker)
+
+
+def retrieve(query: str, deadline: Optional[float] = None) -> list[tuple[Document, float]]:
+    """
+    Retrieve the chunks for a query together with their relevance scores.
+
+    Steps:
+    1. Embed the query (cached)
+    2. Fetch a wide candidate set from Chromadb (settings.retriever_candidates)
+    3. Rerank locally and keep the best settings.rerank_top_n chunks
+
+    Args:
+        query (str): The question to search for
+        deadline (float | None): Request deadline (see embed_queries)
+
+    Returns:
+        list[tuple[Document, float]]: Chunks with relevance (higher = more similar)
+
+    Raises:
+        DeadlineExceeded: If the embedding call runs out of time
+    """
+    vector = embed_queries([query], deadline)[0]
+    candidates = search_by_vectors([vector], k=candidate_count())[0]
+    return select_chunks(query, candidates)
+
+
+def retrieve_many(queries: list[str], deadline: Optional[float] = None) -> list[list[tuple[Document, float]]]:
+    """
+    retrieve() for several queries, sharing the expensive steps.
+
+    All queries are embedded in ONE API call and searched in ONE batched
+    Chromadb lookup; only the (local) reranking runs per query.
+
+    Args:
+        queries (list[str]): The questions to search for
+        deadline (float | None): Request deadline (see embed_queries)
+
+    Returns:
+        list[list[tuple[Document, float]]]: Chunks with relevance for each query, in input order
+    """
+    vectors = embed_queries(queries, deadline)
+    candidates = search_by_vectors(vectors, k=candidate_count())
+    return [select_chunks(query, docs) for query, docs in zip(queries, candidates)]
+
+
+def passes_relevance_gate(docs_and_scores: list[tuple[Document, float]]) -> bool:
+    """
+    Decide whether the retrieved context is relevant enough to call the LLM.
+
+    If the BEST chunk scores below settings.relevance_threshold, the answer is
+    not in our catalog and an LLM call would only produce "I don't have this
+    information." Every decision is counted in the relevance_gate_total metric.
+
+    Args:
+        docs_and_scores (list[tuple[Document, float]]): Output of retrieve()
+
+    Returns:
+        bool: True if generation should go ahead
+    """
+    best_score = max((score for _, score in docs_and_scores), default=0.0)
+    passed = best_score >= settings.relevance_threshold
+    relevance_gate_total.inc(outcome="pass" if passed else "blocked")
+    logger.debug("Relevance gate %s (best score %.3f, threshold %s)",
+                 "passed" if passed else "blocked", best_score, settings.relevance_threshold)
+    return passed
+
+
+def generate_answer(query: str, context: str, deadline: Optional[float] = None,
+                    model: Optional[str] = None) -> str:
+    """
+    Generate an answer from an already packed context (one LLM call).
+
+    Args:
+        query (str): The question to answer
+        context (str): Context text, usually build_context(...)["text"]
+        deadline (float | None): Request deadline; the LLM call gets at most the
+            time left (and never more than settings.answer_timeout)
+        model (str | None): Gemini model to use (default: settings.llm_model)
+
+    Returns:
+        str: The answer based on the context
+
+    Raises:
+        DeadlineExceeded: If the LLM does not answer in time
+        CircuitOpen: If the model's circuit breaker is open
+    """
+    model = model or settings.llm_model
+    with span("llm_generate", model=model, prompt_tokens=estimate_tokens(context + query)), \
+            llm_call_seconds.time(purpose="answer"):
+        # Not hedged: the answer is streamed to the user and costs real tokens
+        return call_with_deadline("answer", deadline, lambda: resilient_call(
+            f"gemini:{model}", get_answer_chain(model).invoke, {"context": context, "question": query},
+            deadline=deadline), timeout=settings.answer_timeout)
+
+
+class RAGResult(TypedDict):
+    """
+    Detailed result of run_rag().
+
+    Attributes:
+        answer (str): The final answer
+        scores (list[float]): Relevance score of each retrieved chunk
+        gated (bool): True if the relevance gate skipped the LLM call
+    """
+    answer: str
+    scores: list[float]
+    gated: bool
+
+
+def run_rag(query: str) -> RAGResult:
+    """
+    Answer a query and expose the retrieval scores behind the answer.
+
+    Steps:
+    1. Embed the query (cached), retrieve candidates and rerank them
+    2. Apply the relevance gate; below threshold return the canned reply
+    3. Otherwise pack the context and generate the answer with Gemini
+
+    Args:
+        query (str): The question to answer
+
+    Returns:
+        RAGResult: The answer, chunk scores and whether the gate fired
+    """
+    docs_and_scores = retrieve(query)
+    scores = [score for _, score in docs_and_scores]
+
+    if not passes_relevance_gate(docs_and_scores):
+        return {"answer": NO_INFORMATION_REPLY, "scores": scores, "gated": True}
+
+    answer = generate_answer(query, build_context(query, docs_and_scores)["text"])
+    return {"answer": answer, "scores": scores, "gated": False}
 
 
 def answer_query(query: str) -> str:
     """
     Answer a query using the RAG chain.
-    
+
     Steps:
-    1. Load the Chromadb vector store
-    2. Create a retriever
-    3. Build a RAG chain with custom prompt
-    4. Execute the chain and return the answer
-    
+    1. Embed the query (cached)
+    2. Retrieve candidates from Chromadb and rerank them locally
+    3. Skip the LLM if no chunk is relevant enough (relevance gate)
+    4. Fill the custom prompt with the packed (deduplicated) context
+    5. Execute the chain and return the answer
+
     Args:
         query (str): The question to answer
-        
+
     Returns:
         str: The answer based on retrieved context
     """
-    
-    # Step 1: Load the existing Chromadb vector store
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-    vector_store = Chroma(
-        persist_directory="./chroma_db",
-        embedding_function=embeddings,
-        collection_name="product_embeddings"
-    )
-    
-    # Step 2: Create a retriever from the vector store
-    # k=3 means retrieve top 3 relevant chunks
-    retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-    
-    # Step 3: Define the custom prompt template
-    prompt_template = """Answer ONLY using the provided context. If the answer is not in the context, say "I don't have this information."
+    return run_rag(query)["answer"]
 
-Context:
-{context}
 
-Question: {question}
+class BatchAnswer(TypedDict):
+    """
+    One result of answer_queries().
+
+    Attributes:
+        query (str): The original question
+        answer (str | None): The generated answer (None if this item failed)
+        error (str | None): Error message for this item (None on success)
+    """
+    query: str
+    answer: Optional[str]
+    error: Optional[str]
 
-Answer:"""
-    
-    prompt = PromptTemplate(
-        template=prompt_template,
-        input_variables=["context", "question"]
-    )
-    
-    # Step 4: Initialize the LLM (Gemini)
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0)
-    
-    # Step 5: Build the RAG chain using LCEL (LangChain Expression Language)
-    # This is the modern way to build chains
-    def format_docs(docs):
-        return "\n\n".join(doc.page_content for doc in docs)
-    
-    rag_chain = (
-        {"context": retriever | format_docs, "question": RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
-    
-    # Execute the chain and return the answer
-    answer = rag_chain.invoke(query)
-    
-    return answer
+
+def answer_queries(queries: list[str], max_concurrency: Optional[int] = None) -> list[BatchAnswer]:
+    """
+    Answer many queries at once.
+
+    Compared to calling answer_query() in a loop:
+    1. All query embeddings are computed in ONE batch call
+    2. Vector search runs as ONE batched Chromadb lookup (then local reranking)
+    3. Queries failing the relevance gate get the canned reply without an LLM call
+    4. LLM generations run in parallel, at most `max_concurrency` at a time
+
+    A failure for one query never affects the others; it is reported in that
+    item's "error" field instead (also when the answer model's circuit
+    breaker is open: every LLM call goes through resilient_call on its own).
+
+    Args:
+        queries (list[str]): The questions to answer
+        max_concurrency (int): Maximum parallel LLM calls
+            (default: settings.batch_max_concurrency)
+
+    Returns:
+        list[BatchAnswer]: One result per query, in input order
+    """
+    results: list[BatchAnswer] = [{"query": q, "answer": None, "error": None} for q in queries]
+
+    valid = [i for i, q in enumerate(queries) if q and q.strip()]
+    for i in set(range(len(queries))) - set(valid):
+        results[i]["error"] = "Query cannot be empty"
+    if not valid:
+        return results
+
+    # Step 1 & 2: batched embedding + batched vector search
+    try:
+        hits = retrieve_many([queries[i] for i in valid])
+    except Exception as e:
+        logger.exception("Batched retrieval failed for %d queries", len(valid))
+        errors_total.inc(component="retriever")
+        for i in valid:
+            results[i]["error"] = f"Retrieval failed: {e}"
+        return results
+
+    # Step 3: skip generation for queries whose context is not relevant enough
+    to_generate = []
+    for i, docs in zip(valid, hits):
+        if passes_relevance_gate(docs):
+            to_generate.append((i, docs))
+        else:
+            results[i]["answer"] = NO_INFORMATION_REPLY
+
+    # Step 4: generate answers with bounded concurrency
+    inputs = [
+        {"context": build_context(queries[i], docs)["text"], "question": queries[i]}
+        for i, docs in to_generate
+    ]
+    chain = get_answer_chain()
+
+    def answer_one(item: dict) -> str:
+        # Each item goes through the breaker (and its timing metrics) on its own: a long
+        # but healthy batch is not one slow call, and an open breaker fails only its items
+        with llm_call_seconds.time(purpose="answer"):
+            return resilient_call(f"gemini:{settings.llm_model}", chain.invoke, item)
+
+    answers = RunnableLambda(answer_one).batch(
+        inputs,
+        config={"max_concurrency": max_concurrency or settings.batch_max_concurrency},
+        return_exceptions=True
+    ) if inputs else []
+
+    for (i, _), answer in zip(to_generate, answers):
+        if isinstance(answer, Exception):
+            logger.error("Answer generation failed: %s", answer, extra={"query": queries[i]})
+            errors_total.inc(component="rag_responder")
+            results[i]["error"] = str(answer)
+        else:
+            results[i]["answer"] = answer
+
+    return results
 
 
 def main():
     """Test the RAG chain with sample queries."""
-    
+
+    setup_logging(log_format="text")
+
     print("=" * 60)
     print("🤖 RAG Chain Question Answering")
     print("=" * 60)
-    
+
     # Sample queries
     queries = [
         "What is the price of SmartWatch Pro X?",
         "What is the return policy?",
         "How many hours of battery does Wireless Earbuds Elite have?"
     ]
-    
-    for query in queries:
-        print(f"\n❓ Query: {query}")
-        try:
-            answer = answer_query(query)
-            print(f"✓ Answer: {answer}")
-        except Exception as e:
-            print(f"❌ Error: {e}")
-    
+
+    # Answer all sample queries in one batch
+    for result in answer_queries(queries):
+        print(f"\n❓ Query: {result['query']}")
+        if result["error"]:
+            print(f"❌ Error: {result['error']}")
+        else:
+            print(f"✓ Answer: {result['answer']}")
+
+    blocked = relevance_gate_total.value(outcome="blocked")
+    print(f"\n🚧 Relevance gate skipped {blocked:.0f} LLM call(s)")
+    retrieved_chars = context_chars_total.value(stage="retrieved")
+    if retrieved_chars:
+        ratio = context_chars_total.value(stage="compressed") / retrieved_chars
+        print(f"🗜️  Compression kept {ratio:.0%} of retrieved context")
+    naive = context_tokens_total.value(stage="naive")
+    packed = context_tokens_total.value(stage="packed")
+    print(f"✂️  Context packing saved ~{naive - packed:.0f} prompt tokens ({naive:.0f} → {packed:.0f})")
+
+    print("\n📊 Metrics:")
+    print(format_summary())
+
     print("\n" + "=" * 60)
     print("✅ Done!")
     print("=" * 60)
@@ -0,0 +1,154 @@
+"""
+Cheap local reranking of retrieved chunks.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Vector search is fast but fuzzy: the chunk Gemini really needs is often ranked
+4th or 7th. Instead of sending a fixed top-3 to the LLM we:
+  1. Retrieve a WIDER candidate set from Chromadb (e.g. top-20)
+  2. Re-score the candidates locally (no API calls, microseconds per query)
+  3. Send only the best 1-2 chunks to the LLM
+
+Available rerankers (choose with the RERANKER setting):
+  - "none":    keep the vector-search order
+  - "lexical": blend vector relevance with query word overlap, with a bonus
+               when a chunk's "Product:" header matches the query (field match)
+  - "mmr":     lexical scores + Maximal Marginal Relevance, so the chosen chunks
+               don't repeat each other
+
+Rerankers only choose and order chunks; the score kept next to each chunk is
+still the vector relevance, so the relevance gate keeps its meaning.
+
+Adding your own reranker:
+    def my_reranker(query, docs_and_scores, top_n):
+        return docs_and_scores[:top_n]
+
+    register_reranker("mine", my_reranker)
+"""
+
+import math
+from typing import Callable
+
+from langchain_core.documents import Document
+
+from compression import HEADER_PREFIXES, tokenize
+from metrics import Histogram
+
+
+DocsAndScores = list[tuple[Document, float]]
+Reranker = Callable[[str, DocsAndScores, int], DocsAndScores]
+
+rerank_seconds = Histogram(
+    "rag_rerank_seconds",
+    "Time spent reranking retrieved candidates per query",
+    ["reranker"]
+)
+
+
+def _headers(text: str) -> str:
+    return " ".join(line for line in text.splitlines() if line.strip().startswith(HEADER_PREFIXES))
+
+
+def lexical_scores(query: str, docs_and_scores: DocsAndScores, vector_weight: float = 0.5) -> list[float]:
+    """
+    Score each candidate by vector relevance blended with IDF-weighted word overlap.
+
+    Args:
+        query (str): The user's question
+        docs_and_scores (DocsAndScores): Candidates with vector relevance
+        vector_weight (float): Share of the final score coming from vector relevance
+
+    Returns:
+        list[float]: One score per candidate (higher = better)
+    """
+    query_words = tokenize(query)
+    doc_words = [tokenize(doc.page_content) for doc, _ in docs_and_scores]
+    header_words = [tokenize(_headers(doc.page_content)) for doc, _ in docs_and_scores]
+
+    document_frequency: dict[str, int] = {}
+    for words in doc_words:
+        for word in words:
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+    idf = {word: math.log(1 + len(doc_words) / df) for word, df in document_frequency.items()}
+
+    lexical = [
+        sum(idf.get(w, 0.0) for w in words & query_words) + sum(idf.get(w, 0.0) for w in headers & query_words)
+        for words, headers in zip(doc_words, header_words)
+    ]
+    top = max(lexical, default=0.0) or 1.0
+
+    return [
+        vector_weight * relevance + (1 - vector_weight) * (score / top)
+        for (_, relevance), score in zip(docs_and_scores, lexical)
+    ]
+
+
+def no_rerank(query: str, docs_and_scores: DocsAndScores, top_n: int) -> DocsAndScores:
+    """Keep the vector-search order."""
+    return docs_and_scores[:top_n]
+
+
+def lexical_rerank(query: str, docs_and_scores: DocsAndScores, top_n: int) -> DocsAndScores:
+    """Order candidates by lexical_scores() and keep the best `top_n`."""
+    scores = lexical_scores(query, docs_and_scores)
+    order = sorted(range(len(docs_and_scores)), key=lambda i: scores[i], reverse=True)
+    return [docs_and_scores[i] for i in order[:top_n]]
+
+
+def mmr_rerank(query: str, docs_and_scores: DocsAndScores, top_n: int, diversity: float = 0.3) -> DocsAndScores:
+    """
+    Maximal Marginal Relevance over lexical scores.
+
+    Each pick maximises: (1 - diversity) * relevance - diversity * similarity to
+    chunks already picked (word-set Jaccard similarity).
+    """
+    scores = lexical_scores(query, docs_and_scores)
+    words = [tokenize(doc.page_content) for doc, _ in docs_and_scores]
+
+    def similarity(i: int, j: int) -> float:
+        union = words[i] | words[j]
+        return len(words[i] & words[j]) / len(union) if union else 0.0
+
+    selected: list[int] = []
+    remaining = list(range(len(docs_and_scores)))
+    while remaining and len(selected) < top_n:
+        best = max(
+            remaining,
+            key=lambda i: (1 - diversity) * scores[i] - diversity * max((similarity(i, j) for j in selected), default=0.0)
+        )
+        selected.append(best)
+        remaining.remove(best)
+
+    return [docs_and_scores[i] for i in selected]
+
+
+RERANKERS: dict[str, Reranker] = {
+    "none": no_rerank,
+    "lexical": lexical_rerank,
+    "mmr": mmr_rerank,
+}
+
+
+def register_reranker(name: str, reranker: Reranker) -> None:
+    """Make a custom reranker selectable through the RERANKER setting."""
+    RERANKERS[name] = reranker
+
+
+def rerank(query: str, docs_and_scores: DocsAndScores, top_n: int, reranker: str = "lexical") -> DocsAndScores:
+    """
+    Rerank candidates with the named reranker and record how long it took.
+
+    Args:
+        query (str): The user's question
+        docs_and_scores (DocsAndScores): Candidates from vector search
+        top_n (int): Number of chunks to keep
+        reranker (str): Name of a registered reranker
+
+    Returns:
+        DocsAndScores: The best `top_n` candidates (vector relevance kept as score)
+    """
+    if reranker not in RERANKERS:
+        raise ValueError(f"Unknown reranker '{reranker}'. Available: {sorted(RERANKERS)}")
+
+    with rerank_seconds.time(reranker=reranker):
+        return RERANKERS[reranker](query, docs_and_scores, top_n)
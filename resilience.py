@@ -0,0 +1,338 @@
+"""
+Resilience layer for Gemini calls: circuit breaker, hedging, retry budget.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+When Gemini is slow or down, the naive behaviour is the worst one: every
+request waits for its own timeout, retries make the outage worse, and users
+finally get a 500. Every LLM and embedding call therefore goes through
+resilient_call(), which combines three classic techniques:
+
+  1. CIRCUIT BREAKER (one per dependency, e.g. "gemini:embedding")
+     CLOSED    → calls go through; consecutive failures (or very slow calls)
+                 are counted
+     OPEN      → after settings.breaker_failure_threshold failures, calls fail
+                 IMMEDIATELY with CircuitOpen for settings.breaker_recovery_time
+                 seconds - the graph answers with a fallback instead of waiting
+     HALF-OPEN → then ONE probe call is let through: success closes the
+                 breaker, failure opens it again
+
+  2. HEDGED REQUESTS (idempotent calls only: classification, query embedding)
+     If a call has not answered after the dependency's p95 latency, an
+     identical second call is started and whichever answers first wins. A few
+     percent extra calls cut the slow tail.
+
+  3. RETRY BUDGET (shared by all dependencies)
+     A failed call may be retried, but retries are limited to a fraction of
+     recent traffic (settings.retry_budget_ratio). During an outage the budget
+     runs dry, so retries cannot multiply the load on Gemini.
+
+Metrics: circuit_breaker_state, circuit_breaker_transitions_total,
+circuit_breaker_rejections_total, hedged_requests_total{outcome="launched"|"won"},
+upstream_retries_total, upstream_call_seconds.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Optional, TypeVar
+
+from langchain_core.embeddings import Embeddings
+
+from config import settings
+from deadline import remaining
+from logging_config import get_logger
+from metrics import Counter, Gauge, Histogram
+
+
+logger = get_logger("resilience")
+
+T = TypeVar("T")
+
+breaker_state = Gauge("circuit_breaker_state", "Circuit breaker state (0 = closed, 1 = half-open, 2 = open)",
+                      ["dependency"])
+breaker_transitions_total = Counter("circuit_breaker_transitions_total", "Circuit breaker state changes",
+                                    ["dependency", "state"])
+breaker_rejections_total = Counter("circuit_breaker_rejections_total", "Calls failed fast by an open breaker",
+                                   ["dependency"])
+hedges_total = Counter("hedged_requests_total", "Hedged duplicate calls (launched, and won = answered first)",
+                       ["dependency", "outcome"])
+retries_total = Counter("upstream_retries_total",
+                        "Retries of failed upstream calls (allowed, denied by budget, or no_time before the deadline)",
+                        ["dependency", "outcome"])
+upstream_call_seconds = Histogram("upstream_call_seconds", "Duration of successful upstream calls",
+                                  ["dependency"])
+
+# Threads for the original and the hedged copy of a call
+_hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of calling a dependency whose circuit breaker is open.
+
+    Attributes:
+        dependency (str): Name of the unavailable dependency
+        retry_after (float): Seconds until the breaker lets a probe call through
+    """
+
+    def __init__(self, dependency: str, retry_after: float):
+        self.dependency = dependency
+        self.retry_after = retry_after
+        super().__init__(f"{dependency} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker for one dependency.
+
+    Attributes:
+        name (str): Dependency name (metric label)
+        failure_threshold (int): Consecutive failures that open the breaker
+        recovery_time (float): Seconds the breaker stays open before a probe
+        state (str): "closed", "open" or "half_open"
+    """
+
+    STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_time: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.state = "closed"
+        self.failures = 0
+        self._changed_at = time.monotonic()
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        breaker_state.set(0, dependency=name)
+
+    def _transition(self, state: str) -> None:
+        logger.warning("Circuit breaker %s: %s → %s", self.name, self.state, state)
+        self.state = state
+        self._changed_at = time.monotonic()
+        breaker_state.set(self.STATE_VALUES[state], dependency=self.name)
+        breaker_transitions_total.inc(dependency=self.name, state=state)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen if the call must not be made now."""
+        with self._lock:
+            elapsed = time.monotonic() - self._changed_at
+            if self.state == "open":
+                if elapsed < self.recovery_time:
+                    breaker_rejections_total.inc(dependency=self.name)
+                    raise CircuitOpen(self.name, self.recovery_time - elapsed)
+                self._transition("half_open")
+                self._probe_in_flight = False
+                elapsed = 0.0
+
+            if self.state == "half_open":
+                # One probe at a time (a probe that never reports back is replaced after recovery_time)
+                if self._probe_in_flight and elapsed < self.recovery_time:
+                    breaker_rejections_total.inc(dependency=self.name)
+                    raise CircuitOpen(self.name, self.recovery_time - elapsed)
+                self._probe_in_flight = True
+                self._changed_at = time.monotonic()
+
+    def is_open(self) -> bool:
+        """True while calls would fail fast (open and not yet due for a probe); changes nothing."""
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self._changed_at < self.recovery_time
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            # Only a probe closes the breaker (late successes of older calls do not)
+            if self.state == "half_open":
+                self._transition("closed")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self._transition("open")
+
+
+class RetryBudget:
+    """
+    Limits retries to a fraction of recent calls (token bucket).
+
+    Every call deposits `ratio` tokens (up to `max_tokens`); a retry costs one
+    token. `min_per_second` tokens are added over time so a quiet service can
+    still retry occasionally.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, amount: float) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + amount + (now - self._updated_at) * self.min_per_second)
+        self._updated_at = now
+
+    def deposit(self) -> None:
+        """Record one call."""
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take one retry from the budget; False if it is spent."""
+        with self._lock:
+            self._refill(0.0)
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+# One budget for all dependencies: retries never amplify an outage
+retry_budget = RetryBudget(ratio=settings.retry_budget_ratio, min_per_second=settings.retry_budget_min_per_second)
+
+
+def get_breaker(dependency: str) -> CircuitBreaker:
+    """Return the circuit breaker of a dependency (created on first use)."""
+    with _breakers_lock:
+        if dependency not in _breakers:
+            _breakers[dependency] = CircuitBreaker(
+                dependency,
+                failure_threshold=settings.breaker_failure_threshold,
+                recovery_time=settings.breaker_recovery_time
+            )
+        return _breakers[dependency]
+
+
+def hedge_delay(dependency: str) -> float:
+    """
+    Seconds to wait before hedging a call: the dependency's p95 latency
+    (infinite - no hedging - until settings.hedge_min_samples calls were seen).
+    """
+    if upstream_call_seconds.count(dependency=dependency) < settings.hedge_min_samples:
+        return float("inf")
+    return max(settings.hedge_min_delay, upstream_call_seconds.quantile(settings.hedge_quantile, dependency=dependency))
+
+
+def expected_call_seconds(dependency: str) -> float:
+    """Typical (median) latency of a dependency (0 until settings.hedge_min_samples calls were seen)."""
+    if upstream_call_seconds.count(dependency=dependency) < settings.hedge_min_samples:
+        return 0.0
+    return upstream_call_seconds.quantile(0.5, dependency=dependency)
+
+
+def hedged_call(dependency: str, fn: Callable[..., T], *args, deadline: Optional[float] = None, **kwargs) -> T:
+    """
+    Call fn; if it has not returned after hedge_delay(), start an identical
+    second call and return whichever SUCCEEDS first. Only for idempotent calls.
+    No hedge is started when a typical call no longer fits before `deadline`.
+    """
+    delay = hedge_delay(dependency)
+    if delay == float("inf"):
+        return fn(*args, **kwargs)
+
+    first = _hedge_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    if wait([first], timeout=delay).done:
+        return first.result()
+    if remaining(deadline) < expected_call_seconds(dependency):
+        return first.result()
+
+    hedges_total.inc(dependency=dependency, outcome="launched")
+    second = _hedge_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    error = None
+    for future in as_completed([first, second]):
+        try:
+            result = future.result()
+        except Exception as e:
+            error = error or e
+            continue
+        if future is second:
+            hedges_total.inc(dependency=dependency, outcome="won")
+        return result
+    raise error
+
+
+def resilient_call(dependency: str, fn: Callable[..., T], *args, hedge: bool = False,
+                   deadline: Optional[float] = None, **kwargs) -> T:
+    """
+    Call an upstream dependency through its circuit breaker, with optional
+    hedging and budgeted retries.
+
+    With a deadline, a retry (or hedge) is only made if its backoff plus a
+    typical call still fits in the time left. Otherwise the error is raised
+    at once, so a call abandoned by call_with_deadline() stops instead of
+    calling Gemini again for a request that has already returned.
+
+    Args:
+        dependency (str): Breaker / metric name, e.g. "gemini:embedding"
+        fn (callable): The upstream call
+        hedge (bool): Hedge slow calls (only for idempotent calls that are
+            not streamed to the user)
+        deadline (float | None): Request deadline (time.monotonic() timestamp)
+
+    Returns:
+        The result of fn
+
+    Raises:
+        CircuitOpen: If the dependency's breaker is open (fail fast)
+        Exception: The call's own error once retries are exhausted or denied
+    """
+    breaker = get_breaker(dependency)
+    retry_budget.deposit()
+    attempt = 0
+
+    while True:
+        breaker.before_call()
+        start = time.perf_counter()
+        try:
+            if hedge and settings.hedge_enabled:
+                result = hedged_call(dependency, fn, *args, deadline=deadline, **kwargs)
+            else:
+                result = fn(*args, **kwargs)
+        except Exception as e:
+            breaker.record_failure()
+            if attempt >= settings.upstream_max_retries:
+                raise
+            backoff = settings.upstream_retry_backoff * (attempt + 1)
+            if remaining(deadline) < backoff + expected_call_seconds(dependency):
+                retries_total.inc(dependency=dependency, outcome="no_time")
+                raise
+            if not retry_budget.withdraw():
+                retries_total.inc(dependency=dependency, outcome="denied")
+                raise
+            attempt += 1
+            retries_total.inc(dependency=dependency, outcome="allowed")
+            logger.warning("%s call failed (%s), retry %d", dependency, e, attempt)
+            time.sleep(backoff)
+            continue
+
+        duration = time.perf_counter() - start
+        upstream_call_seconds.observe(duration, dependency=dependency)
+        # A call that is far too slow counts against the breaker even though it succeeded
+        if duration > settings.breaker_slow_call_seconds:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return result
+
+
+class ResilientEmbeddings(Embeddings):
+    """
+    Wrap a LangChain embedding model so every call goes through resilient_call()
+    (used by ingest.py, where Chromadb calls the embedding model itself).
+    """
+
+    def __init__(self, embeddings: Embeddings, dependency: str = "gemini:embedding"):
+        self.embeddings = embeddings
+        self.dependency = dependency
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return resilient_call(self.dependency, self.embeddings.embed_documents, texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return resilient_call(self.dependency, self.embeddings.embed_query, text, hedge=True)
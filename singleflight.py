@@ -0,0 +1,110 @@
+"""
+Single-flight request coalescing: identical queries in flight share ONE execution.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+The answer cache only helps AFTER the first answer is stored. During a
+promotion hundreds of users ask the same question within the same second, and
+before the first answer exists every one of them would start its own
+classifier call, embedding, Chromadb search and answer generation:
+
+    without single-flight:  100 identical requests → 100 × (classify + embed + search + answer)
+    with single-flight:     100 identical requests →   1 × (classify + embed + search + answer)
+
+The first request for a key becomes the LEADER and does the work. Requests for
+the same key that arrive while it is running become FOLLOWERS: they wait for
+the leader's result (or error) instead of calling Gemini themselves - but
+never longer than their own deadline allows (`timeout`).
+
+Coalescing is per worker process; with CACHE_BACKEND=sqlite the other
+workers pick up the leader's answer from the shared cache afterwards.
+
+Usage:
+    flight = SingleFlight("answer")
+    response, shared = flight.do(key, run_graph, query, timeout=remaining(deadline))
+"""
+
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Hashable, Optional, TypeVar
+
+from deadline import DeadlineExceeded, deadline_exceeded_total
+from metrics import Counter
+
+
+T = TypeVar("T")
+
+singleflight_calls_total = Counter(
+    "singleflight_calls_total",
+    "Coalesced calls by role (leader = executed, follower = saved call that reused the leader's result)",
+    ["name", "role"]
+)
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers share its result.
+
+    Attributes:
+        name (str): Name used as the metric label (e.g. "answer")
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of keys currently being executed."""
+        return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args, timeout: Optional[float] = None,
+           **kwargs) -> tuple[T, bool]:
+        """
+        Call fn(*args, **kwargs) unless a call for `key` is already running.
+
+        Followers block until the leader finishes (at most `timeout` seconds);
+        they receive the same result, or the same exception is raised. Nothing
+        is remembered afterwards - the next call for `key` runs again (caching
+        is a separate concern).
+
+        Args:
+            key (Hashable): Identity of the work, e.g. (index version, query)
+            fn (callable): The work to run if no call for `key` is in flight
+            timeout (float | None): Longest a follower waits for the leader
+                (None = as long as the leader runs); the leader is not limited
+
+        Returns:
+            tuple: (result, shared) - shared is True if this caller was a follower
+
+        Raises:
+            DeadlineExceeded: If a follower's timeout ran out before the leader finished
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            singleflight_calls_total.inc(name=self.name, role="follower")
+            try:
+                return future.result(timeout=timeout), True
+            except FutureTimeout:
+                deadline_exceeded_total.inc(call=f"coalesced_{self.name}")
+                raise DeadlineExceeded(f"coalesced_{self.name}", timeout) from None
+
+        singleflight_calls_total.inc(name=self.name, role="leader")
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,80 @@
+"""
+Diagnostic script to test admission control for the chat API.
+This verifies: 1. Per-client token bucket, 2. Bounded queue rejection, 3. Queue-time limit
+"""
+
+import asyncio
+
+from admission import AdmissionController, Overloaded, RateLimiter
+
+
+def test_rate_limiter():
+    """TEST 1: A client is limited to its burst, other clients are unaffected"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🪣 TOKEN BUCKET")
+    print("=" * 60)
+
+    limiter = RateLimiter(rate=0.5, burst=2)
+    assert limiter.acquire("alice") == 0
+    assert limiter.acquire("alice") == 0
+    wait = limiter.acquire("alice")
+    assert 0 < wait <= 2
+    assert limiter.acquire("bob") == 0
+    print(f"✅ Third request from alice must wait {wait:.1f}s, bob is unaffected")
+
+
+def test_queue_full():
+    """TEST 2: Requests beyond max_concurrent + max_queue are rejected immediately"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🚦 BOUNDED QUEUE")
+    print("=" * 60)
+
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1)
+
+        async def work():
+            async with controller.slot():
+                await asyncio.sleep(0.1)
+            return "ok"
+
+        return await asyncio.gather(*[work() for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    rejected = [r for r in results if isinstance(r, Overloaded)]
+    assert results.count("ok") == 2
+    assert len(rejected) == 1 and rejected[0].reason == "queue_full"
+    assert rejected[0].retry_after >= 1
+    print(f"✅ Results: {results}")
+
+
+def test_queue_timeout():
+    """TEST 3: A request waiting longer than queue_timeout is rejected"""
+    print("\n" + "=" * 60)
+    print("TEST 3: ⏱️  QUEUE-TIME LIMIT")
+    print("=" * 60)
+
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+
+        async def work():
+            async with controller.slot():
+                await asyncio.sleep(0.2)
+
+        return await asyncio.gather(work(), work(), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert results[0] is None
+    assert isinstance(results[1], Overloaded) and results[1].reason == "queue_timeout"
+    print("✅ Waiting request timed out with 429")
+
+
+def main():
+    """Run all admission control tests"""
+    test_rate_limiter()
+    test_queue_full()
+    test_queue_timeout()
+    print("\n✅ All admission control tests passed!")
+
+
+if __name__ == "__main__":
+    main()
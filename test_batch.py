@@ -0,0 +1,174 @@
+"""
+Diagnostic script to test batched query processing (POST /chat/batch).
+This verifies: 1. Shared retrieval and per-item results, 2. Bounded parallelism,
+3. answer_queries(): input order and per-item errors, 4. answer_queries(): concurrency limit and empty input,
+5. Cancelling a batch while its generator is blocked in another thread
+"""
+
+import threading
+import time
+
+from langchain_core.documents import Document
+
+import graph
+import rag_chain
+
+
+def test_process_queries_items(monkeypatch):
+    """TEST 1: One retrieval call for the batch, per-item status, failures isolated"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 📦 BATCH ITEMS")
+    print("=" * 60)
+
+    retrieval_calls = []
+    monkeypatch.setattr(graph, "retrieve_many", lambda queries: retrieval_calls.append(queries) or [[] for _ in queries])
+
+    def fake_process_query(query, request_id=None, retrieved=None):
+        assert retrieved == []
+        if query == "boom":
+            raise RuntimeError("LLM unavailable")
+        return f"answer to {query}"
+
+    monkeypatch.setattr(graph, "process_query", fake_process_query)
+
+    items = sorted(graph.process_queries(["a", "", "boom", "b"], request_id="batch"), key=lambda item: item["index"])
+
+    assert retrieval_calls == [["a", "boom", "b"]]
+    assert [item["status"] for item in items] == ["ok", "error", "error", "ok"]
+    assert items[0]["response"] == "answer to a" and items[0]["request_id"] == "batch-0"
+    assert items[1]["error"] == "Query cannot be empty"
+    assert items[2]["error"] == "LLM unavailable"
+    print(f"✅ Items: {[(item['index'], item['status']) for item in items]}")
+
+
+def test_process_queries_concurrency(monkeypatch):
+    """TEST 2: No more than max_concurrency graph runs at the same time"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🚦 BOUNDED PARALLELISM")
+    print("=" * 60)
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_process_query(query, request_id=None, retrieved=None):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return query
+
+    monkeypatch.setattr(graph, "retrieve_many", lambda queries: [[] for _ in queries])
+    monkeypatch.setattr(graph, "process_query", slow_process_query)
+
+    items = list(graph.process_queries([f"q{i}" for i in range(10)], max_concurrency=3))
+
+    assert len(items) == 10
+    assert 1 < peak <= 3
+    print(f"✅ Peak parallel runs: {peak}")
+
+
+def stub_rag_chain(monkeypatch, invoke):
+    """Replace retrieval and the answer chain of rag_chain with local stubs."""
+    class StubChain:
+        def invoke(self, inputs):
+            return invoke(inputs["question"])
+
+    monkeypatch.setattr(rag_chain, "get_answer_chain", lambda model=None: StubChain())
+    monkeypatch.setattr(rag_chain, "retrieve_many",
+                        lambda queries: [[(Document(page_content=f"chunk for {q}"), 0.9)] for q in queries])
+    monkeypatch.setattr(rag_chain.settings, "relevance_threshold", 0.3)
+    monkeypatch.setattr(rag_chain.settings, "upstream_max_retries", 0)
+
+
+def test_answer_queries_order_and_errors(monkeypatch):
+    """TEST 3: Results come back in input order; one failing item does not fail its siblings"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 📋 ANSWER_QUERIES RESULTS")
+    print("=" * 60)
+
+    def invoke(question):
+        if question == "boom":
+            raise RuntimeError("LLM unavailable")
+        time.sleep(0.05 if question == "slow" else 0.0)     # Finishes last, still listed first
+        return f"answer to {question}"
+
+    stub_rag_chain(monkeypatch, invoke)
+    results = rag_chain.answer_queries(["slow", "a", "boom", "", "b"])
+
+    assert [result["query"] for result in results] == ["slow", "a", "boom", "", "b"]
+    assert [result["answer"] for result in results] == ["answer to slow", "answer to a", None, None, "answer to b"]
+    assert results[2]["error"] == "LLM unavailable"
+    assert results[3]["error"] == "Query cannot be empty"
+    assert all(results[i]["error"] is None for i in (0, 1, 4))
+    print(f"✅ {[(result['query'], result['error']) for result in results]}")
+
+
+def test_answer_queries_concurrency(monkeypatch):
+    """TEST 4: At most max_concurrency LLM calls at a time; no queries, no work"""
+    print("\n" + "=" * 60)
+    print("TEST 4: 🚦 ANSWER_QUERIES CONCURRENCY")
+    print("=" * 60)
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def invoke(question):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return question
+
+    stub_rag_chain(monkeypatch, invoke)
+    results = rag_chain.answer_queries([f"q{i}" for i in range(10)], max_concurrency=3)
+
+    assert [result["answer"] for result in results] == [f"q{i}" for i in range(10)]
+    assert 1 < peak <= 3
+
+    monkeypatch.setattr(rag_chain, "retrieve_many", lambda queries: (_ for _ in ()).throw(AssertionError("called")))
+    assert rag_chain.answer_queries([]) == []
+    print(f"✅ Peak parallel LLM calls: {peak}")
+
+
+def test_process_queries_cancel(monkeypatch):
+    """TEST 5: Setting cancel from another thread skips the queries not yet started"""
+    print("\n" + "=" * 60)
+    print("TEST 5: 🛑 CANCELLED BATCH")
+    print("=" * 60)
+
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def blocking_process_query(query, request_id=None, retrieved=None):
+        calls.append(query)
+        started.set()
+        release.wait(timeout=5)
+        return query
+
+    monkeypatch.setattr(graph, "retrieve_many", lambda queries: [[] for _ in queries])
+    monkeypatch.setattr(graph, "process_query", blocking_process_query)
+
+    cancel = threading.Event()
+    items = graph.process_queries(["q0", "q1", "q2", "q3"], max_concurrency=1, cancel=cancel)
+    consumed = []
+    consumer = threading.Thread(target=lambda: consumed.extend(items))
+    consumer.start()
+
+    # The consumer is now blocked inside next(items), as in the API's worker thread
+    assert started.wait(timeout=5)
+    cancel.set()
+    release.set()
+    consumer.join(timeout=5)
+
+    assert not consumer.is_alive()
+    assert calls == ["q0"] and consumed == []
+    print("✅ Only the running query finished; 3 queued queries skipped")
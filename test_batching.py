@@ -0,0 +1,104 @@
+"""
+Diagnostic script to test micro-batching across concurrent requests.
+This verifies: 1. Items grouped into batches, 2. Error fan-out, 3. Multi-item classification,
+4. Shared query embedding calls
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import graph
+import rag_chain
+from batching import MicroBatcher, batch_latency_seconds, batch_size
+
+
+def test_items_are_batched():
+    """TEST 1: Concurrent items share calls; every caller gets its own result"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 📦 MICRO-BATCHES")
+    print("=" * 60)
+
+    batch_sizes = []
+
+    def double_all(items):
+        batch_sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test_double", double_all, window=0.05, max_batch=4)
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(batcher.call, range(10)))
+
+    assert results == [item * 2 for item in range(10)]
+    assert sum(batch_sizes) == 10
+    assert len(batch_sizes) < 10 and max(batch_sizes) <= 4
+    print(f"✅ 10 items in {len(batch_sizes)} calls: {batch_sizes}")
+
+
+def test_error_fan_out():
+    """TEST 2: Per-item errors fail one caller; a failing call fails the whole batch"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 💥 ERROR FAN-OUT")
+    print("=" * 60)
+
+    batcher = MicroBatcher("test_errors", lambda items: [ValueError(item) if item < 0 else item for item in items])
+    assert batcher.call(1) == 1
+    with pytest.raises(ValueError):
+        batcher.call(-1)
+
+    def failing(items):
+        raise RuntimeError("Gemini unavailable")
+
+    futures = [MicroBatcher("test_failing", failing, window=0.05).submit(item) for item in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="Gemini unavailable"):
+            future.result(timeout=5)
+    print("✅ Errors delivered to the right callers")
+
+
+def test_classify_queries_multi_item(monkeypatch):
+    """TEST 3: One structured prompt for several queries, labels mapped back by number"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🏷️  MULTI-ITEM CLASSIFICATION")
+    print("=" * 60)
+
+    prompts = []
+
+    class FakeLLM:
+        def invoke(self, prompt):
+            prompts.append(prompt)
+            return SimpleNamespace(content='1: product\n2: "returns"\n3. weather')
+
+    monkeypatch.setattr(graph, "get_classifier_llm", lambda: FakeLLM())
+    labels = graph.classify_queries(["Price of SmartWatch?", "Can I return it?", "Will it rain?", "Hello"])
+
+    assert labels == ["product", "returns", "general", "general"]
+    assert len(prompts) == 1 and "4. Hello" in prompts[0]
+    print(f"✅ Labels: {labels}")
+
+
+def test_embeddings_are_batched(monkeypatch):
+    """TEST 4: Concurrent embed_queries() calls share embedding API requests"""
+    print("\n" + "=" * 60)
+    print("TEST 4: 🧮 BATCHED QUERY EMBEDDINGS")
+    print("=" * 60)
+
+    api_calls = []
+
+    class FakeEmbeddings:
+        def embed_documents(self, texts, task_type=None):
+            api_calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(rag_chain, "get_embeddings", lambda: FakeEmbeddings())
+    queries = [f"batched embedding query {i}" + "?" * i for i in range(12)]
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        vectors = list(pool.map(lambda query: rag_chain.embed_queries([query])[0], queries))
+
+    assert vectors == [[float(len(query))] for query in queries]
+    assert sum(len(call) for call in api_calls) == 12
+    assert len(api_calls) < 12
+    assert batch_size.count(name="embedding") >= len(api_calls)
+    assert batch_latency_seconds.count(name="embedding") >= 12
+    print(f"✅ 12 concurrent queries, {len(api_calls)} embedding API call(s)")
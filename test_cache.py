@@ -0,0 +1,121 @@
+"""
+Diagnostic script to test the in-process cache used by the RAG chain.
+This verifies: 1. LRU eviction, 2. TTL expiry, 3. Batched lookups, 4. Shared SQLite cache
+"""
+
+import os
+import tempfile
+import time
+
+from cache import SQLiteCache, TTLCache
+
+
+def test_lru_eviction():
+    """TEST 1: Least recently used entry is evicted first"""
+    print("\n" + "=" * 60)
+    print("TEST 1: ♻️  LRU EVICTION")
+    print("=" * 60)
+
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # "a" is now the most recently used
+    cache.set("c", 3)       # evicts "b"
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    print("✅ Oldest entry evicted, recent entries kept")
+
+
+def test_ttl_expiry():
+    """TEST 2: Entries expire after ttl seconds"""
+    print("\n" + "=" * 60)
+    print("TEST 2: ⏱️  TTL EXPIRY")
+    print("=" * 60)
+
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("price", "₹15,999")
+    assert cache.get("price") == "₹15,999"
+
+    time.sleep(0.1)
+    assert cache.get("price") is None
+    assert cache.hits == 1 and cache.misses == 1
+    print("✅ Expired entry no longer returned")
+
+
+def test_get_many():
+    """TEST 3: get_many() returns only cached keys"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 📦 BATCHED LOOKUP")
+    print("=" * 60)
+
+    cache = TTLCache(maxsize=10)
+    cache.set("q1", [0.1, 0.2])
+
+    found = cache.get_many(["q1", "q2"])
+    assert found == {"q1": [0.1, 0.2]}
+    print(f"✅ get_many returned: {found}")
+
+
+def test_sqlite_cache_shared():
+    """TEST 4: Two SQLiteCache instances on one file see each other's entries (like two workers)"""
+    print("\n" + "=" * 60)
+    print("TEST 4: 🗄️  SHARED SQLITE CACHE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+        worker_1 = SQLiteCache(path, maxsize=10, name="answer")
+        worker_2 = SQLiteCache(path, maxsize=10, name="answer")
+        other = SQLiteCache(path, maxsize=10, name="query_embedding")
+
+        worker_1.set(("v1", "price?"), "₹15,999")
+        assert worker_2.get(("v1", "price?")) == "₹15,999"
+        assert other.get(("v1", "price?")) is None
+
+        worker_2.set("q1", [0.1, 0.2])
+        assert worker_1.get_many(["q1", "q2"]) == {"q1": [0.1, 0.2]}
+
+        expiring = SQLiteCache(path, maxsize=10, ttl=0.05, name="answer")
+        time.sleep(0.1)
+        assert expiring.get("q1") is None
+        assert len(worker_1) == 1
+    print("✅ Entries shared across instances, separated by cache name, expired by TTL")
+
+
+def test_sqlite_cache_eviction():
+    """TEST 5: SQLiteCache keeps at most maxsize entries, dropping the least recently used"""
+    print("\n" + "=" * 60)
+    print("TEST 5: ♻️  SQLITE LRU EVICTION")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SQLiteCache(os.path.join(directory, "cache.db"), maxsize=2)
+        cache.EVICT_EVERY = 1
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+    print("✅ Least recently used entry evicted")
+
+
+def main():
+    """Run all cache tests"""
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_get_many()
+    test_sqlite_cache_shared()
+    test_sqlite_cache_eviction()
+    print("\n✅ All cache tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Diagnostic script to test query-aware context compression.
+This verifies: 1. Product-specific line selection, 2. Record boundaries, 3. No-match fallback,
+4. Entity-only questions keep the whole record, 5. Synonyms of a field keep the whole record
+"""
+
+from langchain_core.documents import Document
+
+from compression import compress_documents
+
+
+with open("data/product_info.txt", "r", encoding="utf-8") as file:
+    CATALOG = [(Document(page_content=file.read()), 0.9)]
+
+
+def test_keeps_asked_product_only():
+    """TEST 1: A price question keeps that product's lines only"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🎯 PRODUCT LINE SELECTION")
+    print("=" * 60)
+
+    docs, stats = compress_documents("What is the price of SmartWatch Pro X?", CATALOG)
+    text = docs[0][0].page_content
+
+    assert "₹15,999" in text
+    assert "Wireless Earbuds Elite" not in text
+    assert stats["ratio"] < 0.5
+    print(f"✅ Kept {stats['ratio']:.0%} of the context:\n{text}")
+
+
+def test_policy_not_attached_to_product():
+    """TEST 2: The return policy line is not labelled with the previous product"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 📄 RECORD BOUNDARIES")
+    print("=" * 60)
+
+    docs, _ = compress_documents("What is the return policy?", CATALOG)
+    text = docs[0][0].page_content
+
+    assert text.startswith("Return Policy:")
+    assert "Product:" not in text
+    print(f"✅ Compressed context: {text}")
+
+
+def test_no_match_keeps_chunks():
+    """TEST 3: Without any lexical match the chunks are left untouched"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🛟 NO-MATCH FALLBACK")
+    print("=" * 60)
+
+    docs, stats = compress_documents("xyzzy", CATALOG)
+
+    assert docs == CATALOG
+    assert stats["ratio"] == 1.0
+    print("✅ Original chunks returned")
+
+
+def test_entity_only_keeps_record():
+    """TEST 4: A question naming only the product keeps its price, features and warranty"""
+    print("\n" + "=" * 60)
+    print("TEST 4: 📦 ENTITY-ONLY QUESTION")
+    print("=" * 60)
+
+    docs, _ = compress_documents("Tell me about the SmartWatch Pro X", CATALOG)
+    text = docs[0][0].page_content
+
+    assert text.splitlines() == [
+        "Product: SmartWatch Pro X",
+        "Price: ₹15,999 | Features: Heart rate, GPS, 7-day battery, water resistant 50m",
+        "Warranty: 1 year standard, 2 years extended (₹1,999)",
+    ]
+    print(f"✅ Compressed context:\n{text}")
+
+
+def test_synonym_keeps_record():
+    """TEST 5: "waterproof" matches no field line; the product's whole record is kept"""
+    print("\n" + "=" * 60)
+    print("TEST 5: 💧 SYNONYM QUESTION")
+    print("=" * 60)
+
+    docs, _ = compress_documents("Is the smartwatch waterproof?", CATALOG)
+    text = docs[0][0].page_content
+
+    assert "water resistant 50m" in text
+    assert "Wireless Earbuds Elite" not in text
+    print(f"✅ Compressed context:\n{text}")
+
+
+def main():
+    """Run all compression tests"""
+    test_keeps_asked_product_only()
+    test_policy_not_attached_to_product()
+    test_no_match_keeps_chunks()
+    test_entity_only_keeps_record()
+    test_synonym_keeps_record()
+    print("\n✅ All compression tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Diagnostic script to test context packing for the RAG prompt.
+This verifies: 1. Overlap merging, 2. Line deduplication, 3. Token budget
+"""
+
+from langchain_core.documents import Document
+
+from context_packer import estimate_tokens, merge_overlapping, pack_context
+
+
+CHUNK_1 = "Product: SmartWatch Pro X\nPrice: ₹15,999\nProduct: Wireless Earbuds Elite"
+CHUNK_2 = "Product: Wireless Earbuds Elite\nPrice: ₹4,999 | Warranty: 6 months"
+
+
+def test_overlap_merging():
+    """TEST 1: Neighbouring chunks sharing text are merged into one block"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🔗 OVERLAP MERGING")
+    print("=" * 60)
+
+    blocks = merge_overlapping([(CHUNK_1, 0.9), (CHUNK_2, 0.7)])
+
+    assert len(blocks) == 1
+    text, score, count = blocks[0]
+    assert text.count("Wireless Earbuds Elite") == 1
+    assert score == 0.9 and count == 2
+    print(f"✅ Merged block:\n{text}")
+
+
+def test_duplicate_lines_removed():
+    """TEST 2: Lines repeated across chunks appear only once"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🧹 DEDUPLICATION")
+    print("=" * 60)
+
+    docs = [
+        (Document(page_content="Return Policy: 7-day no-questions-asked.\nSupport: Mon-Sat"), 0.8),
+        (Document(page_content="Support: Mon-Sat\nsupport@techgear.com"), 0.6),
+    ]
+    packed = pack_context(docs)
+
+    assert packed["text"].count("Support: Mon-Sat") == 1
+    assert packed["tokens_saved"] > 0
+    print(f"✅ Saved ~{packed['tokens_saved']} tokens")
+
+
+def test_token_budget():
+    """TEST 3: Packed context never exceeds the token budget"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 💰 TOKEN BUDGET")
+    print("=" * 60)
+
+    docs = [(Document(page_content=f"Line {i}: " + "x" * 40), 1.0 - i / 10) for i in range(10)]
+    packed = pack_context(docs, max_tokens=40)
+
+    assert packed["tokens"] <= 40
+    assert packed["text"].startswith("Line 0")
+    assert estimate_tokens(packed["text"]) == packed["tokens"]
+    print(f"✅ Packed {packed['chunks_used']} chunks in {packed['tokens']} tokens")
+
+
+def main():
+    """Run all context packing tests"""
+    test_overlap_merging()
+    test_duplicate_lines_removed()
+    test_token_budget()
+    print("\n✅ All context packing tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Diagnostic script to test request deadlines and the degraded paths.
+This verifies: 1. Deadline-bound calls, 2. Fast escalation when the classifier
+hangs, 3. Extractive answer when no time is left for generation
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+import graph
+from deadline import DeadlineExceeded, call_with_deadline, deadline_after, remaining
+from extractive import EXTRACTIVE_REPLY_PREFIX
+
+
+class FakeClassifier:
+    """Stand-in for the Gemini classifier LLM."""
+
+    def __init__(self, category: str, delay: float = 0.0):
+        self.category = category
+        self.delay = delay
+
+    def invoke(self, prompt):
+        time.sleep(self.delay)
+        return SimpleNamespace(content=f'"{self.category}"')
+
+
+def test_call_with_deadline():
+    """TEST 1: Calls finish, time out, or are skipped when the budget is spent"""
+    print("\n" + "=" * 60)
+    print("TEST 1: ⏱️  DEADLINE-BOUND CALLS")
+    print("=" * 60)
+
+    assert call_with_deadline("fast", deadline_after(1), lambda x: x * 2, 21) == 42
+    assert remaining(None) == float("inf")
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded) as error:
+        call_with_deadline("slow", deadline_after(5), time.sleep, 1, timeout=0.1)
+    assert time.monotonic() - start < 0.5
+    assert error.value.call == "slow"
+    print(f"✅ Slow call abandoned: {error.value}")
+
+    with pytest.raises(DeadlineExceeded):
+        call_with_deadline("late", time.monotonic() - 1, lambda: "never called")
+    print("✅ Spent budget raises before calling")
+
+
+def test_classifier_timeout_escalates(monkeypatch):
+    """TEST 2: A hanging classifier LLM leads to a fast escalation"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🚨 CLASSIFIER TIMEOUT → ESCALATION")
+    print("=" * 60)
+
+    monkeypatch.setattr(graph, "get_classifier_llm", lambda: FakeClassifier("product", delay=2))
+
+    start = time.monotonic()
+    response = graph.process_query("deadline test: hanging classifier", deadline=deadline_after(0.2))
+    elapsed = time.monotonic() - start
+
+    assert "escalated" in response
+    assert elapsed < 1.0
+    print(f"✅ Escalated after {elapsed:.2f}s")
+
+
+def test_extractive_answer_when_budget_spent(monkeypatch):
+    """TEST 3: Too little time for the LLM → answer quoted from the best chunk"""
+    print("\n" + "=" * 60)
+    print("TEST 3: ✂️  EXTRACTIVE ANSWER")
+    print("=" * 60)
+
+    chunk = Document(page_content="Product: SmartWatch Pro X\nPrice: ₹15,999")
+    monkeypatch.setattr(graph, "get_classifier_llm", lambda: FakeClassifier("product"))
+    monkeypatch.setattr(graph, "retrieve", lambda query, deadline=None: [(chunk, 0.9)])
+    monkeypatch.setattr(graph.settings, "answer_min_budget", 5.0)
+
+    query = "deadline test: price of SmartWatch Pro X?"
+    response = graph.process_query(query, deadline=deadline_after(1))
+
+    assert response.startswith(EXTRACTIVE_REPLY_PREFIX)
+    assert "₹15,999" in response
+    assert graph._answer_cache.get(graph.answer_cache_key(query)) is None
+    print(f"✅ {response!r}")
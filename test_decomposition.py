@@ -0,0 +1,98 @@
+"""
+Diagnostic script to test multi-intent query decomposition.
+This verifies: 1. Splitting compound queries, 2. Merging sub-answers,
+3. Concurrent sub-questions through the graph
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+import graph
+from decomposition import merge_answers, split_query
+
+
+def test_split_query():
+    """TEST 1: Compound queries are split; single, comparison and back-referencing ones are not"""
+    print("\n" + "=" * 60)
+    print("TEST 1: ✂️  SPLITTING")
+    print("=" * 60)
+
+    assert split_query("price of SmartWatch Pro X and the return policy") == [
+        "price of SmartWatch Pro X", "the return policy"]
+    assert split_query("What is the price of SmartWatch Pro X? How long does a refund take?") == [
+        "What is the price of SmartWatch Pro X?", "How long does a refund take?"]
+    assert split_query("How much is the power bank and what are your support hours?") == [
+        "How much is the power bank", "what are your support hours?"]
+
+    for query in ("What is the price and warranty of SmartWatch Pro X?",
+                  "Does the SmartWatch have GPS and heart rate?",
+                  "price of SmartWatch Pro X and its warranty",
+                  "Compare SmartWatch Pro X and Wireless Earbuds Elite",
+                  # Parts sharing one subject: "What is the battery life" alone does not say of what
+                  "What is the battery life and price of the SmartWatch Pro X?",
+                  "What colors does the watch come in and what sizes are available"):
+        assert split_query(query) == [query], query
+
+    # Catalog names count as a subject; a glued trailing fragment keeps its joining word
+    assert split_query("What is the price of the Pro X and the return policy", names=["pro", "x"]) == [
+        "What is the price of the Pro X", "the return policy"]
+    assert split_query("How much is the power bank and what are your support hours plus GPS?") == [
+        "How much is the power bank", "what are your support hours plus GPS?"]
+    print("✅ Split only where every part stands alone")
+
+
+def test_merge_answers():
+    """TEST 2: One labelled paragraph per sub-answer, duplicates given once"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🧩 MERGING")
+    print("=" * 60)
+
+    merged = merge_answers([("price of SmartWatch Pro X", "₹15,999."), ("the return policy?", "7 days.")])
+    assert merged == "Price of SmartWatch Pro X: ₹15,999.\n\nThe return policy: 7 days."
+    assert merge_answers([("a price", "Escalated."), ("a refund", "Escalated.")]) == "Escalated."
+    print(f"✅ {merged!r}")
+
+
+def test_sub_questions_run_concurrently(monkeypatch):
+    """TEST 3: Sub-questions take about as long as the slowest one, not the sum"""
+    print("\n" + "=" * 60)
+    print("TEST 3: ⚡ CONCURRENT SUB-QUESTIONS")
+    print("=" * 60)
+
+    chunks = {
+        "price": Document(page_content="Product: SmartWatch Pro X\nPrice: ₹15,999"),
+        "return": Document(page_content="Return Policy: 7-day no-questions-asked."),
+    }
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_retrieve(query, deadline=None):
+        return [(chunks["price" if "price" in query else "return"], 0.9)]
+
+    def fake_generate_answer(query, context, deadline=None, model=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.3)
+        with lock:
+            active[0] -= 1
+        return context.splitlines()[-1]
+
+    monkeypatch.setattr(graph, "get_classifier_llm", lambda: SimpleNamespace(
+        invoke=lambda prompt: SimpleNamespace(content="\n".join(f"{i}: product" for i in range(1, 5)))))
+    monkeypatch.setattr(graph, "retrieve", fake_retrieve)
+    monkeypatch.setattr(graph, "generate_answer", fake_generate_answer)
+    monkeypatch.setattr(graph.settings, "relevance_threshold", 0.3)
+
+    start = time.monotonic()
+    response = graph.process_query("decomposition test: price of SmartWatch Pro X and the return policy")
+    elapsed = time.monotonic() - start
+
+    assert response == ("Decomposition test: price of SmartWatch Pro X: Price: ₹15,999\n\n"
+                        "The return policy: Return Policy: 7-day no-questions-asked.")
+    assert peak[0] == 2
+    assert elapsed < 0.55
+    print(f"✅ 2 sub-questions answered in {elapsed:.2f}s")
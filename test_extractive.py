@@ -0,0 +1,82 @@
+"""
+Diagnostic script to test extractive (no-LLM) answers.
+This verifies: 1. Field picked for the asked-about product, 2. Fallbacks without a match,
+3. Graph routing while the answer model's breaker is open
+"""
+
+import time
+
+from langchain_core.documents import Document
+
+import graph
+import resilience
+from extractive import EXTRACTIVE_REPLY_PREFIX, extract_fields, extractive_answer
+from model_router import choose_answer_tier, model_for_tier
+from rag_chain import NO_INFORMATION_REPLY
+
+
+CATALOG = Document(page_content=(
+    "Product: SmartWatch Pro X\n"
+    "Price: ₹15,999 | Features: Heart rate, GPS, 7-day battery, water resistant 50m\n"
+    "Warranty: 1 year standard, 2 years extended (₹1,999)\n"
+    "\n"
+    "Product: Wireless Earbuds Elite\n"
+    "Price: ₹4,999 | Features: ANC, 24-hour battery, Bluetooth 5.2 | Warranty: 6 months\n"
+    "\n"
+    "Return Policy: 7-day no-questions-asked. Refund in 5-7 business days."
+))
+
+
+def test_best_field_is_extracted():
+    """TEST 1: The matching field of the matching record is quoted with its header"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🎯 BEST FIELD")
+    print("=" * 60)
+
+    fields = extract_fields("How much does the Wireless Earbuds Elite cost?", [(CATALOG, 0.8)])
+    assert fields[0]["header"] == "Product: Wireless Earbuds Elite"
+    assert fields[0]["text"] == "Price: ₹4,999"
+
+    fields = extract_fields("What is the warranty on the SmartWatch Pro X?", [(CATALOG, 0.8)])
+    assert fields[0]["text"].startswith("Warranty: 1 year standard")
+
+    answer = extractive_answer("How long does a refund take?", [(CATALOG, 0.8)])
+    assert answer == f"{EXTRACTIVE_REPLY_PREFIX}\n\nReturn Policy: 7-day no-questions-asked. Refund in 5-7 business days."
+    print(f"✅ {answer!r}")
+
+
+def test_fallbacks_without_match():
+    """TEST 2: No lexical match → top context section, or the "no information" reply"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🪂 FALLBACKS")
+    print("=" * 60)
+
+    assert extract_fields("Will it rain tomorrow?", [(CATALOG, 0.8)]) == []
+    answer = extractive_answer("Will it rain tomorrow?", [(CATALOG, 0.8)], context="Product: SmartWatch Pro X\n\nOther")
+    assert answer == f"{EXTRACTIVE_REPLY_PREFIX}\n\nProduct: SmartWatch Pro X"
+    assert extractive_answer("Will it rain tomorrow?", []) == NO_INFORMATION_REPLY
+    print("✅ Context section and 'no information' fallbacks")
+
+
+def test_graph_skips_llm_while_breaker_open(monkeypatch):
+    """TEST 3: The relevance gate sends queries to the extractive node while the breaker is open"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🔌 BREAKER OPEN → EXTRACTIVE")
+    print("=" * 60)
+
+    query = "What is the price of SmartWatch Pro X?"
+    state = graph.initial_state(query, retrieved=[(CATALOG, 0.9)])
+    state.update(category="product", context=CATALOG.page_content)
+    monkeypatch.setattr(graph.settings, "relevance_threshold", 0.5)
+    assert graph.check_relevance(state) == "rag_responder"
+
+    tier, _ = choose_answer_tier(query, state["scores"])
+    breaker = resilience.get_breaker(f"gemini:{model_for_tier(tier)}")
+    monkeypatch.setattr(breaker, "state", "open")
+    monkeypatch.setattr(breaker, "_changed_at", time.monotonic())
+    assert graph.check_relevance(state) == "extractive"
+
+    state = graph.extractive_node(state)
+    assert state["degraded"] == "answer_circuit_open"
+    assert state["response"] == f"{EXTRACTIVE_REPLY_PREFIX}\n\nProduct: SmartWatch Pro X\nPrice: ₹15,999"
+    print(f"✅ {state['response']!r}")
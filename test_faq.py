@@ -0,0 +1,115 @@
+"""
+Diagnostic script to test the precomputed FAQ answers.
+This verifies: 1. Answers generated from catalog records, 2. Only changed records regenerated,
+3. Entity + intent matching, 4. FAQ answers served by the graph without LLM calls
+"""
+
+import faq
+import graph
+from faq import FAQIndex, build_faq_table, load_templates, parse_records
+
+
+CATALOG = (
+    "Product: SmartWatch Pro X\n"
+    "Price: ₹15,999 | Features: Heart rate, GPS, 7-day battery, water resistant 50m\n"
+    "Warranty: 1 year standard, 2 years extended (₹1,999)\n"
+    "\n"
+    "Product: Wireless Earbuds Elite\n"
+    "Price: ₹4,999 | Features: ANC, 24-hour battery, Bluetooth 5.2 | Warranty: 6 months\n"
+    "\n"
+    "Return Policy: 7-day no-questions-asked. Refund in 5-7 business days.\n"
+    "Support: Mon-Sat, 9AM-6PM IST | support@techgear.com\n"
+)
+
+
+def answers(table: dict) -> dict:
+    return {(entry["entity"], entry["intent"]): entry["answer"]
+            for entries in table["records"].values() for entry in entries}
+
+
+def test_answers_generated_from_records():
+    """TEST 1: Every template is filled in from the record's own fields"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🏭 GENERATED ANSWERS")
+    print("=" * 60)
+
+    records = parse_records(CATALOG)
+    assert [(record["name"], record["kind"]) for record in records] == [
+        ("SmartWatch Pro X", "product"), ("Wireless Earbuds Elite", "product"),
+        ("Return Policy", "policy"), ("Support", "policy")]
+    assert records[1]["fields"] == {"Price": "₹4,999", "Features": "ANC, 24-hour battery, Bluetooth 5.2",
+                                    "Warranty": "6 months"}
+
+    table, stats = build_faq_table(CATALOG, load_templates())
+    generated = answers(table)
+    assert generated[("SmartWatch Pro X", "price")] == "The SmartWatch Pro X costs ₹15,999."
+    assert generated[("Wireless Earbuds Elite", "battery")] == "The Wireless Earbuds Elite has a 24-hour battery."
+    assert generated[("Return Policy", "returns")].startswith("Our return policy: 7-day")
+    assert stats == {"records": 4, "regenerated": 4, "reused": 0, "entries": len(generated)}
+    print(f"✅ {stats['entries']} answers from {stats['records']} records")
+
+
+def test_only_changed_records_regenerated():
+    """TEST 2: A re-ingest keeps the entries of unchanged records"""
+    print("\n" + "=" * 60)
+    print("TEST 2: ♻️  INCREMENTAL REGENERATION")
+    print("=" * 60)
+
+    templates = load_templates()
+    table, _ = build_faq_table(CATALOG, templates)
+    changed, stats = build_faq_table(CATALOG.replace("₹4,999", "₹4,499"), templates, previous=table)
+
+    assert stats["regenerated"] == 1 and stats["reused"] == 3
+    assert answers(changed)[("Wireless Earbuds Elite", "price")] == "The Wireless Earbuds Elite costs ₹4,499."
+    print(f"✅ {stats}")
+
+
+def test_entity_and_intent_matching():
+    """TEST 3: Only queries naming one entity and one intent are matched"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🎯 MATCHING")
+    print("=" * 60)
+
+    templates = load_templates()
+    index = FAQIndex(build_faq_table(CATALOG, templates)[0], templates)
+
+    entry, result = index.match("How much does the Wireless Earbuds Elite cost?")
+    assert result == "hit" and entry["answer"] == "The Wireless Earbuds Elite costs ₹4,999."
+    entry, result = index.match("How long does a refund take?")
+    assert result == "hit" and entry["intent"] == "returns"
+    assert index.match("What is the battery life of the SmartWatch Pro X?")[0]["intent"] == "battery"
+
+    assert index.match("What are your support hours?")[0]["intent"] == "support"
+
+    assert index.match("Does the SmartWatch Pro X price include the warranty?") == (None, "ambiguous")
+    # A policy keyword next to a product name is not a policy question
+    assert index.match("Does the SmartWatch Pro X support GPS?") == (None, "miss")
+    assert index.match("Is the smartwatch pro x water resistant? I want to return my old one") == (None, "ambiguous")
+    assert index.match("What is the price of the iPhone 15?") == (None, "miss")
+    assert index.match("Tell me about the SmartWatch Pro X") == (None, "miss")
+    print("✅ Hits, misses and ambiguous queries as expected")
+
+
+def test_graph_serves_faq_without_llm(tmp_path, monkeypatch):
+    """TEST 4: A matching query is answered from the stored table; no LLM is touched"""
+    print("\n" + "=" * 60)
+    print("TEST 4: ⚡ FAQ FAST PATH")
+    print("=" * 60)
+
+    monkeypatch.setattr(faq.settings, "database_path", str(tmp_path))
+    monkeypatch.setitem(faq._index_state, "version", None)
+    monkeypatch.setitem(faq._index_state, "index", None)
+    faq.refresh_faq_table(CATALOG)
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("LLM called on the FAQ path")
+
+    monkeypatch.setattr(graph, "get_classifier_llm", no_llm)
+    monkeypatch.setattr(graph, "retrieve", no_llm)
+    monkeypatch.setattr(graph, "generate_answer", no_llm)
+
+    response = graph.process_query("faq test: what is the price of SmartWatch Pro X?")
+    assert response == "The SmartWatch Pro X costs ₹15,999."
+    state = graph.get_graph().invoke(graph.initial_state("faq test: What is the return policy?"))
+    assert state["category"] == "returns"
+    print(f"✅ {response!r}")
@@ -0,0 +1,60 @@
+"""
+Diagnostic script to test re-ingestion into an existing index.
+This verifies: 1. Re-ingesting the same file adds no duplicates,
+2. Chunks of changed records are replaced, not kept next to the new ones
+"""
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import ingest
+
+
+CHUNKS = [
+    "Product: SmartWatch Pro X\nPrice: ₹15,999 | Features: Heart rate, GPS",
+    "Product: Wireless Earbuds Elite\nPrice: ₹4,999 | Features: ANC",
+]
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """Offline embeddings that remember how many texts were embedded."""
+    embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def ingest_chunks(tmp_path, monkeypatch, chunks) -> tuple[list[str], int]:
+    embeddings = CountingEmbedding(size=16)
+    monkeypatch.setattr(ingest, "get_embeddings", lambda: embeddings)
+    store = ingest.create_embeddings_and_store(chunks, persist_directory=str(tmp_path), collection_name="test")
+    return sorted(store.get()["documents"]), embeddings.embedded
+
+
+def test_reingest_adds_no_duplicates(tmp_path, monkeypatch):
+    """TEST 1: The same file ingested twice gives the same chunks, embedded once"""
+    print("\n" + "=" * 60)
+    print("TEST 1: ♻️  NO DUPLICATES")
+    print("=" * 60)
+
+    first, embedded = ingest_chunks(tmp_path, monkeypatch, CHUNKS)
+    assert first == sorted(CHUNKS) and embedded == 2
+
+    second, embedded = ingest_chunks(tmp_path, monkeypatch, CHUNKS + [CHUNKS[0]])
+    assert second == sorted(CHUNKS) and embedded == 0
+    print(f"✅ {len(second)} chunks after two ingests")
+
+
+def test_changed_record_replaced(tmp_path, monkeypatch):
+    """TEST 2: After a price change only the new chunk is searchable"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🔁 STALE CHUNKS REMOVED")
+    print("=" * 60)
+
+    ingest_chunks(tmp_path, monkeypatch, CHUNKS)
+    changed = [CHUNKS[0], CHUNKS[1].replace("₹4,999", "₹4,499")]
+    documents, embedded = ingest_chunks(tmp_path, monkeypatch, changed)
+
+    assert documents == sorted(changed) and embedded == 1
+    assert not any("₹4,999" in document for document in documents)
+    print(f"✅ {documents}")
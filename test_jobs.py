@@ -0,0 +1,99 @@
+"""
+Diagnostic script to test asynchronous chat jobs.
+This verifies: 1. Job lifecycle, 2. Failed jobs, 3. Pending limit, 4. TTL expiry
+"""
+
+import threading
+import time
+
+import pytest
+
+from admission import Overloaded
+from jobs import JobManager
+
+
+def wait_until_final(manager: JobManager, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job and job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_lifecycle():
+    """TEST 1: queued → done, with the handler's answer"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 📬 JOB LIFECYCLE")
+    print("=" * 60)
+
+    calls = []
+
+    def handler(query, request_id, session_id=None):
+        calls.append((request_id, session_id))
+        return f"answer to {query}"
+
+    manager = JobManager(handler=handler, max_workers=2)
+    job = manager.submit("price?", request_id="req-1", session_id="session-1")
+    assert job["status"] == "queued" and job["request_id"] == "req-1"
+
+    done = wait_until_final(manager, job["job_id"])
+    assert done["status"] == "done"
+    assert done["response"] == "answer to price?"
+    assert done["started_at"] <= done["finished_at"]
+    assert calls == [("req-1", "session-1")]
+
+    # The job ID is always the server's own, even when clients reuse a request ID
+    again = manager.submit("refund?", request_id="req-1")
+    assert again["job_id"] not in ("req-1", job["job_id"])
+    assert wait_until_final(manager, again["job_id"])["response"] == "answer to refund?"
+    assert manager.get(job["job_id"])["response"] == "answer to price?"
+    print(f"✅ {done}")
+
+
+def test_failed_job():
+    """TEST 2: Handler errors end up in the job record"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 💥 FAILED JOB")
+    print("=" * 60)
+
+    def failing(query, job_id):
+        raise RuntimeError("Gemini unavailable")
+
+    manager = JobManager(handler=failing, max_workers=1)
+    job = wait_until_final(manager, manager.submit("price?")["job_id"])
+    assert job["status"] == "failed" and job["error"] == "Gemini unavailable"
+    assert manager.pending == 0
+    print(f"✅ Failed with: {job['error']}")
+
+
+def test_pending_limit():
+    """TEST 3: Submitting beyond max_pending raises Overloaded"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🚦 PENDING LIMIT")
+    print("=" * 60)
+
+    release = threading.Event()
+    manager = JobManager(handler=lambda query, job_id: release.wait(5) and "ok", max_workers=1, max_pending=2)
+    manager.submit("a")
+    manager.submit("b")
+    with pytest.raises(Overloaded) as error:
+        manager.submit("c")
+    release.set()
+    assert error.value.reason == "jobs_full"
+    print(f"✅ Rejected: {error.value}")
+
+
+def test_ttl_expiry():
+    """TEST 4: Finished jobs expire after ttl seconds"""
+    print("\n" + "=" * 60)
+    print("TEST 4: ⏱️  TTL EXPIRY")
+    print("=" * 60)
+
+    manager = JobManager(handler=lambda query, job_id: "ok", ttl=0.1)
+    job_id = manager.submit("a")["job_id"]
+    wait_until_final(manager, job_id)
+    time.sleep(0.2)
+    assert manager.get(job_id) is None
+    print("✅ Expired job no longer returned")
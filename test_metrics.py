@@ -0,0 +1,74 @@
+"""
+Diagnostic script to test the in-process metrics registry.
+This verifies: 1. Labelled counters, 2. Histogram quantiles, 3. Prometheus text output
+"""
+
+from metrics import Counter, Gauge, Histogram, render_prometheus
+
+
+def test_counter_labels():
+    """TEST 1: Counters are tracked per label value and reject wrong labels"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🔢 LABELLED COUNTER")
+    print("=" * 60)
+
+    counter = Counter("test_queries_total", "Test queries", ["category"])
+    counter.inc(category="product")
+    counter.inc(2, category="returns")
+
+    assert counter.value(category="product") == 1
+    assert counter.value(category="returns") == 2
+    try:
+        counter.inc(node="classifier")
+        assert False, "wrong label names must be rejected"
+    except ValueError:
+        pass
+    print(f"✅ Samples: {counter.samples()}")
+
+
+def test_histogram_quantile():
+    """TEST 2: Quantiles are estimated from bucket upper bounds"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 📈 HISTOGRAM QUANTILE")
+    print("=" * 60)
+
+    histogram = Histogram("test_latency_seconds", "Test latency", buckets=(0.1, 1, 10))
+    for value in [0.05] * 90 + [5] * 10:
+        histogram.observe(value)
+
+    assert histogram.count() == 100
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.95) == 10
+    print(f"✅ p50 <= {histogram.quantile(0.5)}s, p95 <= {histogram.quantile(0.95)}s")
+
+
+def test_prometheus_format():
+    """TEST 3: Metrics render in the Prometheus text format"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 📄 PROMETHEUS OUTPUT")
+    print("=" * 60)
+
+    gauge = Gauge("test_queue_depth", "Test queue depth")
+    gauge.set(4)
+    histogram = Histogram("test_node_seconds", "Test node time", ["node"], buckets=(1,))
+    histogram.observe(0.5, node="classifier")
+
+    text = render_prometheus()
+    assert "# TYPE test_queue_depth gauge" in text
+    assert "test_queue_depth 4" in text
+    assert 'test_node_seconds_bucket{node="classifier",le="1"} 1' in text
+    assert 'test_node_seconds_bucket{node="classifier",le="+Inf"} 1' in text
+    assert 'test_node_seconds_count{node="classifier"} 1' in text
+    print("✅ Prometheus text rendered correctly")
+
+
+def main():
+    """Run all metrics tests"""
+    test_counter_labels()
+    test_histogram_quantile()
+    test_prometheus_format()
+    print("\n✅ All metrics tests passed!")
+
+
+if __name__ == "__main__":
+    main()
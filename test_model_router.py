@@ -0,0 +1,59 @@
+"""
+Diagnostic script to test model cascade routing.
+This verifies: 1. Tier choice, 2. Answer self-check, 3. Retry on a stronger tier
+"""
+
+import graph
+from deadline import deadline_after
+from model_router import choose_answer_tier, model_for_tier, self_check
+from rag_chain import NO_INFORMATION_REPLY
+
+
+def test_choose_answer_tier():
+    """TEST 1: Comparisons go strong, short confident queries go lite"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🧭 TIER CHOICE")
+    print("=" * 60)
+
+    assert choose_answer_tier("Price of SmartWatch Pro X?", [0.9])[0] == "lite"
+    assert choose_answer_tier("Price of SmartWatch Pro X?", [0.4])[0] == "standard"
+    assert choose_answer_tier("Compare SmartWatch Pro X vs Fitness Band", [0.9])[0] == "strong"
+    assert choose_answer_tier(" ".join(["word"] * 40), [0.9])[0] == "strong"
+    print("✅ lite / standard / strong chosen as expected")
+
+
+def test_self_check():
+    """TEST 2: Empty answers and "no information" despite good context fail"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🔎 SELF-CHECK")
+    print("=" * 60)
+
+    assert self_check("₹15,999", [0.9]) is None
+    assert self_check("  ", [0.9]) == "empty"
+    assert self_check(NO_INFORMATION_REPLY, [0.9]) == "no_information_despite_context"
+    assert self_check(NO_INFORMATION_REPLY, [0.4]) is None
+    print("✅ Self-check verdicts correct")
+
+
+def test_retry_on_stronger_tier(monkeypatch):
+    """TEST 3: A lite answer failing the self-check is replaced by the standard tier's"""
+    print("\n" + "=" * 60)
+    print("TEST 3: ⬆️  CASCADE RETRY")
+    print("=" * 60)
+
+    models = []
+
+    def fake_generate_answer(query, context, deadline=None, model=None):
+        models.append(model)
+        return NO_INFORMATION_REPLY if model == model_for_tier("lite") else "₹15,999"
+
+    monkeypatch.setattr(graph, "generate_answer", fake_generate_answer)
+    state = graph.initial_state("Price of SmartWatch Pro X?", deadline=deadline_after(10))
+    state.update(category="product", scores=[0.9], context="Price: ₹15,999")
+
+    state = graph.rag_responder_node(state)
+
+    assert models == [model_for_tier("lite"), model_for_tier("standard")]
+    assert state["response"] == "₹15,999"
+    assert state["model_tier"] == "standard"
+    print(f"✅ Models called: {models}")
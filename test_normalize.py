@@ -0,0 +1,90 @@
+"""
+Diagnostic script to test query normalization.
+This verifies: 1. Trivial variants share one canonical form, 2. Typos in catalog names corrected,
+3. Variants of a query served from the same answer cache entry
+"""
+
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+import graph
+import normalize
+from normalize import build_vocabulary, canonicalize, correct_words
+
+
+CATALOG = (
+    "Product: SmartWatch Pro X\n"
+    "Price: ₹15,999 | Features: Heart rate, GPS, 7-day battery, water resistant 50m\n"
+    "\n"
+    "Product: Wireless Earbuds Elite\n"
+    "Price: ₹4,999 | Features: ANC, 24-hour battery, Bluetooth 5.2 | Warranty: 6 months\n"
+    "\n"
+    "Return Policy: 7-day no-questions-asked. Refund in 5-7 business days.\n"
+    "Support: Mon-Sat, 9AM-6PM IST | support@techgear.com\n"
+)
+
+
+def test_canonical_form():
+    """TEST 1: Case, punctuation, synonyms and currency spellings collapse to one form"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🔡 CANONICAL FORM")
+    print("=" * 60)
+
+    variants = ["Is the SmartWatch Pro X under ₹16,000?", "is the smart watch pro x under rs. 16000",
+                "IS THE SMART-WATCH PRO X UNDER 16,000 RUPEES??", "is  the smartwatch pro x under INR 16000"]
+    assert {canonicalize(variant) for variant in variants} == {"is the smartwatch pro x under ₹16000"}
+    assert canonicalize("Bluetooth 5.2, 22.5W charging & e-mail") == "bluetooth 5.2 22.5w charging email"
+    print(f"✅ {len(variants)} variants → {canonicalize(variants[0])!r}")
+
+
+def test_catalog_typos_corrected():
+    """TEST 2: Misspelled catalog words are corrected; ordinary words are left alone"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🩹 FUZZY CORRECTION")
+    print("=" * 60)
+
+    vocabulary = tuple(build_vocabulary(CATALOG))
+    assert "smartwatch" in vocabulary and "policy" in vocabulary
+
+    text, corrections = correct_words("price of smartwach pro x", vocabulary)
+    assert text == "price of smartwatch pro x" and corrections == ["smartwach→smartwatch"]
+    assert correct_words("wirless earbuds eliet", vocabulary)[0] == "wireless earbuds elite"
+    assert correct_words("how does the retrun polcy work", vocabulary)[0] == "how does the return policy work"
+
+    for text in ("tower of lower prices", "sport watch", "was my return returned"):
+        assert correct_words(text, vocabulary) == (text, []), text
+    print(f"✅ {corrections}")
+
+
+def test_variants_share_answer_cache(tmp_path, monkeypatch):
+    """TEST 3: A misspelled, differently written repeat is served from the cache"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🎯 CACHE HIT THROUGH NORMALIZATION")
+    print("=" * 60)
+
+    monkeypatch.setattr(normalize.settings, "database_path", str(tmp_path))
+    monkeypatch.setitem(normalize._vocabulary_state, "version", None)
+    monkeypatch.setitem(normalize._vocabulary_state, "words", ())
+    normalize._normalize.cache_clear()
+    normalize.refresh_vocabulary(CATALOG)
+
+    generated = []
+    chunk = Document(page_content="Product: SmartWatch Pro X\nFeatures: Heart rate, GPS")
+    monkeypatch.setattr(graph, "get_classifier_llm", lambda: SimpleNamespace(
+        invoke=lambda prompt: SimpleNamespace(content='"product"')))
+    monkeypatch.setattr(graph, "retrieve", lambda query, deadline=None: [(chunk, 0.9)])
+    monkeypatch.setattr(graph, "generate_answer",
+                        lambda query, context, deadline=None, model=None: generated.append(query) or "It has GPS.")
+    monkeypatch.setattr(graph.settings, "relevance_threshold", 0.3)
+
+    hits = normalize.normalization_hits_total.value(layer="answer_cache")
+    first = graph.process_query("Normalize test: does the SmartWatch Pro X have GPS?")
+    second = graph.process_query("normalize test - does the smart watch pro x have gps")
+    third = graph.process_query("normalize test: does the smartwach pro x have GPS")
+    normalize._normalize.cache_clear()
+
+    assert first == second == third == "It has GPS."
+    assert generated == ["Normalize test: does the SmartWatch Pro X have GPS?"]
+    assert normalize.normalization_hits_total.value(layer="answer_cache") == hits + 2
+    print(f"✅ 3 variants, {len(generated)} LLM answer")
@@ -0,0 +1,94 @@
+"""
+Diagnostic script to test local reranking of retrieved chunks.
+This verifies: 1. Lexical reranking, 2. MMR diversity, 3. Custom rerankers,
+4. The RERANKER setting ("none" and unknown names)
+"""
+
+import pytest
+from langchain_core.documents import Document
+
+import rag_chain
+import reranking
+from reranking import RERANKERS, lexical_rerank, mmr_rerank, register_reranker, rerank
+
+
+def doc(text: str) -> Document:
+    return Document(page_content=text)
+
+
+WATCH = doc("Product: SmartWatch Pro X\nPrice: ₹15,999 | Features: Heart rate, GPS, 7-day battery")
+EARBUDS = doc("Product: Wireless Earbuds Elite\nPrice: ₹4,999 | Features: ANC, 24-hour battery")
+RETURNS = doc("Return Policy: 7-day no-questions-asked. Refund in 5-7 business days.")
+
+
+def test_lexical_rerank_promotes_overlap():
+    """TEST 1: The chunk sharing the most query words moves to the top; top_n truncates"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🔤 LEXICAL RERANKING")
+    print("=" * 60)
+
+    # Vector search ranked the watch chunk last
+    candidates = [(RETURNS, 0.62), (EARBUDS, 0.61), (WATCH, 0.60)]
+    ranked = lexical_rerank("What is the price of SmartWatch Pro X?", candidates, top_n=2)
+
+    assert [d for d, _ in ranked] == [WATCH, EARBUDS]
+    assert ranked[0][1] == 0.60                          # The vector relevance is kept as score
+    assert len(rerank("SmartWatch price", candidates, top_n=1)) == 1
+    print(f"✅ Top chunk: {ranked[0][0].page_content.splitlines()[0]!r}")
+
+
+def test_mmr_removes_near_duplicates():
+    """TEST 2: MMR skips a chunk that repeats one already picked"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🧬 MMR DIVERSITY")
+    print("=" * 60)
+
+    duplicate = doc(WATCH.page_content + "\n")
+    candidates = [(WATCH, 0.9), (duplicate, 0.89), (EARBUDS, 0.7)]
+    query = "SmartWatch Pro X battery"
+
+    assert [d for d, _ in lexical_rerank(query, candidates, top_n=2)] == [WATCH, duplicate]
+    assert [d for d, _ in mmr_rerank(query, candidates, top_n=2, diversity=0.5)] == [WATCH, EARBUDS]
+    print("✅ Near-duplicate replaced by the next different chunk")
+
+
+def test_registered_reranker_is_used(monkeypatch):
+    """TEST 3: A reranker added with register_reranker() is selectable by name"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🧩 CUSTOM RERANKER")
+    print("=" * 60)
+
+    monkeypatch.setattr(reranking, "RERANKERS", dict(RERANKERS))
+    calls = []
+
+    def reverse(query, docs_and_scores, top_n):
+        calls.append(query)
+        return list(reversed(docs_and_scores))[:top_n]
+
+    register_reranker("reverse", reverse)
+    candidates = [(WATCH, 0.9), (EARBUDS, 0.8), (RETURNS, 0.7)]
+    assert rerank("price", candidates, top_n=2, reranker="reverse") == [(RETURNS, 0.7), (EARBUDS, 0.8)]
+    assert calls == ["price"]
+    assert reranking.rerank_seconds.count(reranker="reverse") == 1
+    print("✅ Custom reranker called and timed")
+
+
+def test_reranker_setting(monkeypatch):
+    """TEST 4: "none" keeps the vector order (retriever_k chunks); unknown names are rejected"""
+    print("\n" + "=" * 60)
+    print("TEST 4: ⚙️  RERANKER SETTING")
+    print("=" * 60)
+
+    candidates = [(RETURNS, 0.62), (EARBUDS, 0.61), (WATCH, 0.60)]
+    monkeypatch.setattr(rag_chain.settings, "reranker", "none")
+    monkeypatch.setattr(rag_chain.settings, "retriever_k", 2)
+    assert rag_chain.candidate_count() == 2
+    assert rag_chain.select_chunks("SmartWatch price", candidates) == candidates[:2]
+
+    monkeypatch.setattr(rag_chain.settings, "reranker", "lexical")
+    monkeypatch.setattr(rag_chain.settings, "rerank_top_n", 1)
+    assert rag_chain.select_chunks("SmartWatch price", candidates) == [(WATCH, 0.60)]
+
+    with pytest.raises(ValueError, match="Unknown reranker"):
+        rerank("price", candidates, top_n=1, reranker="missing")
+    print("✅ none → vector order, lexical → reranked, unknown → ValueError")
@@ -0,0 +1,157 @@
+"""
+Diagnostic script to test the resilience layer for Gemini calls.
+This verifies: 1. Circuit breaker states, 2. Retry budget, 3. Hedged requests,
+4. Graph fallback while a breaker is open, 5. Per-item breaker accounting in batch answers
+"""
+
+import itertools
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import graph
+import rag_chain
+import resilience
+from deadline import deadline_after
+from model_router import model_for_tier
+from extractive import EXTRACTIVE_REPLY_PREFIX
+from resilience import CircuitBreaker, CircuitOpen, RetryBudget, hedges_total, resilient_call
+
+
+def test_circuit_breaker():
+    """TEST 1: closed → open after failures → half-open probe → closed"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 🔌 CIRCUIT BREAKER")
+    print("=" * 60)
+
+    breaker = CircuitBreaker("test_breaker", failure_threshold=2, recovery_time=0.1)
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    time.sleep(0.15)
+    breaker.before_call()                     # The probe
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()                 # Only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+    print("✅ closed → open → half_open → closed")
+
+
+def test_retry_budget(monkeypatch):
+    """TEST 2: Transient failures are retried while the budget lasts"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 💰 RETRY BUDGET")
+    print("=" * 60)
+
+    budget = RetryBudget(ratio=0.0, min_per_second=0.0, max_tokens=1)
+    assert budget.withdraw() is True
+    assert budget.withdraw() is False
+
+    monkeypatch.setattr(resilience, "retry_budget", RetryBudget(ratio=0.0, min_per_second=0.0, max_tokens=1))
+    monkeypatch.setattr(resilience.settings, "upstream_retry_backoff", 0.0)
+    attempts = itertools.count(1)
+
+    def flaky():
+        if next(attempts) % 2:
+            raise ConnectionError("503 from Gemini")
+        return "ok"
+
+    assert resilient_call("test_retry", flaky) == "ok"           # Retried once, budget now empty
+    with pytest.raises(ConnectionError):
+        resilient_call("test_retry", flaky)                       # Retry denied
+
+    # A retry whose backoff does not fit before the deadline is not made (budget available again)
+    monkeypatch.setattr(resilience, "retry_budget", RetryBudget(ratio=0.0, min_per_second=0.0, max_tokens=1))
+    monkeypatch.setattr(resilience.settings, "upstream_retry_backoff", 1.0)
+    attempts = itertools.count(1)
+    with pytest.raises(ConnectionError):
+        resilient_call("test_retry", flaky, deadline=deadline_after(0.2))
+    assert next(attempts) == 2                                    # Only the first call was made
+    assert resilience.retries_total.value(dependency="test_retry", outcome="no_time") == 1
+    print("✅ First failure retried, second one denied by the budget, none past the deadline")
+
+
+def test_hedged_request(monkeypatch):
+    """TEST 3: A call slower than p95 is hedged and the faster copy wins"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🏁 HEDGED REQUESTS")
+    print("=" * 60)
+
+    for _ in range(20):
+        resilience.upstream_call_seconds.observe(0.01, dependency="test_hedge")
+    monkeypatch.setattr(resilience.settings, "hedge_min_delay", 0.0)
+    calls = itertools.count()
+    lock = threading.Lock()
+
+    def sometimes_slow():
+        with lock:
+            call = next(calls)
+        time.sleep(1.0 if call == 0 else 0.0)
+        return f"call {call}"
+
+    start = time.monotonic()
+    assert resilient_call("test_hedge", sometimes_slow, hedge=True) == "call 1"
+    assert time.monotonic() - start < 0.5
+    assert hedges_total.value(dependency="test_hedge", outcome="won") == 1
+    print(f"✅ Hedge won after {time.monotonic() - start:.2f}s")
+
+
+def test_answer_falls_back_when_circuit_open(monkeypatch):
+    """TEST 4: An open breaker on the answer model gives an extractive answer"""
+    print("\n" + "=" * 60)
+    print("TEST 4: 🛟 FALLBACK ANSWER")
+    print("=" * 60)
+
+    monkeypatch.setattr(rag_chain, "get_llm", lambda model=None: FakeListChatModel(responses=["not called"]))
+    breaker = resilience.get_breaker(f"gemini:{model_for_tier('standard')}")
+    monkeypatch.setattr(breaker, "state", "open")
+    monkeypatch.setattr(breaker, "_changed_at", time.monotonic())
+
+    state = graph.initial_state("What is the price of SmartWatch Pro X?", deadline=deadline_after(10))
+    state.update(category="product", scores=[0.5], context="Price: ₹15,999")
+    state = graph.rag_responder_node(state)
+
+    assert state["response"].startswith(EXTRACTIVE_REPLY_PREFIX)
+    assert state["degraded"] == "answer_circuit_open"
+    print(f"✅ {state['response']!r}")
+
+
+def test_batch_answers_use_per_item_breaker(monkeypatch):
+    """TEST 5: A long healthy batch never opens the breaker; an open breaker fails items, not the call"""
+    print("\n" + "=" * 60)
+    print("TEST 5: 📦 BATCH BREAKER ACCOUNTING")
+    print("=" * 60)
+
+    class SlowChain:
+        def invoke(self, inputs):
+            time.sleep(0.02)
+            return f"answer to {inputs['question']}"
+
+    monkeypatch.setattr(rag_chain, "get_answer_chain", lambda model=None: SlowChain())
+    monkeypatch.setattr(rag_chain, "retrieve_many", lambda queries: [[(Document(page_content=q), 0.9)] for q in queries])
+    monkeypatch.setattr(rag_chain.settings, "relevance_threshold", 0.3)
+    monkeypatch.setattr(resilience.settings, "breaker_slow_call_seconds", 0.05)
+    monkeypatch.setattr(resilience, "_breakers", {})
+
+    queries = [f"question {i}" for i in range(8)]
+    for _ in range(6):
+        results = rag_chain.answer_queries(queries, max_concurrency=2)
+        assert all(result["error"] is None for result in results)
+    breaker = resilience.get_breaker(f"gemini:{rag_chain.settings.llm_model}")
+    assert breaker.state == "closed"
+
+    monkeypatch.setattr(breaker, "state", "open")
+    monkeypatch.setattr(breaker, "_changed_at", time.monotonic())
+    results = rag_chain.answer_queries(queries[:2])
+    assert [result["answer"] for result in results] == [None, None]
+    assert all("open" in result["error"].lower() for result in results)
+    print(f"✅ Breaker {breaker.state!r} after 6 batches; open breaker → {results[0]['error']!r}")
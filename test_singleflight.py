@@ -0,0 +1,139 @@
+"""
+Diagnostic script to test single-flight coalescing of identical queries.
+This verifies: 1. One execution per key, 2. Shared errors, 3. Coalescing in process_query,
+4. Followers bounded by their own deadline
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import graph
+from deadline import DeadlineExceeded, deadline_after
+from singleflight import SingleFlight, singleflight_calls_total
+
+
+def test_one_execution_per_key():
+    """TEST 1: Concurrent callers of one key share a single execution"""
+    print("\n" + "=" * 60)
+    print("TEST 1: ✈️  ONE EXECUTION PER KEY")
+    print("=" * 60)
+
+    flight = SingleFlight("test_one")
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        # Stay in flight until the other 7 callers have joined (however slowly their threads start)
+        give_up = time.monotonic() + 5
+        while singleflight_calls_total.value(name="test_one", role="follower") < 7 and time.monotonic() < give_up:
+            time.sleep(0.01)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do("key", slow, 21), range(8)))
+
+    assert calls == [21]
+    assert all(result == 42 for result, _ in results)
+    assert sum(shared for _, shared in results) == 7
+    assert singleflight_calls_total.value(name="test_one", role="follower") == 7
+    assert flight.in_flight == 0
+
+    # Nothing is remembered: the next call runs again
+    assert flight.do("key", slow, 1) == (2, False)
+    print("✅ 8 callers, 1 execution (7 saved calls)")
+
+
+def test_errors_are_shared():
+    """TEST 2: A failing leader fails its followers with the same error"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 💥 SHARED ERRORS")
+    print("=" * 60)
+
+    flight = SingleFlight("test_errors")
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("Gemini unavailable")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait(1)
+        follower = pool.submit(flight.do, "key", failing)
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="Gemini unavailable"):
+                future.result()
+
+    assert singleflight_calls_total.value(name="test_errors", role="leader") == 1
+    print("✅ Leader and follower both failed")
+
+
+def test_process_query_coalesces(monkeypatch):
+    """TEST 3: Identical in-flight queries (after normalization) run the graph once"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🤝 COALESCED GRAPH RUNS")
+    print("=" * 60)
+
+    runs = []
+
+    class SlowGraph:
+        def invoke(self, state):
+            runs.append(state["query"])
+            time.sleep(0.2)
+            return {**state, "response": "₹15,999"}
+
+    monkeypatch.setattr(graph, "get_graph", lambda: SlowGraph())
+    queries = ["coalesce: price of SmartWatch?", "Coalesce:  price of SmartWatch? ", "COALESCE: PRICE OF SMARTWATCH?"]
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        responses = list(pool.map(graph.process_query, queries * 2))
+
+    assert len(runs) == 1
+    assert responses == ["₹15,999"] * 6
+    print(f"✅ 6 requests, {len(runs)} graph run")
+
+
+def test_follower_stops_at_own_deadline(monkeypatch):
+    """TEST 4: A follower with a short deadline does not wait for a slow leader"""
+    print("\n" + "=" * 60)
+    print("TEST 4: ⏱️  FOLLOWER DEADLINE")
+    print("=" * 60)
+
+    flight = SingleFlight("test_timeout")
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.5)
+        return "leader"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", slow)
+        started.wait(1)
+        with pytest.raises(DeadlineExceeded):
+            flight.do("key", slow, timeout=0.05)
+        assert leader.result() == ("leader", False)
+
+    class SlowGraph:
+        def invoke(self, state):
+            started.set()
+            time.sleep(0.5)
+            return {**state, "response": "₹15,999"}
+
+    monkeypatch.setattr(graph, "get_graph", lambda: SlowGraph())
+    started.clear()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(graph.process_query, "follower deadline: price of SmartWatch?")
+        started.wait(1)
+        start = time.monotonic()
+        response = graph.process_query("follower deadline: price of SmartWatch?", deadline=deadline_after(0.1))
+        waited = time.monotonic() - start
+        assert leader.result() == "₹15,999"
+
+    assert waited < 0.3
+    assert response.startswith("Your query has been escalated")
+    print(f"✅ Follower escalated after {waited:.2f}s, leader still answered")
@@ -0,0 +1,88 @@
+"""
+Diagnostic script to test the startup warm-up and readiness tracking.
+This verifies: 1. Top-queries file parsing, 2. Readiness before and after warm-up,
+3. Not ready while a model is unavailable
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import graph
+import resilience
+import warmup
+
+
+def test_load_top_queries(tmp_path):
+    """TEST 1: One query per line, comments and blank lines skipped"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 📄 TOP QUERIES FILE")
+    print("=" * 60)
+
+    path = tmp_path / "top_queries.txt"
+    path.write_text("# header\nWhat is the price?\n\nWhat is the return policy?\n", encoding="utf-8")
+
+    assert warmup.load_top_queries(str(path)) == ["What is the price?", "What is the return policy?"]
+    assert warmup.load_top_queries(str(tmp_path / "missing.txt")) == []
+    print("✅ Parsed 2 queries")
+
+
+def test_readiness(monkeypatch):
+    """TEST 2: Not ready while warm-up fails, ready once it succeeds and the index has documents"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🚦 READINESS")
+    print("=" * 60)
+
+    def failing_warm_up():
+        raise RuntimeError("index is empty")
+
+    monkeypatch.setattr(warmup, "warm_up", failing_warm_up)
+    readiness = warmup.Readiness()
+    readiness.start()
+    assert readiness.wait(5) is False
+    report = readiness.check()
+    assert report["ready"] is False and "index is empty" in report["error"]
+    readiness.wait(5)
+    print(f"⚠️  Not ready: {report['error']}")
+
+    monkeypatch.setattr(warmup, "warm_up", lambda: None)
+    monkeypatch.setattr(warmup, "index_size", lambda: 42)
+    readiness.start()
+    assert readiness.wait(5) is True
+    report = readiness.check()
+    assert report == {"ready": True, "warmed_up": True, "index_documents": 42, "error": None}
+    print(f"✅ Ready: {report}")
+
+
+def test_not_ready_without_models(monkeypatch):
+    """TEST 3: An open model circuit breaker or a failed synthetic query means not ready"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🔌 MODELS UNAVAILABLE")
+    print("=" * 60)
+
+    monkeypatch.setattr(warmup, "warm_up", lambda: None)
+    monkeypatch.setattr(warmup, "index_size", lambda: 42)
+    readiness = warmup.Readiness()
+    readiness.start()
+    assert readiness.wait(5) is True
+
+    breaker = resilience.get_breaker(f"gemini:{warmup.settings.llm_model}")
+    monkeypatch.setattr(breaker, "state", "open")
+    monkeypatch.setattr(breaker, "_changed_at", time.monotonic())
+    report = readiness.check()
+    assert report["ready"] is False and f"gemini:{warmup.settings.llm_model}" in report["error"]
+    print(f"⚠️  Not ready: {report['error']}")
+
+    monkeypatch.setattr(breaker, "state", "closed")
+    assert readiness.check()["ready"] is True
+
+    # The synthetic query is escalated (e.g. the classifier model fails): warm-up fails
+    def failing_llm(prompt):
+        raise RuntimeError("API key not valid")
+
+    monkeypatch.setattr(graph, "get_classifier_llm", lambda: SimpleNamespace(invoke=failing_llm))
+    monkeypatch.setattr(graph.settings, "upstream_max_retries", 0)
+    with pytest.raises(RuntimeError, match="Synthetic query not answered"):
+        warmup.run_synthetic_query("Warm-up test: what is the price of the SmartWatch Pro X?")
+    print("✅ Open breaker and failed synthetic query both reported")
@@ -0,0 +1,138 @@
+"""
+Diagnostic script to test the /ws/chat WebSocket.
+This verifies: 1. Progress → token → answer events in order, 2. Error frames,
+3. A client disconnecting mid-answer stops the graph run, then frees its admission slot
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from admission import AdmissionController
+
+
+EVENTS = [
+    {"type": "progress", "stage": "classified", "category": "product"},
+    {"type": "progress", "stage": "retrieved", "chunks": 2, "best_score": 0.81},
+    {"type": "progress", "stage": "generating"},
+    {"type": "token", "text": "The price is"},
+    {"type": "token", "text": " ₹15,999"},
+    {"type": "answer", "response": "The price is ₹15,999", "category": "product", "cached": False, "degraded": ""},
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """A test client with its own admission slots and no rate limit."""
+    monkeypatch.setattr(api, "admission", AdmissionController(max_concurrent=2, max_queue=2, queue_timeout=1.0))
+    monkeypatch.setattr(api.rate_limiter, "check", lambda client: None)
+    return TestClient(api.app)
+
+
+def test_events_in_order(client, monkeypatch):
+    """TEST 1: Every query gets its progress, token and answer events, tagged with its id"""
+    print("\n" + "=" * 60)
+    print("TEST 1: 📡 EVENT ORDER")
+    print("=" * 60)
+
+    calls = []
+
+    def stream_query(query, request_id, deadline, session_id):
+        calls.append((query, session_id))
+        yield from EVENTS
+
+    monkeypatch.setattr(api, "stream_query", stream_query)
+
+    with client.websocket_connect("/ws/chat") as websocket:
+        for message_id, session_id in (("1", None), ("2", "session-1")):
+            websocket.send_json({"id": message_id, "query": "What is the price of SmartWatch Pro X?",
+                                 "session_id": session_id})
+            frames = [websocket.receive_json() for _ in EVENTS]
+
+            assert [{k: v for k, v in frame.items() if k not in ("id", "request_id")} for frame in frames] == EVENTS
+            assert {frame["id"] for frame in frames} == {message_id}
+            assert len({frame["request_id"] for frame in frames}) == 1
+
+    assert calls == [("What is the price of SmartWatch Pro X?", None),
+                     ("What is the price of SmartWatch Pro X?", "session-1")]
+    print(f"✅ {[frame.get('stage') or frame['type'] for frame in frames]}")
+
+
+def test_error_frames(client, monkeypatch):
+    """TEST 2: Bad messages and failed queries get an error frame; the connection stays open"""
+    print("\n" + "=" * 60)
+    print("TEST 2: 🚫 ERROR FRAMES")
+    print("=" * 60)
+
+    def stream_query(query, request_id, deadline, session_id):
+        if query == "boom":
+            raise RuntimeError("Gemini unavailable")
+        yield EVENTS[-1]
+
+    monkeypatch.setattr(api, "stream_query", stream_query)
+
+    with client.websocket_connect("/ws/chat") as websocket:
+        websocket.send_text("not json")
+        assert websocket.receive_json() == {"type": "error", "status": 400, "detail": "Messages must be JSON."}
+
+        websocket.send_json({"id": "1", "query": "  "})
+        error = websocket.receive_json()
+        assert error["id"] == "1" and error["status"] == 400 and error["detail"] == "Query cannot be empty."
+
+        websocket.send_json({"id": "2", "query": "boom"})
+        error = websocket.receive_json()
+        assert error["id"] == "2" and error["status"] == 500 and "Gemini unavailable" in error["detail"]
+
+        websocket.send_json({"id": "3", "query": "What is the return policy?"})
+        assert websocket.receive_json()["type"] == "answer"
+    print("✅ 400 (not JSON), 400 (empty), 500 (failed query), then answered")
+
+
+def test_disconnect_mid_answer(client, monkeypatch):
+    """TEST 3: A client leaving mid-answer stops the graph run; the slot is held until it stopped"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 🔌 CLIENT DISCONNECT")
+    print("=" * 60)
+
+    closed = threading.Event()
+    progress = {"produced": 0, "finished": False, "in_flight_at_close": None}
+
+    def stream_query(query, request_id, deadline, session_id):
+        try:
+            for event in EVENTS:
+                progress["produced"] += 1
+                yield event
+                time.sleep(0.05)
+            progress["finished"] = True
+        finally:
+            progress["in_flight_at_close"] = api.admission.in_flight
+            closed.set()
+
+    # The client is gone once the server sends the "retrieved" event
+    send_json = api.WebSocket.send_json
+
+    async def disconnecting_send_json(websocket, data, mode="text"):
+        if data.get("stage") == "retrieved":
+            raise api.WebSocketDisconnect(1001)
+        await send_json(websocket, data, mode)
+
+    monkeypatch.setattr(api, "stream_query", stream_query)
+    monkeypatch.setattr(api.WebSocket, "send_json", disconnecting_send_json)
+    errors = api.errors_total.value(component="api")
+
+    with client.websocket_connect("/ws/chat") as websocket:
+        websocket.send_json({"id": "1", "query": "What is the price of SmartWatch Pro X?"})
+        assert websocket.receive_json()["stage"] == "classified"
+        assert closed.wait(timeout=5)
+
+    assert progress["finished"] is False and progress["produced"] < len(EVENTS)
+    assert progress["in_flight_at_close"] == 1          # Slot still held while the graph thread ran
+    deadline = time.monotonic() + 5
+    while api.admission.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert api.admission.in_flight == 0
+    assert api.errors_total.value(component="api") == errors
+    print(f"✅ Graph run stopped after {progress['produced']} of {len(EVENTS)} events, slot released")
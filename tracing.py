@@ -0,0 +1,302 @@
+"""
+Lightweight per-request tracing.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+Metrics tell us that SOME requests are slow. A trace tells us where the time
+went for ONE request: classifier LLM, embedding, Chromadb, answer LLM, ...
+
+Each request gets a TRACE (identified by its request ID). Inside it we record
+SPANS: named, timed sections of work that can be nested:
+
+    process_query (1450 ms)
+    ├── classifier (420 ms)          attributes: category="product"
+    ├── retriever (180 ms)
+    │   ├── embed (150 ms)           attributes: cache_hits=0
+    │   └── vector_search (25 ms)    attributes: k=20
+    └── rag_responder (850 ms)
+        └── llm_generate (845 ms)    attributes: prompt_tokens=96
+
+A sample of traces (plus every slow one) is written as one JSON object per line
+to a rotating file (settings.trace_file).
+
+Usage:
+    with start_trace("req-123", query="..."):
+        with span("embed", k=3):
+            set_attribute("cache_hits", 1)
+
+Summarize collected traces:
+    python tracing.py summarize
+    python tracing.py summarize --file traces/traces.jsonl
+"""
+
+import argparse
+import contextvars
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Optional
+
+from config import settings
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+_trace_logger: Optional[logging.Logger] = None
+_trace_logger_lock = threading.Lock()
+
+
+def new_request_id() -> str:
+    """Generate a new random request ID."""
+    return uuid.uuid4().hex[:16]
+
+
+def current_request_id() -> Optional[str]:
+    """Request ID of the trace active in this context (None outside a request)."""
+    trace = _current_trace.get()
+    return trace["trace_id"] if trace else None
+
+
+def _writer() -> logging.Logger:
+    """Logger that appends one JSON line per trace to a size-rotated file."""
+    global _trace_logger
+    with _trace_logger_lock:
+        if _trace_logger is None:
+            os.makedirs(os.path.dirname(settings.trace_file) or ".", exist_ok=True)
+            handler = RotatingFileHandler(
+                settings.trace_file,
+                maxBytes=settings.trace_max_bytes,
+                backupCount=settings.trace_backup_count,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("techgear.traces")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _trace_logger = logger
+    return _trace_logger
+
+
+@contextmanager
+def start_trace(request_id: Optional[str] = None, name: str = "request", **attributes):
+    """
+    Start a trace for one request; it becomes the root span.
+
+    When the block exits, the trace is written to the trace file if it was
+    sampled (settings.trace_sample_rate) or slower than settings.trace_slow_ms.
+
+    Args:
+        request_id (str): ID to use (a new one is generated if missing)
+        name (str): Name of the root span
+        **attributes: Attributes of the root span
+
+    Yields:
+        dict: The trace record
+    """
+    trace = {
+        "trace_id": request_id or new_request_id(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "spans": [],
+        "_t0": time.perf_counter(),
+        "_ids": itertools.count(),
+    }
+    trace_token = _current_trace.set(trace)
+    try:
+        with span(name, **attributes):
+            yield trace
+    finally:
+        _current_trace.reset(trace_token)
+        _finish(trace)
+
+
+def _finish(trace: dict) -> None:
+    if not settings.trace_enabled or not trace["spans"]:
+        return
+
+    root = trace["spans"][0]
+    sampled = random.random() < settings.trace_sample_rate
+    slow = root["duration_ms"] >= settings.trace_slow_ms
+    if not (sampled or slow):
+        return
+
+    record = {
+        "trace_id": trace["trace_id"],
+        "timestamp": trace["timestamp"],
+        "duration_ms": root["duration_ms"],
+        "spans": trace["spans"],
+    }
+    try:
+        _writer().info(json.dumps(record, default=str, ensure_ascii=False))
+    except OSError:
+        pass  # Tracing must never break request handling
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Record a timed, nested section of work inside the current trace.
+
+    Outside of a trace this does nothing (so CLI scripts work unchanged).
+
+    Args:
+        name (str): Span name, e.g. "embed" or "classifier"
+        **attributes: Initial span attributes
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    record = {
+        "id": next(trace["_ids"]),
+        "parent": parent["id"] if parent else None,
+        "name": name,
+        "start_ms": round((time.perf_counter() - trace["_t0"]) * 1000, 3),
+        "duration_ms": None,
+        "attributes": dict(attributes),
+    }
+    trace["spans"].append(record)
+    span_token = _current_span.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["attributes"]["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        _current_span.reset(span_token)
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Attach an attribute to the innermost active span (no-op outside a trace)."""
+    record = _current_span.get()
+    if record is not None:
+        record["attributes"][key] = value
+
+
+# ============================================================================
+# TRACE SUMMARY CLI
+# ============================================================================
+
+def load_traces(path: str) -> list[dict]:
+    """Read traces from `path` and its rotated backups (path.1, path.2, ...)."""
+    traces = []
+    paths = [path] + [f"{path}.{i}" for i in range(1, settings.trace_backup_count + 1)]
+    for file_path in paths:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    try:
+                        traces.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+    return traces
+
+
+def critical_path(spans: list[dict]) -> dict[str, float]:
+    """
+    Split a trace's wall-clock time into the spans on its critical path.
+
+    Starting at the root, walk backwards from the end of each span through the
+    child that finished last, then the child that finished before that one
+    started, and so on. Time not covered by any child is the span's "self" time.
+
+    Returns:
+        dict[str, float]: {span name: milliseconds on the critical path}
+    """
+    children: dict[Optional[int], list[dict]] = {}
+    for record in spans:
+        children.setdefault(record["parent"], []).append(record)
+
+    breakdown: dict[str, float] = {}
+
+    def walk(record: dict) -> None:
+        end = record["start_ms"] + (record["duration_ms"] or 0)
+        covered = 0.0
+        for child in sorted(children.get(record["id"], []), key=lambda c: c["start_ms"] + (c["duration_ms"] or 0), reverse=True):
+            child_end = child["start_ms"] + (child["duration_ms"] or 0)
+            if child_end <= end + 1e-6:
+                walk(child)
+                covered += child["duration_ms"] or 0
+                end = child["start_ms"]
+        own = max((record["duration_ms"] or 0) - covered, 0.0)
+        breakdown[record["name"]] = breakdown.get(record["name"], 0.0) + own
+
+    for root in children.get(None, []):
+        walk(root)
+    return breakdown
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(traces: list[dict]) -> str:
+    """Build the percentile table and critical-path breakdown for `traces`."""
+    durations: dict[str, list[float]] = {}
+    critical: dict[str, float] = {}
+    total = 0.0
+
+    for trace in traces:
+        total += trace["duration_ms"]
+        for record in trace["spans"]:
+            durations.setdefault(record["name"], []).append(record["duration_ms"] or 0)
+        for name, ms in critical_path(trace["spans"]).items():
+            critical[name] = critical.get(name, 0.0) + ms
+
+    lines = [f"📊 {len(traces)} traces", ""]
+    lines.append(f"{'span':<22}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    lines.append("─" * 69)
+    for name, values in sorted(durations.items(), key=lambda item: -percentile(item[1], 95)):
+        lines.append(
+            f"{name:<22}{len(values):>7}{percentile(values, 50):>10.1f}"
+            f"{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}{max(values):>10.1f}"
+        )
+
+    lines += ["", "⛓️  Critical path (share of total request time)", "─" * 69]
+    for name, ms in sorted(critical.items(), key=lambda item: -item[1]):
+        share = ms / total if total else 0.0
+        lines.append(f"{name:<22}{ms / max(len(traces), 1):>10.1f} ms/req {share:>8.1%}")
+
+    return "\n".join(lines)
+
+
+def main():
+    """Command-line entry point: python tracing.py summarize [--file PATH]"""
+    parser = argparse.ArgumentParser(description="Summarize request traces")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summarize_parser = subparsers.add_parser("summarize", help="Percentile table and critical-path breakdown")
+    summarize_parser.add_argument("--file", default=settings.trace_file, help="Trace JSONL file")
+    args = parser.parse_args()
+
+    traces = load_traces(args.file)
+    if not traces:
+        print(f"❌ No traces found in {args.file}")
+        return
+
+    print(summarize(traces))
+
+
+if __name__ == "__main__":
+    main()
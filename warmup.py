@@ -0,0 +1,199 @@
+"""
+Startup warm-up and readiness tracking for the API.
+
+EXPLANATION FOR BEGINNERS:
+==========================
+The first request after a deploy used to pay every "cold" cost at once:
+opening Chromadb, creating the Gemini clients and compiling the LangGraph
+workflow. warm_up() pays those costs at startup instead:
+
+  1. Preload the vector store, the Gemini clients and the compiled graph
+  2. Optionally run one synthetic query end to end (settings.warmup_query),
+     which proves the models and the API key really work: the warm-up fails
+     if the query is escalated or answered on a degraded path
+  3. Optionally pre-fill the query embedding cache with the most frequent
+     questions (settings.warmup_top_queries_file, one query per line)
+
+Two kinds of health checks use the result:
+  - LIVENESS  (/livez):  "is the process alive?" - always yes if it answers
+  - READINESS (/readyz): "should this worker get traffic?" - only after the
+    warm-up succeeded AND the index actually contains documents AND the
+    circuit breakers of the embedding and answer models are not open
+
+Load balancers and Docker route traffic only to ready workers, so users
+never hit a cold one.
+"""
+
+import os
+import threading
+import time
+from typing import Optional, TypedDict
+
+from config import settings
+from graph import get_classifier_llm, get_graph, initial_state, normalize_query
+from logging_config import get_logger
+from model_router import TIERS, model_for_tier
+from metrics import Gauge, Histogram
+from rag_chain import embed_queries, get_answer_chain, get_embeddings, get_llm, get_vector_store
+from resilience import get_breaker
+
+
+logger = get_logger("warmup")
+
+warmup_seconds = Histogram(
+    "warmup_seconds", "Duration of each startup warm-up step", ["step"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+ready_gauge = Gauge("api_ready", "1 when this worker is warmed up and ready for traffic")
+
+
+class ReadinessReport(TypedDict):
+    """
+    Result of Readiness.check().
+
+    Attributes:
+        ready (bool): True if the worker should receive traffic
+        warmed_up (bool): True once warm_up() completed successfully
+        index_documents (int): Chunks in the Chromadb collection (0 if unavailable)
+        error (str | None): Why the worker is not ready
+    """
+    ready: bool
+    warmed_up: bool
+    index_documents: int
+    error: Optional[str]
+
+
+def load_top_queries(path: str) -> list[str]:
+    """Read one query per line from `path` (blank lines and # comments skipped)."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith("#")]
+
+
+def preload() -> None:
+    """Create every shared component once: vector store, Gemini clients (all tiers), compiled graph."""
+    with warmup_seconds.time(step="preload"):
+        get_embeddings()
+        get_vector_store()
+        for tier in TIERS:
+            get_llm(model_for_tier(tier))
+        get_answer_chain()
+        get_classifier_llm()
+        get_graph()
+
+
+def index_size() -> int:
+    """Number of chunks in the Chromadb collection (a cheap local query)."""
+    return get_vector_store()._collection.count()
+
+
+def unavailable_models() -> list[str]:
+    """Model dependencies whose circuit breaker is open (embedding and default answer model)."""
+    dependencies = ["gemini:embedding", f"gemini:{settings.llm_model}"]
+    return [dependency for dependency in dependencies if get_breaker(dependency).is_open()]
+
+
+def run_synthetic_query(query: str) -> None:
+    """Answer `query` through the graph; raises if the models did not answer it."""
+    state = get_graph().invoke(initial_state(query))
+    failure = state["error"] or state["degraded"] or state["escalation_reason"]
+    if failure:
+        raise RuntimeError(f"Synthetic query not answered by the models: {failure}")
+
+
+def warm_up() -> None:
+    """
+    Run every warm-up step; raises if the worker cannot serve traffic.
+
+    Steps:
+    1. Preload shared components
+    2. Check that the index contains documents
+    3. Pre-fill the embedding cache from the top-queries file (if any)
+    4. Run the synthetic query end to end (if configured)
+    """
+    start = time.perf_counter()
+    preload()
+
+    documents = index_size()
+    if documents == 0:
+        raise RuntimeError("Chromadb index is empty - run ingest.py first")
+
+    top_queries = load_top_queries(settings.warmup_top_queries_file)
+    if top_queries:
+        with warmup_seconds.time(step="prefill"):
+            # Keyed like retrieval keys them: by the canonical query form
+            embed_queries([normalize_query(query) for query in top_queries])
+        logger.info("Pre-filled embedding cache with %d top queries", len(top_queries))
+
+    if settings.warmup_query:
+        with warmup_seconds.time(step="synthetic_query"):
+            run_synthetic_query(settings.warmup_query)
+
+    logger.info("Warm-up complete in %.1fs (%d chunks indexed)", time.perf_counter() - start, documents)
+
+
+class Readiness:
+    """
+    Tracks whether this worker is warm and ready for traffic.
+
+    start() runs warm_up() in a background thread so the server can answer
+    /livez immediately. check() re-verifies the index and the model circuit
+    breakers on every call and, if the warm-up failed (e.g. the index was not
+    ingested yet), starts another attempt in the background - so a worker
+    recovers without a restart.
+    """
+
+    def __init__(self):
+        self.warmed_up = False
+        self.error: Optional[str] = None    # Reason the last attempt failed
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start a warm-up attempt in the background (no-op if one is running)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            warm_up()
+        except Exception as e:
+            logger.warning("Warm-up failed: %s", e)
+            self.error = f"Warm-up failed: {e}"
+            return
+        self.warmed_up = True
+        self.error = None
+        ready_gauge.set(1)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the current warm-up attempt finishes; returns warmed_up."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.warmed_up
+
+    def check(self) -> ReadinessReport:
+        """Evaluate readiness now (used by GET /readyz)."""
+        if not self.warmed_up:
+            self.start()
+            ready_gauge.set(0)
+            error = self.error or "Warm-up in progress"
+            return {"ready": False, "warmed_up": False, "index_documents": 0, "error": error}
+
+        try:
+            documents = index_size()
+        except Exception as e:
+            documents, error = 0, f"Chromadb unavailable: {e}"
+        else:
+            error = None if documents else "Chromadb index is empty"
+
+        unavailable = unavailable_models()
+        if error is None and unavailable:
+            error = f"Models unavailable (circuit open): {', '.join(unavailable)}"
+
+        ready_gauge.set(1 if error is None else 0)
+        return {"ready": error is None, "warmed_up": True, "index_documents": documents, "error": error}